@@ -0,0 +1,74 @@
+"""Measure how many packages per minute are reviewed end to end.
+
+The repositories of a corpus that was recorded with
+`python -m st_package_reviewer.github_replay record` are reviewed
+in a separate process that uses a replay server as its GitHub API,
+so that the results do not depend on the network.
+Arguments after `--` are passed to the reviewer:
+
+    python benchmarks/bench_e2e.py fixtures/ --latency 0.05 -- --jobs 4
+"""
+
+import argparse
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from st_package_reviewer.github_replay import FixtureStore, ReplayServer  # noqa: E402
+
+
+def run(url, repositories, reviewer_args):
+    """Review `repositories` and return the elapsed seconds and the number of reports."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-m", "st_package_reviewer", "--github-url", url,
+                           "--no-cache", "--format", "jsonl", *reviewer_args, *repositories],
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=ROOT, check=False)
+    elapsed = time.perf_counter() - start
+    if proc.returncode < 0:
+        raise RuntimeError("Reviewer exited with {}".format(proc.returncode))
+    return elapsed, len(proc.stdout.splitlines())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.partition("\n")[0])
+    parser.add_argument("fixtures", type=Path)
+    parser.add_argument("--latency", type=float, default=0, metavar="SECONDS",
+                        help="Delay of each response of the replay server. (default: 0)")
+    parser.add_argument("--rate-limit", type=int, metavar="N",
+                        help="Requests per --rate-window answered by the replay server.")
+    parser.add_argument("--rate-window", type=float, default=3600, metavar="SECONDS")
+    parser.add_argument("--repeat", type=int, default=3, metavar="N")
+    argv = sys.argv[1:]
+    reviewer_args = []
+    if "--" in argv:
+        argv, reviewer_args = argv[:argv.index("--")], argv[argv.index("--") + 1:]
+    args = parser.parse_args(argv)
+
+    repositories = ["https://github.com/" + repo
+                    for repo in FixtureStore(args.fixtures).repositories()]
+    if not repositories:
+        parser.error("No recorded repositories in '{}'".format(args.fixtures))
+
+    server = ReplayServer(args.fixtures, latency=args.latency, rate_limit=args.rate_limit,
+                          rate_window=args.rate_window)
+    rates = []
+    with server.start():
+        print("{:>3}  {:>9}  {:>8}  {:>9}  {:>13}".format(
+            "run", "packages", "requests", "seconds", "packages/min"))
+        for i in range(args.repeat):
+            requests_before = server.requests
+            elapsed, packages = run(server.url, repositories, reviewer_args)
+            rates.append(packages / elapsed * 60)
+            print("{:>3}  {:>9}  {:>8}  {:>9.2f}  {:>13.1f}".format(
+                i + 1, packages, server.requests - requests_before, elapsed, rates[-1]))
+        server.shutdown()
+    print("median: {:.1f} packages/min".format(statistics.median(rates)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Compare `lib.jsonc.loads` with the previous regex-based implementation.
+
+Parses generated multi-megabyte `.sublime-completions` and `.sublime-keymap` files
+with comments and trailing commas, and the same files without them:
+
+    python benchmarks/bench_jsonc.py --size 4
+"""
+
+import argparse
+import json
+from pathlib import Path
+import re
+import sys
+import timeit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from st_package_reviewer.lib import jsonc  # noqa: E402
+
+
+# The implementation before the single-pass scanner
+_re_js_comments = re.compile(r"""
+    (                               # Capture code
+        (?:
+            "(?:\\.|[^"\\])*"           # String literal
+            |
+            '(?:\\.|[^'\\])*'           # String literal
+            |
+            (?:[^/\n"']|/[^/*\n"'])+    # Any code besides newlines or string literals
+            |
+            \n                          # Newline
+        )+                          # Repeat
+    )|
+    (/\* (?:[^*]|\*(?!/))* \*/)      # Multi-line comment
+    |
+    (?://(.*)$)                     # Comment
+""", re.VERBOSE + re.MULTILINE)
+
+
+def legacy_loads(string):
+    parts = _re_js_comments.findall(string)
+    stripped = ''.join(x[0].strip(' ') for x in parts)
+    return json.loads(re.sub(r",(\s*[\]}])", r"\1", stripped))
+
+
+def completions(size):
+    """Return the text of a completions file of about `size` bytes."""
+    lines = ['// Generated completions', '{', '    "scope": "source.python",',
+             '    "completions": [']
+    length = 0
+    i = 0
+    while length < size:
+        line = ('        {{"trigger": "func{0}\\tfunction", "contents": "func{0}(${{1:arg}}, '
+                '${{2:\\"value\\"}})", "kind": "function"}}, // https://example.com/{0}'
+                .format(i))
+        lines.append(line)
+        length += len(line) + 1
+        i += 1
+    lines += ['    ],', '}']
+    return "\n".join(lines)
+
+
+def keymap(size):
+    """Return the text of a key bindings file of about `size` bytes."""
+    lines = ['[']
+    length = 0
+    i = 0
+    while length < size:
+        entry = ('    /* Binding {0} */\n'
+                 '    {{ "keys": ["ctrl+k", "ctrl+{1}"], "command": "cmd_{0}",\n'
+                 '      "context": [{{ "key": "selector", "operand": "source.python", }},],\n'
+                 '    }},'.format(i, chr(97 + i % 26)))
+        lines.append(entry)
+        length += len(entry) + 1
+        i += 1
+    lines.append(']')
+    return "\n".join(lines)
+
+
+def _plain(text):
+    return json.dumps(jsonc.loads(text), indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.partition("\n")[0])
+    parser.add_argument("--size", type=float, default=4, metavar="MiB",
+                        help="Size of the generated files. (default: %(default)g)")
+    parser.add_argument("--repeat", type=int, default=5, metavar="N")
+    args = parser.parse_args()
+    size = int(args.size * 1024 ** 2)
+
+    print("{:<24}  {:>8}  {:>12}  {:>12}  {:>8}".format(
+        "file", "MiB", "legacy (ms)", "jsonc (ms)", "speedup"))
+    for name, text in [("completions", completions(size)), ("keymap", keymap(size))]:
+        for variant, variant_text in [("", text), (" (plain)", _plain(text))]:
+            assert legacy_loads(variant_text) == jsonc.loads(variant_text)
+            times = []
+            for func in (legacy_loads, jsonc.loads):
+                times.append(min(timeit.repeat(lambda: func(variant_text),
+                                               number=1, repeat=args.repeat)) * 1000)
+            print("{:<24}  {:>8.1f}  {:>12.1f}  {:>12.1f}  {:>7.1f}x".format(
+                name + variant, len(variant_text) / 1024 ** 2, times[0], times[1],
+                times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,42 @@
 import argparse
+from collections import deque, namedtuple
+import contextvars
 import io
 import logging
+import os
 from pathlib import Path
 import re
 import sys
 import tempfile
 import textwrap
 
-from github3 import GitHub
-
 from . import set_debug, debug_active, __version__
-from . import repo_tools
+from . import cache, limits, profiling, reporters, repo_tools
 from .runner import CheckRunner
-from .check import file as file_c, repo as repo_c
+from .check import file as file_c
 
 
 l = logging.getLogger(__package__)
 
+GITHUB_POOL_SIZE = 16
+
+ReviewResult = namedtuple("ReviewResult", "exit_code report profile package")
+
+# Argument for a package that is piped to stdin as a tar archive
+STDIN = "-"
+# Packages that are reviewed in their archive
+ARCHIVE_SUFFIXES = (".sublime-package", ".zip")
+
 
 def _prepare_nargs(nargs):
     new_nargs = []
     for arg in nargs:
-        if re.match(r"https?://", arg):
+        if arg == STDIN:
+            if STDIN in new_nargs:
+                l.error("'%s' can only be passed once", STDIN)
+                return None
+            new_nargs.append(STDIN)
+        elif re.match(r"https?://", arg):
             m = re.match(r"^https://github\.com/([^/]+)/([^/]+)$", arg)
             if not m:
                 l.error("'%s' is not a valid URL to a github repository. "
@@ -31,8 +46,8 @@ def _prepare_nargs(nargs):
             new_nargs.append(m.group(1, 2))
         else:
             path = Path(arg)
-            if not path.is_dir():
-                l.error("'%s' is not a URL or directory", path)
+            if not (path.is_dir() or path.is_file() and path.suffix in ARCHIVE_SUFFIXES):
+                l.error("'%s' is not a URL, directory or package archive", path)
                 return None
             new_nargs.append(path)
 
@@ -66,14 +81,74 @@ def main(args=None):
     parser.add_argument('--version', action='version', version='%(prog)s ' + __version__)
 
     parser.add_argument("nargs", nargs='*', metavar="path_or_URL",
-                        help="URL to the repository or path to the package to be checked."
+                        help="URL to the repository or path to the package"
+                             " (folder, .sublime-package or .zip file) to be checked,"
+                             " or - to read a tar archive of the package from stdin."
                              " If not provided, runs in interactive mode.")
+    parser.add_argument("--from-channel", metavar="FILE",
+                        help="Review all packages of a Package Control channel or repository"
+                             " (file or URL). Implies --format jsonl by default.")
+    parser.add_argument("--platform", metavar="PLATFORM",
+                        help="Select the releases of --from-channel for PLATFORM,"
+                             " e.g. 'windows' or 'osx-arm64'. (default: this machine's)")
+    parser.add_argument("--serve", metavar="SOCKET",
+                        help="Keep running and review packages for requests"
+                             " sent to a Unix socket at SOCKET.")
+    parser.add_argument("--format", choices=sorted(reporters.FORMATS),
+                        help="Output format of the report. (default: markdown)")
     parser.add_argument("--clip", action='store_true',
                         help="Copy report to clipboard.")
     parser.add_argument("--repo-only", action='store_true',
                         help="Do not check the package itself and only its repository.")
+    parser.add_argument("--in-memory", action='store_true',
+                        help="Review downloaded packages in their zip archive in memory"
+                             " instead of extracting them to disk."
+                             " Does not use the cache of downloaded packages.")
+    parser.add_argument("--no-preflight", dest='preflight', action='store_false',
+                        help="Always download packages"
+                             " instead of checking their file names on GitHub first.")
+    parser.add_argument("--max-members", type=int, metavar="N",
+                        default=limits.DEFAULT_LIMITS.max_members,
+                        help="Fail packages whose archive has more than N files and folders."
+                             " (default: %(default)s)")
+    parser.add_argument("--max-size", type=float, metavar="MiB",
+                        default=limits.DEFAULT_LIMITS.max_size / limits.MiB,
+                        help="Fail packages whose archive or its extracted contents"
+                             " are larger than this. (default: %(default)g)")
+    parser.add_argument("--max-file-size", type=float, metavar="MiB",
+                        default=limits.DEFAULT_LIMITS.max_file_size / limits.MiB,
+                        help="Fail packages with a file that is larger than this."
+                             " (default: %(default)g)")
+    parser.add_argument("--max-ratio", type=float, metavar="N",
+                        default=limits.DEFAULT_LIMITS.max_ratio,
+                        help="Fail packages with a file of at least 1 MiB"
+                             " that is compressed by a ratio of more than N."
+                             " (default: %(default)g)")
     parser.add_argument("-w", "--fail-on-warnings", action='store_true',
                         help="Return a non-zero exit code for warnings as well.")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="Review up to N packages in parallel worker processes."
+                             " 0 uses the number of CPUs. (default: 1)")
+    parser.add_argument("--downloads", type=int, default=4, metavar="N",
+                        help="Download up to N packages while others are checked."
+                             " (default: 4)")
+    parser.add_argument("--threads", type=int, default=1, metavar="N",
+                        help="Run up to N checkers of a package concurrently. (default: 1)")
+    parser.add_argument("--profile", action='store_true',
+                        help="Print the time spent in each checker, file and stage"
+                             " after the report.")
+    parser.add_argument("--profile-json", metavar="FILE",
+                        help="Write profiling data to FILE as JSON. Implies --profile.")
+    parser.add_argument("--no-cache", action='store_true',
+                        help="Do not use or update the caches of file check results"
+                             " and GitHub API responses.")
+    parser.add_argument("--cache-dir", metavar="DIR", type=Path,
+                        help="Folder for cached data. (default: {})"
+                             .format(cache.default_cache_dir()))
+    parser.add_argument("--github-url", metavar="URL",
+                        help="URL of the GitHub API, for example of a GitHub Enterprise server"
+                             " or of a replay server (see st_package_reviewer.github_replay)."
+                             " (default: $GITHUB_API_URL or https://api.github.com)")
     parser.add_argument("-v", "--verbose", action='store_true',
                         help="Increase verbosity.")
     parser.add_argument("--debug", action='store_true',
@@ -84,6 +159,13 @@ def main(args=None):
     if args.debug:
         args.verbose = True
         set_debug(True)
+    if args.profile_json:
+        args.profile = True
+    if not args.cache_dir:
+        args.cache_dir = cache.default_cache_dir()
+    if not args.format:
+        args.format = 'jsonl' if args.from_channel else 'markdown'
+    _configure(args)
 
     # configure logging
     l.addHandler(logging.StreamHandler())
@@ -95,116 +177,607 @@ def main(args=None):
     if nargs is None:
         return -1
 
-    # start doing work
-    gh = GitHub()
+    if args.jobs < 0:
+        l.error("--jobs must not be negative")
+        return -1
+    if args.downloads < 1:
+        l.error("--downloads must be positive")
+        return -1
+    if min(args.max_members, args.max_size, args.max_file_size, args.max_ratio) <= 0:
+        l.error("Archive limits must be positive")
+        return -1
+    if args.debug and args.jobs != 1:
+        l.info("Ignoring --jobs because --debug is active")
+        args.jobs = 1
+
+    reporter = reporters.get_reporter(args.format)
 
+    # start doing work
+    if args.serve:
+        if nargs or args.from_channel:
+            l.error("--serve cannot be combined with paths, URLs or --from-channel")
+            return -1
+        return _serve(args)
+
+    if args.from_channel:
+        if nargs:
+            l.error("--from-channel cannot be combined with paths or URLs")
+            return -1
+        return _write_results(_channel_tasks(args, reporter), args, reporter)
+
+    if not nargs:
+        last_report = None
+        while True:
+            try:
+                orig_arg = input("path/url> ")
+            except (EOFError, KeyboardInterrupt):
+                return 0
+
+            if not orig_arg or orig_arg == '\x16':
+                # '\x16' is produced when pressing ctrl+v on windows
+                continue
+            elif orig_arg == "c":
+                if last_report:
+                    clip(last_report)
+                else:
+                    print("Nothing to copy")
+                continue
+
+            arg = _prepare_nargs([orig_arg])
+            if arg is None:
+                continue
+            else:
+                result = _process_arg(arg[0], orig_arg, args=args)
+                last_report = _render(args.format, [result.report])
+                print(last_report, end='')
+                _finalize_profile([result], args)
+    else:
+        tasks = ((arg, orig_arg) for arg, orig_arg in zip(nargs, args.nargs))
+        return _write_results(tasks, args, reporter, count=len(nargs))
+
+
+def _write_results(tasks, args, reporter, count=None):
+    """Review all tasks and write each package's report as soon as it is available.
+
+    Returns the combined exit code.
+    """
+    exit_code = 0
+    reports = [] if args.clip else None
+    results_with_profile = []
+    out = sys.stdout
+
+    reporter.start(out)
+    for result in _process_all(tasks, args, count):
+        exit_code |= result.exit_code
+        reporter.write(out, result.report)
+        if reports is not None:
+            reports.append(result.report)
+        if result.profile:
+            results_with_profile.append(result)
+    reporter.finish(out)
+
+    _finalize_profile(results_with_profile, args)
+    if reports is not None:
+        clip(_render(args.format, reports))
+
+    return exit_code
+
+
+def _render(format_, reports):
+    """Render the complete output for the given package reports."""
     out = io.StringIO()
+    reporter = reporters.get_reporter(format_)
+    reporter.start(out)
+    for report in reports:
+        reporter.write(out, report)
+    reporter.finish(out)
+    return out.getvalue()
+
+
+def _channel_tasks(args, reporter):
+    """Yield review tasks for the packages of a channel.
+
+    Packages that cannot be reviewed are yielded as finished `ReviewResult`s.
+    If a GitHub token is available,
+    the repository data is prefetched in batches with `snapshots.fetch_snapshots`.
+    """
+    from . import channel, snapshots
+
+    platform = args.platform or channel.current_platform()
+    use_snapshots = snapshots.token() is not None
+    if not use_snapshots:
+        l.debug("GITHUB_TOKEN is not set; fetching repositories individually")
+
+    def flush(batch):
+        found = {}
+        if use_snapshots:
+            try:
+                found = snapshots.fetch_snapshots(
+                    [(entry.owner, entry.repo) for entry in batch
+                     if not isinstance(entry, ReviewResult) and entry.release is not None])
+            except Exception as e:
+                l.error("Unable to fetch repository snapshots: %s", e)
+        for entry in batch:
+            if isinstance(entry, ReviewResult):
+                yield entry
+            elif entry.release is None:
+                out = io.StringIO()
+                reason = "No release for build {} on {}".format(channel.st_build(), platform)
+                reporter.skipped(out, entry.name, entry.url, reason)
+                yield ReviewResult(0, out.getvalue(), [], entry.name)
+            else:
+                # Missing repositories are reported by the regular review
+                snapshot = found.get((entry.owner, entry.repo))
+                yield (entry.owner, entry.repo), entry.url, entry.release, entry.name, snapshot
+
+    batch = []
+    for entry in channel.iter_packages(args.from_channel, platform=platform):
+        if entry.owner is None:
+            out = io.StringIO()
+            reporter.skipped(out, entry.name, entry.url,
+                             "Only packages hosted on GitHub are supported")
+            batch.append(ReviewResult(0, out.getvalue(), [], entry.name))
+            continue
+        batch.append(entry)
+        if len(batch) >= snapshots.BATCH_SIZE:
+            yield from flush(batch)
+            batch = []
+    yield from flush(batch)
+
+
+def _process_all(tasks, args, count=None):
+    """Review `(arg, orig_arg[, release[, name[, snapshot]]])` tasks and yield results in order.
+
+    Tasks are consumed lazily,
+    so only a bounded number of them is pending at any time.
+    Tasks that are already a `ReviewResult` are passed through.
+    In a single process, the stages of consecutive reviews overlap (see `_pipeline`).
+    """
+    jobs = args.jobs or os.cpu_count() or 1
+    if count is not None:
+        jobs = min(jobs, count)
+
+    if jobs <= 1:
+        if count == 1:
+            for task in tasks:
+                yield _process_arg(*task, args=args)
+        else:
+            yield from _pipeline(args).run(
+                task if isinstance(task, ReviewResult) else _Review(*task, args=args)
+                for task in tasks
+            )
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    l.debug("Reviewing packages with %d worker processes", jobs)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(l.level, args)) as executor:
+        pending = deque()
+        for task in tasks:
+            if isinstance(task, ReviewResult):
+                pending.append(task)
+            else:
+                pending.append(executor.submit(_process_arg, *task, args=args))
+            if len(pending) >= 2 * jobs:
+                yield _result(pending.popleft())
+        while pending:
+            yield _result(pending.popleft())
+
+
+def _pipeline(args):
+    """Return a `Pipeline` that passes `_Review`s through their stages.
+
+    The stages that wait for GitHub run in `--downloads` threads,
+    so the next packages are downloaded while the current one is checked.
+    """
+    from .pipeline import Pipeline, Stage
+
+    workers = {'resolve': args.downloads, 'preflight': args.downloads,
+               'download': args.downloads}
+
+    def stage_func(name):
+        def func(review):
+            if isinstance(review, ReviewResult):
+                return review
+            try:
+                return review.run_stage(name)
+            except BaseException:
+                # The review skips the remaining stages, including the report
+                review.close()
+                raise
+        return func
+
+    def discard(review):
+        if isinstance(review, _Review):
+            review.close()
+
+    return Pipeline([Stage(name, stage_func(name), workers.get(name, 1))
+                     for name in _Review.STAGES], discard=discard)
+
+
+def _result(item):
+    return item if isinstance(item, ReviewResult) else item.result()
+
+
+def _serve(args):
+    """Review packages for clients of a Unix socket, keeping warm state between requests."""
+    from .check import repo as repo_c
+    from .check.file.check_keymaps import KeyMapping
+    from .server import ReviewServer
+
+    # Load everything that does not depend on the reviewed package once
+    with profiling.measure("stage", "warm up"):
+        for checker in (*file_c.get_checkers(), *repo_c.get_checkers()):
+            getattr(checker, 'load', lambda: None)()
+        KeyMapping.default_maps()
+        _github()
+
+    def review(target, options):
+        arg = _prepare_nargs([target])
+        if arg is None or arg[0] == STDIN:
+            raise ValueError("'{}' is not a GitHub repository URL or directory".format(target))
+        request_args = argparse.Namespace(**{**vars(args), **options})
+        result = _process_arg(arg[0], target, args=request_args)
+        if result.profile:
+            _finalize_profile([result], request_args)
+        # Each response is a complete document, e.g. with the SARIF log around the run
+        return result.exit_code, _render(request_args.format, [result.report])
 
-    def _process_arg(arg, orig_arg):
-        exit_code = 0
-        if not isinstance(arg, Path):
-            repo_location, url = arg, orig_arg
-            _report_for(repo_location[1], out)
+    try:
+        ReviewServer(args.serve, review).serve()
+    except KeyboardInterrupt:
+        pass
+    return 0
 
-            l.info("Repository URL: %s", url)
-            if not args.repo_only:
-                print("### Repository checks ###", file=out)
-                print(file=out)
 
+def _init_worker(log_level, args):
+    # Worker processes that were spawned instead of forked
+    # do not inherit the logging configuration of the main process.
+    if not l.handlers:
+        l.addHandler(logging.StreamHandler())
+    l.setLevel(log_level)
+    _configure(args)
+
+
+def _configure(args):
+    """Configure module state according to the command line arguments."""
+    global _rate_limit_share
+    profiling.enable(args.profile)
+    cache.configure(None if args.no_cache else args.cache_dir)
+    # Worker processes split the GitHub rate limit budget
+    _rate_limit_share = 1 / (args.jobs or os.cpu_count() or 1)
+    if args.github_url:
+        from . import snapshots
+        snapshots.configure(args.github_url)
+    limits.configure(limits.ArchiveLimits(
+        max_members=args.max_members,
+        max_size=int(args.max_size * limits.MiB),
+        max_file_size=int(args.max_file_size * limits.MiB),
+        max_ratio=args.max_ratio,
+    ))
+
+
+_rate_limit_share = 1.0
+
+
+_gh = None
+
+
+def _github():
+    """Return the GitHub session of the current process."""
+    global _gh
+    if _gh is None:
+        # Importing github3 takes longer than reviewing most local packages
+        from github3 import GitHub
+        from . import ratelimit, snapshots
+        from .http_cache import CachingAdapter
+
+        ratelimit.configure(_rate_limit_share)
+        _gh = GitHub(token=snapshots.token() or "")
+        _gh.session.base_url = snapshots.api_url()
+        # Repository checks and the download share the session concurrently
+        http_cache = cache.get_http_cache()
+        if http_cache is not None:
+            adapter = CachingAdapter(http_cache, pool_maxsize=GITHUB_POOL_SIZE)
+        else:
+            adapter = ratelimit.RateLimitedAdapter(pool_maxsize=GITHUB_POOL_SIZE)
+        _gh.session.mount("https://", adapter)
+        _gh.session.mount("http://", adapter)
+    return _gh
+
+
+def _process_arg(arg, orig_arg, release=None, name=None, snapshot=None, *, args):
+    """Review a single package or repository.
+
+    `release` is a Package Control release definition
+    that determines the ref to check instead of the latest tag.
+    `name` overrides the package name used in the report.
+    `snapshot` is a prefetched `RepoSnapshot` of the repository.
+
+    Returns a `ReviewResult` with the exit code bit flags,
+    the report in the selected format and the profiling records for this argument.
+    All state is local to the call,
+    so that arguments can be processed in separate worker processes.
+    """
+    review = _Review(arg, orig_arg, release, name, snapshot, args=args)
+    try:
+        for stage in _Review.STAGES:
+            result = review.run_stage(stage)
+    finally:
+        review.close()
+    return result
+
+
+class _Review:
+    """The state of a package review while it passes through the stages in `STAGES`.
+
+    Only the last stage writes to the report,
+    except for the repository checks,
+    which run in the background from the first stage on.
+    """
+
+    STAGES = ('resolve', 'preflight', 'download', 'extract', 'check', 'report')
+
+    def __init__(self, arg, orig_arg, release=None, name=None, snapshot=None, *, args):
+        self.arg = arg
+        self.orig_arg = orig_arg
+        self.release = release
+        self.snapshot = snapshot
+        self.args = args
+        if name is None:
+            if arg == STDIN:
+                name = "stdin"
+            elif isinstance(arg, Path):
+                name = arg.stem if arg.suffix in ARCHIVE_SUFFIXES else arg.name
+            else:
+                name = arg[1]
+        self.name = name
+
+        self.out = io.StringIO()
+        self.reporter = reporters.get_reporter(args.format)
+        self.exit_code = 0
+        self.repo = None
+        self.ref = None
+        self.sha = None
+        self.fetched = None
+        self.path = arg if isinstance(arg, Path) and arg.suffix not in ARCHIVE_SUFFIXES else None
+        self.index = None
+        self.runner = None
+        # Prevents the package checks and is reported after the repository checks
+        self.error = None
+        self._repo_checks = None
+        self._tmpdir = None
+        self._fs = None
+
+    def run_stage(self, name):
+        """Run the stage `name` and return the review or, after the last stage, its result."""
+        with profiling.scope(self), profiling.measure("package", self.orig_arg):
+            try:
+                getattr(self, name)()
+            except limits.LimitExceeded as e:
+                # The package is not checked
+                l.error("Archive of %s exceeds a limit; skipping package checks...",
+                        self.orig_arg)
+                self.error = "Package archive exceeds a limit: {}".format(e)
+        if name == self.STAGES[-1]:
+            return ReviewResult(self.exit_code, self.out.getvalue(),
+                                profiling.take_records(self), self.name)
+        return self
+
+    def close(self):
+        """Wait for the repository checks and release the package's files."""
+        if self._repo_checks is not None:
+            self._repo_checks.exception()
+        if self._fs is not None:
+            self._fs.close()
+            self._fs = None
+        self.index = None
+        archive_cache = cache.get_archive_cache()
+        if archive_cache is not None:
+            # Let the package's cached tree be evicted
+            for path in (self.fetched and self.fetched.path, self.path):
+                if path is not None:
+                    archive_cache.release(path)
+        # `close` may be called more than once
+        self.fetched = self.path = None
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+    def resolve(self):
+        """Fetch the repository, start its checks and resolve the ref to check."""
+        out, reporter, args = self.out, self.reporter, self.args
+        reporter.begin_package(out, self.name, self.orig_arg)
+        if self.arg == STDIN:
+            l.info("Reading package from stdin")
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="pkg-rev_")
+            return
+        if isinstance(self.arg, Path):
+            if self.path is None:
+                self._open_archive()
+            else:
+                l.info("Package path: %s", self.arg)
+            return
+
+        repo_location, url = self.arg, self.orig_arg
+        l.info("Repository URL: %s", url)
+        if not args.repo_only:
+            reporter.heading(out, "Repository checks")
+
+        if self.snapshot:
+            l.debug("Using snapshot of %s from %s", repo_location, self.snapshot.pushed_at)
+            repo = self.snapshot
+        else:
             l.debug("Fetching repository information for %s", repo_location)
             try:
-                repo = gh.repository(*repo_location)
+                with profiling.measure("stage", "fetch repository"):
+                    repo = _github().repository(*repo_location)
                 l.debug("Github rate limit remaining: %s", repo.ratelimit_remaining)
             except Exception as e:
                 import traceback
                 traceback.print_exc()
-                print("Unable to download repository; {} {}".format(url, e), file=out)
-                return 4
-
-            if not repo:
-                print("{!r} does not point to a (public) repository".format(url), file=out)
-                return 4
-
-            if not _run_checks(repo_c.get_checkers(), out, args=[repo],
-                               fail_on_warnings=args.fail_on_warnings):
-                exit_code |= 2
-            print(file=out)
-
-            if args.repo_only:
-                l.info("Skipping package download due to --repo-only option")
-                return exit_code
-
-            ref = repo_tools.latest_ref(repo)
-            l.info("Latest ref: %s", ref)
-
-            path = repo_tools.download(repo, ref, tmpdir)
-            if path is None:
-                l.error("Downloading %s failed; skipping package checks...", url)
-                return exit_code
-
-            print("### Package checks ###", file=out)
-            print(file=out)
-
-        else:
-            path = arg
-            _report_for(path.name, out)
-            l.info("Package path: %s", path)
-
-        if not _run_checks(file_c.get_checkers(), out, args=[path],
-                           fail_on_warnings=args.fail_on_warnings):
-            exit_code |= 1
-
-        return exit_code
-
-    def _finalize_report():
-        print(file=out)
-        print("For more details on the report messages (for example how to resolve them), go to:"
-              "\nhttps://github.com/packagecontrol/st_package_reviewer/wiki", file=out)
-        print(file=out)
-        report = out.getvalue()
-        print(report, end='')
-
-        out.close()
-        return report
-
-    with tempfile.TemporaryDirectory(prefix="pkg-rev_") as tmpdir_s:
-        tmpdir = Path(tmpdir_s)
-
-        if not nargs:
-            last_report = None
-            while True:
-                try:
-                    orig_arg = input("path/url> ")
-                except (EOFError, KeyboardInterrupt):
-                    return 0
-
-                if not orig_arg or orig_arg == '\x16':
-                    # '\x16' is produced when pressing ctrl+v on windows
-                    continue
-                elif orig_arg == "c":
-                    if last_report:
-                        clip(last_report)
-                    else:
-                        print("Nothing to copy")
-                    continue
-
-                arg = _prepare_nargs([orig_arg])
-                if arg is None:
-                    continue
-                else:
-                    _process_arg(arg[0], orig_arg)
-                    last_report = _finalize_report()
-                    out = io.StringIO()
-        else:
-            exit_code = 0
-            for arg, orig_arg in zip(nargs, args.nargs):
-                exit_code |= _process_arg(arg, orig_arg)
-
-            report = _finalize_report()
-            if args.clip:
-                clip(report)
-
-            return exit_code
+                reporter.error(out, "Unable to download repository; {} {}".format(url, e))
+                self.exit_code |= 4
+                return
+
+        if not repo:
+            reporter.error(out, "{!r} does not point to a (public) repository".format(url))
+            self.exit_code |= 4
+            return
+        self.repo = repo
+
+        # The checks write their section of the report in the background,
+        # while the package is downloaded and checked.
+        from concurrent.futures import ThreadPoolExecutor
+        from .check import repo as repo_c
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="repository checks")
+        self._repo_checks = executor.submit(
+            contextvars.copy_context().run, _run_checks, repo_c.get_checkers(), out, reporter,
+            "repository", args=[repo], fail_on_warnings=args.fail_on_warnings,
+            threads=args.threads,
+        )
+        executor.shutdown(wait=False)
+
+        if args.repo_only:
+            l.info("Skipping package download due to --repo-only option")
+            return
+
+        with profiling.measure("stage", "resolve ref"):
+            if self.release:
+                self.ref = repo_tools.release_ref(repo, self.release)
+            else:
+                self.ref = repo_tools.latest_ref(repo)
+        if self.ref is None:
+            # Package Control would not install anything
+            self.error = "No tag matches the release's prefix {!r}".format(self.release['tags'])
+            l.error("%s; skipping package checks...", self.error)
+            return
+        l.info("Latest ref: %s", self.ref)
+        self._tmpdir = tempfile.TemporaryDirectory(prefix="pkg-rev_")
+
+    def _open_archive(self):
+        import zipfile
+        from .vfs import ZipFS
+
+        l.info("Package archive: %s", self.arg)
+        try:
+            # The archive is reviewed in place
+            self._fs = ZipFS(self.arg)
+        except (OSError, zipfile.BadZipFile) as e:
+            self.reporter.error(self.out, "Unable to read archive; {} {}".format(self.arg, e))
+            self.exit_code |= 4
+
+    def preflight(self):
+        """Check the file names in the tree of the ref before downloading the package.
+
+        If these checks fail, the package is not downloaded
+        and only their results are reported.
+        """
+        if self.ref is None or not self.args.preflight:
+            return
+        self.sha = repo_tools.resolve_sha(self.repo, self.ref)
+        if self.sha is None:
+            return
+        listing = repo_tools.list_tree(self.repo, self.sha)
+        if listing is None:
+            return
+        if any(path.rpartition('/')[2] == ".gitattributes" for path, _ in listing):
+            # Files with the `export-ignore` attribute are missing from the archive
+            l.debug("Skipping pre-flight checks because of '.gitattributes'")
+            return
+
+        from .file_index import FileIndex
+
+        base_path = Path(self._tmpdir.name, "tree")
+        runner = CheckRunner(file_c.get_names_only_checkers(), self.args.fail_on_warnings,
+                             self.args.threads)
+        runner.run(base_path, index=FileIndex(base_path, listing))
+        if runner.failures:
+            l.info("Checks of file names failed; skipping download of %s", self.orig_arg)
+            self.runner = runner
+
+    def download(self):
+        if self.arg == STDIN:
+            # Extract the archive while it is read
+            tree_path = Path(self._tmpdir.name, "tree")
+            if repo_tools.extract_stream(sys.stdin.buffer, tree_path):
+                self.fetched = repo_tools.Fetched(None, tree_path)
+            else:
+                l.error("Reading the archive from stdin failed; skipping package checks...")
+                self.exit_code |= 4
+            return
+        if self.ref is None or self.runner is not None:
+            return
+        if self.args.in_memory:
+            # The archive never exists on disk
+            self._fs = repo_tools.fetch_to_memory(self.repo, self.sha or self.ref,
+                                                  Path(self._tmpdir.name, "archive.zip"))
+            return
+        self.fetched = repo_tools.fetch(self.repo, self.ref, Path(self._tmpdir.name),
+                                        cache.get_archive_cache(), self.sha)
+
+    def extract(self):
+        if self._fs is not None:
+            from .file_index import FileIndex
+
+            self.index = FileIndex.for_fs(self._fs)
+            self.path = self._fs.base_path
+            return
+        if self.fetched is None:
+            return
+        # The extracted tree takes over the hold of the fetched path
+        fetched, self.fetched = self.fetched, None
+        self.path = repo_tools.extract(self.repo, fetched, Path(self._tmpdir.name),
+                                       cache.get_archive_cache())
+
+    def check(self):
+        if self.runner is not None or self.error is not None:
+            return
+        if self.path is None:
+            if self.ref is not None:
+                l.error("Downloading %s failed; skipping package checks...", self.orig_arg)
+            return
+        if self.index is None:
+            from .file_index import FileIndex
+
+            # Not shared through `FileChecker`'s cache,
+            # so that the index and its parsed documents are released with the review
+            with profiling.measure("stage", "index files"):
+                self.index = FileIndex(self.path)
+        self.runner = CheckRunner(file_c.get_checkers(), self.args.fail_on_warnings,
+                                  self.args.threads)
+        self.runner.run(self.path, index=self.index)
+
+    def report(self):
+        try:
+            if self._repo_checks is not None and not self._repo_checks.result():
+                self.exit_code |= 2
+            if self.runner is not None:
+                if self.repo is not None:
+                    self.reporter.heading(self.out, "Package checks")
+                self.runner.report(file=self.out, reporter=self.reporter, title="package")
+                if not self.runner.result():
+                    self.exit_code |= 1
+            if self.error is not None:
+                self.reporter.error(self.out, self.error)
+                self.exit_code |= 1
+        finally:
+            self.close()
+        self.reporter.end_package(self.out, self.exit_code, self.ref)
+
+
+def _finalize_profile(results, args):
+    if not args.profile:
+        return
+    records = [(result.package, record) for result in results for record in result.profile]
+    # Keep machine-readable output on stdout parseable
+    file = sys.stdout if args.format == 'markdown' else sys.stderr
+    profiling.print_table([record for _, record in records], file=file)
+    if args.profile_json:
+        profiling.dump_json(records, args.profile_json)
+        l.info("Wrote profiling data to '%s'", args.profile_json)
 
 
 def clip(text):
@@ -213,16 +786,11 @@ def clip(text):
     print("Report copied to clipboard")
 
 
-def _report_for(name, file):
-    print(file=file)
-    print("##", "Report for", name, "#" * (40 - len(name)), file=file)
-    print(file=file)
-
-
-def _run_checks(checkers, file, args=[], kwargs={}, fail_on_warnings=False):
-    runner = CheckRunner(checkers, fail_on_warnings)
+def _run_checks(checkers, file, reporter, title, args=[], kwargs={}, fail_on_warnings=False,
+                threads=1):
+    runner = CheckRunner(checkers, fail_on_warnings, threads)
     runner.run(*args, **kwargs)
-    runner.report(file=file)
+    runner.report(file=file, reporter=reporter, title=title)
     return runner.result()
 
 
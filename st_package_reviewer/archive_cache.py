@@ -0,0 +1,222 @@
+"""Repository archives and their extracted trees, cached by commit SHA.
+
+The contents of a commit never change,
+so archives can be reused by later runs and other worker processes
+as long as they are stored under the commit's SHA
+instead of a tag or branch name.
+
+Layout of the cache folder:
+
+    archives/<owner>/<repo>/<sha>.zip
+    trees/<owner>/<repo>/<sha>/<top-level folder of the archive>/...
+
+Downloads are extracted while they are transferred,
+so only their trees are stored;
+zip archives stored by earlier versions are still used.
+
+Entries that are in use are not evicted:
+those returned to this process are held until they are released,
+and those used by other processes are recognized by their recent modification time.
+"""
+
+from collections import Counter
+import logging
+import os
+from pathlib import Path
+import shutil
+import tempfile
+import threading
+import time
+
+__all__ = ('ArchiveCache',)
+
+l = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 1024 ** 3
+# Entries used by another process within this many seconds are kept
+DEFAULT_MIN_AGE = 600
+
+
+class ArchiveCache:
+    """A size-bounded store of archives and extracted trees.
+
+    When the total size exceeds `max_size`,
+    the least recently used archives and trees are removed,
+    except for entries that are held by this process
+    or that were used less than `min_age` seconds ago.
+    Entries are written to temporary locations and renamed when complete,
+    so multiple processes may use the same folder.
+
+    The paths returned by the `get_*` and `put_*` methods are held
+    until they are passed to `release`.
+    """
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE, min_age=DEFAULT_MIN_AGE):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.min_age = min_age
+        self._lock = threading.Lock()
+        # Entries never change, so their sizes only need to be computed once
+        self._sizes = {}
+        # Number of holders of each entry in this process
+        self._holds = Counter()
+
+    @staticmethod
+    def _name(owner, repo, sha):
+        return Path(owner.lower(), repo.lower(), sha)
+
+    def archive_path(self, owner, repo, sha):
+        return self.path / "archives" / self._name(owner, repo, sha).with_suffix(".zip")
+
+    def tree_path(self, owner, repo, sha):
+        return self.path / "trees" / self._name(owner, repo, sha)
+
+    def get_archive(self, owner, repo, sha):
+        """Return the path of the cached archive or `None`."""
+        return self._use(self.archive_path(owner, repo, sha))
+
+    def get_tree(self, owner, repo, sha):
+        """Return the path of the cached extracted tree or `None`."""
+        return self._use(self.tree_path(owner, repo, sha))
+
+    def _use(self, path):
+        # Locked so that the entry is not evicted before it is held
+        with self._lock:
+            try:
+                # Mark the entry as recently used
+                os.utime(path)
+            except FileNotFoundError:
+                return None
+            except OSError:
+                pass
+            self._holds[path] += 1
+        return path
+
+    def _hold(self, path):
+        with self._lock:
+            self._holds[path] += 1
+
+    def release(self, path):
+        """Allow the entry containing `path` to be evicted again.
+
+        `path` may also be a path inside of an entry.
+        Paths outside of the cache are ignored.
+        """
+        try:
+            parts = Path(path).relative_to(self.path).parts
+        except ValueError:
+            return
+        entry_path = self.path.joinpath(*parts[:4])
+        with self._lock:
+            if self._holds[entry_path] > 1:
+                self._holds[entry_path] -= 1
+            else:
+                self._holds.pop(entry_path, None)
+
+    def put_archive(self, owner, repo, sha, write):
+        """Store an archive written by `write(file)` and return its path.
+
+        Returns `None` if `write` returns a false value.
+        """
+        target = self.archive_path(owner, repo, sha)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=".tmp-", suffix=".zip")
+        self._hold(target)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if not write(f):
+                    self.release(target)
+                    return None
+            os.replace(tmp_path, target)
+        except BaseException:
+            self.release(target)
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self.evict()
+        return target
+
+    def put_tree(self, owner, repo, sha, extract):
+        """Store a tree extracted by `extract(folder)` and return its path.
+
+        Returns `None` if `extract` returns a false value.
+        """
+        target = self.tree_path(owner, repo, sha)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(tempfile.mkdtemp(dir=target.parent, prefix=".tmp-"))
+        self._hold(target)
+        try:
+            if not extract(tmp_path):
+                self.release(target)
+                return None
+            try:
+                os.rename(tmp_path, target)
+            except OSError:
+                # Another process extracted the same tree in the meantime
+                if not target.is_dir():
+                    raise
+        except BaseException:
+            self.release(target)
+            raise
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict()
+        return target
+
+    def _entries(self):
+        for kind in ("archives", "trees"):
+            for entry_path in (self.path / kind).glob("*/*/*"):
+                if entry_path.name.startswith(".tmp-"):
+                    continue
+                try:
+                    mtime = entry_path.stat().st_mtime
+                    if entry_path not in self._sizes:
+                        self._sizes[entry_path] = _size(entry_path)
+                except OSError:
+                    continue
+                yield entry_path, mtime, self._sizes[entry_path]
+
+    def size(self):
+        with self._lock:
+            return sum(size for _, _, size in self._entries())
+
+    def evict(self, target_size=None):
+        """Remove the least recently used entries until the cache fits `target_size`.
+
+        Entries that are held or were recently used are kept,
+        even if the cache does not fit afterwards.
+        Returns the new size of the cache.
+        """
+        if target_size is None:
+            target_size = self.max_size
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            size = sum(entry_size for _, _, entry_size in entries)
+            min_mtime = time.time() - self.min_age
+            for entry_path, mtime, entry_size in entries:
+                if size <= target_size or mtime > min_mtime:
+                    break
+                if entry_path in self._holds:
+                    continue
+                l.debug("Evicting '%s' from archive cache", entry_path)
+                if entry_path.is_dir():
+                    shutil.rmtree(entry_path, ignore_errors=True)
+                else:
+                    entry_path.unlink(missing_ok=True)
+                self._sizes.pop(entry_path, None)
+                size -= entry_size
+        return size
+
+
+def _size(path):
+    if not path.is_dir():
+        return path.stat().st_size
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
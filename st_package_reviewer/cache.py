@@ -0,0 +1,220 @@
+"""Persistent caches that are shared between runs.
+
+The cache is disabled until `configure` is called,
+which the command line interface does unless `--no-cache` is specified.
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import threading
+import time
+
+from . import __version__
+from .archive_cache import ArchiveCache
+
+__all__ = ('DiskCache', 'configure', 'get_cache', 'get_http_cache', 'get_archive_cache',
+           'default_cache_dir', 'reviewer_version', 'make_key', 'memoize')
+
+l = logging.getLogger(__name__)
+
+DATA_PATH = Path(__file__).parent / "data"
+
+DEFAULT_MAX_SIZE = 256 * 1024 ** 2
+HTTP_MAX_SIZE = 64 * 1024 ** 2
+# Time after which unused HTTP responses are dropped
+HTTP_MAX_AGE = 7 * 24 * 60 * 60
+
+_MISSING = object()
+
+
+class DiskCache:
+    """A size-bounded store of pickled values in a folder.
+
+    When the total size exceeds `max_size`,
+    the least recently used entries are removed.
+    If `max_age` is set, entries that have not been used for that many seconds
+    are ignored and removed on eviction.
+    Writes are atomic, so multiple processes may use the same folder.
+    """
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE, max_age=None):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.max_age = max_age
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _entry_path(self, key):
+        return self.path / key[:2] / key[2:]
+
+    def get(self, key, default=None):
+        entry_path = self._entry_path(key)
+        try:
+            if self._expired(entry_path.stat()):
+                return default
+            with entry_path.open('rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return default
+        except Exception as e:
+            l.debug("Unable to load cache entry %s: %s", key, e)
+            return default
+
+        try:
+            # Mark the entry as recently used
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """Store a value. Return whether it could be pickled and written."""
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            l.debug("Unable to pickle cache entry %s: %s", key, e)
+            return False
+
+        entry_path = self._entry_path(key)
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=entry_path.parent, prefix=".tmp-")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            l.debug("Unable to write cache entry %s: %s", key, e)
+            return False
+
+        self._grow(len(data))
+        return True
+
+    def _expired(self, stat):
+        return self.max_age is not None and time.time() - stat.st_mtime > self.max_age
+
+    def _entries(self):
+        for entry_path in self.path.glob("??/*"):
+            if entry_path.name.startswith(".tmp-"):
+                continue
+            try:
+                yield entry_path, entry_path.stat()
+            except OSError:
+                pass
+
+    def size(self):
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def _grow(self, added):
+        with self._lock:
+            if self._size is None:
+                self._size = self.size()
+            else:
+                self._size += added
+            if self._size > self.max_size:
+                self._size = self.evict(int(self.max_size * 0.9))
+
+    def evict(self, target_size=None):
+        """Remove the least recently used entries until the cache fits `target_size`.
+
+        Expired entries are always removed.
+        Returns the new size of the cache.
+        """
+        if target_size is None:
+            target_size = self.max_size
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        size = sum(stat.st_size for _, stat in entries)
+        removed = 0
+        for entry_path, stat in entries:
+            if size <= target_size and not self._expired(stat):
+                break
+            try:
+                entry_path.unlink()
+            except OSError:
+                continue
+            size -= stat.st_size
+            removed += 1
+        l.debug("Evicted %d entries from cache at '%s'", removed, self.path)
+        return size
+
+    def clear(self):
+        for entry_path, _ in self._entries():
+            entry_path.unlink(missing_ok=True)
+        with self._lock:
+            self._size = 0
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA')
+    if not base:
+        base = Path.home() / ".cache"
+    return Path(base, "st_package_reviewer")
+
+
+_cache = None
+_http_cache = None
+_archive_cache = None
+
+
+def configure(path=None, max_size=DEFAULT_MAX_SIZE):
+    """Enable the caches in `path` or disable them if `path` is `None`."""
+    global _cache, _http_cache, _archive_cache
+    if path is None:
+        _cache = _http_cache = _archive_cache = None
+    else:
+        _cache = DiskCache(Path(path, "results"), max_size)
+        _http_cache = DiskCache(Path(path, "http"), HTTP_MAX_SIZE, HTTP_MAX_AGE)
+        _archive_cache = ArchiveCache(Path(path, "repositories"))
+
+
+def get_cache():
+    return _cache
+
+
+def get_http_cache():
+    return _http_cache
+
+
+def get_archive_cache():
+    return _archive_cache
+
+
+def reviewer_version():
+    """Return a version string that changes whenever check results may change.
+
+    Includes the Sublime Text build of the bundled default key bindings.
+    """
+    try:
+        data_version = (DATA_PATH / "VERSION").read_text().strip()
+    except OSError:
+        data_version = "unknown"
+    return "{}+st{}".format(__version__, data_version)
+
+
+def make_key(*parts):
+    """Build a cache key from string parts and the reviewer version."""
+    digest = hashlib.sha256(reviewer_version().encode())
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(part.encode() if isinstance(part, str) else part)
+    return digest.hexdigest()
+
+
+def memoize(kind, content, parse):
+    """Return `parse(content)`, using a cached result for identical content.
+
+    `content` must be `str` or `bytes`.
+    """
+    cache = get_cache()
+    if cache is None:
+        return parse(content)
+    raw = content.encode() if isinstance(content, str) else content
+    key = make_key(kind, hashlib.sha256(raw).digest())
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = parse(content)
+        cache.put(key, value)
+    return value
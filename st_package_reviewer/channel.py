@@ -0,0 +1,299 @@
+"""Read packages from Package Control channel and repository files.
+
+Package entries are parsed one at a time from the input stream,
+so that even channels with thousands of packages use little memory.
+"""
+
+import codecs
+from collections import namedtuple
+import json
+import logging
+from pathlib import Path
+import re
+from urllib.parse import urljoin, urlparse
+import urllib.request
+
+__all__ = ('PackageEntry', 'iter_packages', 'select_release', 'st_build', 'current_platform')
+
+l = logging.getLogger(__name__)
+
+DATA_PATH = Path(__file__).parent / "data"
+
+# Keys of top-level arrays that contain package entries
+_PACKAGE_KEYS = ('packages',)
+# Keys of top-level objects that map repository URLs to arrays of package entries
+_PACKAGE_CACHE_KEYS = ('packages_cache',)
+# Keys of top-level arrays of further repository files
+_INCLUDE_KEYS = ('repositories', 'includes')
+
+
+PackageEntry = namedtuple("PackageEntry", "name url owner repo release source")
+PackageEntry.__doc__ = """A package to review.
+
+`owner` and `repo` are `None` if the package is not hosted on GitHub.
+`release` is the release definition that Package Control would install
+or `None` if there is none for the Sublime Text build and platform.
+"""
+
+
+def st_build():
+    """Return the Sublime Text build that releases are selected for."""
+    return int((DATA_PATH / "VERSION").read_text().strip())
+
+
+def current_platform():
+    """Return the platform of this machine like Package Control names it, e.g. 'linux-x64'."""
+    import platform
+    import sys
+
+    if sys.platform.startswith("win"):
+        name = "windows"
+    elif sys.platform == "darwin":
+        name = "osx"
+    else:
+        name = "linux"
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        arch = "arm64"
+    elif machine.endswith("64"):
+        arch = "x64"
+    else:
+        arch = "x32"
+    return "{}-{}".format(name, arch)
+
+
+class _JsonStream:
+    """Incrementally parse JSON from a file object.
+
+    Containers are iterated element by element
+    while other values are decoded with `json.JSONDecoder.raw_decode`.
+    """
+
+    def __init__(self, fp, chunk_size=64 * 1024):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+        # Multi-byte characters may be split between chunks of binary files
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        while True:
+            raw = self.fp.read(self.chunk_size)
+            if isinstance(raw, str):
+                chunk = raw
+            else:
+                chunk = self._text_decoder.decode(raw, final=not raw)
+            # Continue if the chunk only holds the beginning of a character
+            if chunk or not raw:
+                break
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop the consumed part of the buffer
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _error(self, msg):
+        return ValueError("{} at offset {} of the current buffer".format(msg, self.pos))
+
+    def peek(self):
+        """Skip whitespace and return the next character or '' at the end."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self._error("Expected {!r}".format(char))
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number at the end of the buffer may be incomplete
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def skip(self):
+        if self.peek() == '{':
+            for _ in self.iter_object():
+                self.skip()
+        elif self.peek() == '[':
+            for _ in self.iter_array():
+                self.skip()
+        else:
+            self.value()
+
+    def _iter_container(self, start, end):
+        self.expect(start)
+        if self.peek() == end:
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == end:
+                return
+            elif char != ',':
+                raise self._error("Expected ',' or {!r}".format(end))
+
+    def iter_array(self):
+        """Yield once for each element, which the caller must consume."""
+        yield from self._iter_container('[', ']')
+
+    def iter_object(self):
+        """Yield each key, whose value the caller must consume."""
+        for _ in self._iter_container('{', '}'):
+            key = self.value()
+            self.expect(':')
+            yield key
+
+
+def _open(source):
+    if re.match(r"https?://", source):
+        l.debug("Fetching '%s'", source)
+        return urllib.request.urlopen(source)
+    return open(source, 'rb')
+
+
+def _resolve(source, include):
+    if re.match(r"https?://", include):
+        return include
+    if re.match(r"https?://", source):
+        return urljoin(source, include)
+    return str(Path(source).parent / include)
+
+
+def _iter_source(source, seen):
+    includes = []
+    cached_repositories = set()
+    with _open(source) as fp:
+        stream = _JsonStream(fp)
+        for key in stream.iter_object():
+            if key in _PACKAGE_KEYS:
+                for _ in stream.iter_array():
+                    yield stream.value(), source
+            elif key in _PACKAGE_CACHE_KEYS:
+                for repository in stream.iter_object():
+                    cached_repositories.add(repository)
+                    for _ in stream.iter_array():
+                        yield stream.value(), repository
+            elif key in _INCLUDE_KEYS:
+                includes.extend(stream.value())
+            else:
+                stream.skip()
+
+    for include in includes:
+        include = _resolve(source, include)
+        if include in cached_repositories or include in seen:
+            continue
+        seen.add(include)
+        try:
+            yield from _iter_source(include, seen)
+        except (OSError, ValueError) as e:
+            l.error("Unable to read repository '%s': %s", include, e)
+
+
+def _github_location(url):
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.netloc not in ("github.com", "www.github.com"):
+        return None
+    parts = parsed.path.strip("/").split("/")
+    if len(parts) < 2:
+        return None
+    return parts[0], parts[1].removesuffix(".git")
+
+
+def _selector_matches(selector, build):
+    selector = selector.strip()
+    if selector == "*":
+        return True
+    m = re.fullmatch(r"(\d+)\s*-\s*(\d+)", selector)
+    if m:
+        return int(m.group(1)) <= build <= int(m.group(2))
+    m = re.fullmatch(r"(<=|>=|<|>|=)?\s*(\d+)", selector)
+    if not m:
+        l.debug("Unknown sublime_text selector %r", selector)
+        return False
+    op, version = m.group(1) or "=", int(m.group(2))
+    return {
+        "<": build < version,
+        "<=": build <= version,
+        ">": build > version,
+        ">=": build >= version,
+        "=": build == version,
+    }[op]
+
+
+def _platforms_match(platforms, platform):
+    if isinstance(platforms, str):
+        platforms = [platforms]
+    name = platform.partition("-")[0]
+    return any(selector in ("*", name, platform) for selector in platforms)
+
+
+def select_release(releases, build=None, platform=None):
+    """Return the first release that Package Control would install on `build` and `platform`.
+
+    `platform` is a name like 'windows' or 'osx-arm64'
+    and defaults to the platform of this machine.
+    """
+    if build is None:
+        build = st_build()
+    if platform is None:
+        platform = current_platform()
+    for release in releases or ():
+        if (_selector_matches(release.get('sublime_text', "*"), build)
+                and _platforms_match(release.get('platforms', "*"), platform)):
+            return release
+    return None
+
+
+def _make_entry(data, source, build, platform):
+    release = select_release(data.get('releases'), build, platform)
+    url = (release or {}).get('base') or data.get('details') or data.get('homepage')
+    location = _github_location(url)
+    if location is None and release and release.get('url'):
+        # Entries of a channel's packages_cache contain resolved download URLs
+        m = re.match(r"https://codeload\.github\.com/([^/]+)/([^/]+)/", release['url'])
+        if m:
+            location = m.group(1, 2)
+    owner, repo = location or (None, None)
+    name = data.get('name') or repo or url
+    return PackageEntry(name, url, owner, repo, release, source)
+
+
+def iter_packages(source, build=None, platform=None):
+    """Yield a `PackageEntry` for each package in a channel or repository file or URL.
+
+    Included repositories are followed,
+    unless their packages are part of the channel's `packages_cache`.
+    Releases are selected for `build` and `platform` (see `select_release`).
+    """
+    if build is None:
+        build = st_build()
+    if platform is None:
+        platform = current_platform()
+    for data, entry_source in _iter_source(str(source), {str(source)}):
+        yield _make_entry(data, entry_source, build, platform)
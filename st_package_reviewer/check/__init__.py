@@ -30,21 +30,33 @@ class Checker(metaclass=abc.ABCMeta):
         # TODO capture calling frame
         if context is None:
             context = tuple(self._context_stack)
-        report = Report(message, context[:], exception, exc_info)
+        report = Report(message, context[:], exception, exc_info, self.__class__.__name__)
         append_to.append(report)
 
     def perform_check(self):
         try:
             self.check()
         except Exception as e:  # pragma: no cover
-            msg = "Unhandled exception in 'check' routine"
-            self.fail(msg, exception=e, exc_info=sys.exc_info())
-            if debug_active():
-                import pdb
-                pdb.post_mortem()
-            l.exception(msg)
+            self._report_unhandled(e)
         self._checked = True
 
+    @classmethod
+    def perform_checks(cls, checkers):
+        """Perform the checks of multiple checker instances.
+
+        Subclasses may override this to share work between their instances.
+        """
+        for checker in checkers:
+            checker.perform_check()
+
+    def _report_unhandled(self, e):
+        msg = "Unhandled exception in 'check' routine"
+        self.fail(msg, exception=e, exc_info=sys.exc_info())
+        if debug_active():
+            import pdb
+            pdb.post_mortem()
+        l.exception(msg)
+
     def result(self):
         """Return whether checks ran without issues (`True`) or there were failures (`False`)."""
         if not self._checked:
@@ -0,0 +1,42 @@
+"""Checker classes of the bundled checker packages.
+
+Generated by `python -m st_package_reviewer.check.registry`. Do not edit.
+"""
+
+CHECKERS = {
+    'st_package_reviewer.check.file': (
+        ('.ast.check_command_names', 'CheckCommandNames', {'names_only': False}),
+        ('.ast.check_initialized_api', 'CheckInitializedApiUsage', {'names_only': False}),
+        ('.ast.check_no_modify_sys_path', 'CheckNoModifySysPath', {'names_only': False}),
+        ('.ast.check_os_system_calls', 'CheckOsSystemCalls', {'names_only': False}),
+        ('.ast.check_platform_usage', 'CheckPlatformUsage', {'names_only': False}),
+        ('.check_keymaps', 'CheckKeymaps', {'names_only': False}),
+        ('.check_license', 'CheckLicense', {'names_only': True}),
+        ('.check_messages', 'CheckMessages', {'names_only': False}),
+        ('.check_mousemaps', 'CheckMousemaps', {'names_only': False}),
+        ('.check_no-sublime-package', 'CheckNoSublimePackage', {'names_only': True}),
+        ('.check_redundant_files', 'CheckPackageMetadata', {'names_only': True}),
+        ('.check_redundant_files', 'CheckPycFiles', {'names_only': True}),
+        ('.check_redundant_files', 'CheckCacheFiles', {'names_only': True}),
+        ('.check_redundant_files', 'CheckSublimePackageFiles', {'names_only': True}),
+        ('.check_redundant_files', 'CheckSublimeWorkspaceFiles', {'names_only': True}),
+        ('.check_resource_file_validity', 'CheckJsoncFiles', {'names_only': False}),
+        ('.check_resource_file_validity', 'CheckPlistFiles', {'names_only': False}),
+        ('.check_resource_file_validity', 'CheckXmlFiles', {'names_only': False}),
+        ('.check_resource_files', 'CheckPluginsInRoot', {'names_only': True}),
+        ('.check_resource_files', 'CheckHasResourceFiles', {'names_only': True}),
+        ('.check_resource_files', 'CheckHasSublimeSyntax', {'names_only': True}),
+    ),
+    'st_package_reviewer.check.file.ast': (
+        ('.check_command_names', 'CheckCommandNames', {'names_only': False}),
+        ('.check_initialized_api', 'CheckInitializedApiUsage', {'names_only': False}),
+        ('.check_no_modify_sys_path', 'CheckNoModifySysPath', {'names_only': False}),
+        ('.check_os_system_calls', 'CheckOsSystemCalls', {'names_only': False}),
+        ('.check_platform_usage', 'CheckPlatformUsage', {'names_only': False}),
+    ),
+    'st_package_reviewer.check.repo': (
+        ('.check_readme', 'CheckReadme', {}),
+        ('.check_tags', 'CheckSemverTags', {}),
+        ('.check_tags', 'CheckOnlyPrereleaseTags', {}),
+    ),
+}
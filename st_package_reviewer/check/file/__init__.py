@@ -1,52 +1,167 @@
+from contextlib import contextmanager
 import functools
 import itertools
 from pathlib import Path
 
 from .. import Checker, find_all
+from ..registry import load_checkers
+from ... import cache, profiling
+from ...file_index import FileIndex
+from ...locking import locked_cache
 
-__all__ = ('FileChecker', 'get_checkers')
+__all__ = ('FileChecker', 'get_checkers', 'get_names_only_checkers', 'find_checkers')
 
 
 class FileChecker(Checker):
     """Groups checks for packages' contents.
 
     Also adds utilities for file systems to the Checker class.
+    File system queries are answered from a `FileIndex`
+    that is built once per package and shared by all checkers.
+
+    Checks of individual files should be run with `check_file`,
+    so that their reports can be reused from the result cache
+    when the file's contents did not change.
+    Checkers whose reports for a file depend on its path, such as its name,
+    must set `cache_by_path` to `True`.
+    Checkers whose reports for a file depend on other files
+    must set `cacheable` to `False`.
+
+    Resource files should be parsed through `resources`,
+    so that each file is parsed only once per package.
+
+    Checkers that only look at file and folder names
+    set `names_only` to `True`;
+    they can run against an `index` of a listing before the package is downloaded.
     """
 
-    def __init__(self, base_path):
+    cacheable = True
+    cache_by_path = False
+    names_only = False
+
+    def __init__(self, base_path, index=None):
         super().__init__()
-        self.base_path = base_path
+        self.base_path = Path(base_path).absolute()
+        self._index = index
 
     @staticmethod
-    # Cache results of glob calls (this is naive, but realistic)
-    @functools.lru_cache()
-    def _glob(base_path, pattern):
-        return list(base_path.glob(pattern))
+    # Cache the index for each package (this is naive, but realistic)
+    @locked_cache()
+    def _get_index(base_path):
+        with profiling.measure("stage", "index files"):
+            return FileIndex(base_path)
+
+    @property
+    def index(self):
+        if self._index is not None:
+            return self._index
+        return self._get_index(self.base_path)
+
+    @property
+    def resources(self):
+        """The parsed resource files of the package, shared by all checkers."""
+        return self.index.resources
 
     def glob(self, pattern):
-        return self._glob(self.base_path, pattern)
+        return self.index.glob(pattern)
 
     def globs(self, *patterns):
         return itertools.chain(*(self.glob(ptrn) for ptrn in patterns))
 
+    def check_file(self, path, func):
+        """Call `func(path)` within the file's context or replay its cached reports."""
+        with self.file_context(path):
+            if self.replay_cached(path):
+                return
+            with self.record_reports(path):
+                func(path)
+
+    def _cache_key(self, path):
+        checker_name = "{}.{}".format(self.__class__.__module__, self.__class__.__qualname__)
+        parts = [checker_name, self.index.content_hash(path)]
+        if self.cache_by_path:
+            parts.append(self.rel_path(path).as_posix())
+        return cache.make_key("reports", *parts)
+
+    def replay_cached(self, path):
+        """Report the cached results of a file. Return whether any were found."""
+        result_cache = cache.get_cache()
+        if result_cache is None or not self.cacheable:
+            return False
+        entries = result_cache.get(self._cache_key(path))
+        if entries is None:
+            return False
+
+        context = tuple(self._context_stack)
+        for is_failure, message, sub_context, exception in entries:
+            self._append_report(self.failures if is_failure else self.warnings,
+                                message, context + sub_context, exception)
+        return True
+
+    @contextmanager
+    def record_reports(self, path):
+        """Store the reports made within the body in the result cache."""
+        result_cache = cache.get_cache()
+        if result_cache is None or not self.cacheable:
+            yield
+            return
+
+        context_depth = len(self._context_stack)
+        n_failures, n_warnings = len(self.failures), len(self.warnings)
+        yield
+        reports = ([(True, report) for report in self.failures[n_failures:]]
+                   + [(False, report) for report in self.warnings[n_warnings:]])
+        if any(report.exc_info for _, report in reports):
+            # Unhandled exceptions are not a result of the file's contents
+            return
+        entries = [(is_failure, report.message, report.context[context_depth:], report.exception)
+                   for is_failure, report in reports]
+        result_cache.put(self._cache_key(path), entries)
+
     def sub_path(self, rel_path):
         return Path(self.base_path, rel_path)
 
+    def is_file(self, path):
+        """Check whether a path (relative to the package or absolute) is a file."""
+        return self.index.is_file(path)
+
+    def is_dir(self, path):
+        """Check whether a path (relative to the package or absolute) is a folder."""
+        return self.index.is_dir(path)
+
+    def iterdir(self, path=''):
+        return self.index.iterdir(path)
+
+    def open(self, path, mode='r', **kwargs):
+        """Open a file of the package, which may not be extracted to disk."""
+        return self.index.open(path, mode, **kwargs)
+
     def rel_path(self, path):
         return path.relative_to(self.base_path)
 
-    def file_context(self, path):
+    @contextmanager
+    def file_context(self, path, profile=True):
         try:
             path = self.rel_path(path)
         except ValueError:
             pass
-        return self.context("File: {}".format(path))
+        with self.context("File: {}".format(path)):
+            if profile:
+                with profiling.measure("file", "{}: {}".format(path, self.__class__.__name__)):
+                    yield
+            else:
+                yield
 
 
-get_checkers = functools.partial(
+find_checkers = functools.partial(
     find_all,
     Path(__file__).parent,
     __package__,
     base_class=FileChecker,
     exclude='AstChecker',
 )
+get_checkers = functools.partial(load_checkers, __package__, find_checkers)
+
+
+def get_names_only_checkers():
+    return [checker for checker in get_checkers() if checker.names_only]
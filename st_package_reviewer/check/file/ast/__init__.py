@@ -1,54 +1,241 @@
 import functools
 import ast
+from contextlib import ExitStack
+import logging
 from pathlib import Path
+import time
+from .... import profiling
 from ....check.file import FileChecker
 from ....check import find_all
+from ....check.registry import load_checkers
 
-__all__ = ('AstChecker', 'get_checkers')
+__all__ = ('AstChecker', 'AstDispatcher', 'get_checkers', 'find_checkers')
+
+l = logging.getLogger(__name__)
 
 
 class AstChecker(FileChecker, ast.NodeVisitor):
-    """Groups checks for python source code."""
+    """Groups checks for python source code.
+
+    Like with `ast.NodeVisitor`, a `visit_<NodeType>` method
+    replaces the visit of a node's children,
+    unless it calls `generic_visit` on that node.
+    Additionally, `leave_<NodeType>` methods are called
+    after a node's children have been visited.
+    """
 
-    _ast_cache = {}
+    _fused_node = None
+    _fused_descend = False
 
-    def __init__(self, base_path):
-        super().__init__(base_path)
+    def __init__(self, base_path, index=None):
+        super().__init__(base_path, index)
 
     def check(self):
+        self.before_visits()
         self.visit_all_pyfiles()
+        self.after_visits()
+
+    @classmethod
+    def perform_checks(cls, checkers):
+        """Perform the checks of all checkers with a single traversal per file.
+
+        Checkers that override `check` are performed individually.
+        """
+        fusable = []
+        for checker in checkers:
+            if type(checker).check is not AstChecker.check:
+                with profiling.measure("checker", checker.__class__.__name__):
+                    checker.perform_check()
+                continue
+            fusable.append(checker)
+
+        dispatcher = AstDispatcher(fusable)
+        for checker in list(fusable):
+            try:
+                dispatcher.timed(checker, checker.before_visits)
+            except Exception as e:  # pragma: no cover
+                checker._report_unhandled(e)
+                fusable.remove(checker)
+        dispatcher.checkers = fusable
+
+        dispatcher.visit_all_pyfiles()
+
+        for checker in fusable:
+            if checker in dispatcher.broken:
+                continue
+            try:
+                dispatcher.timed(checker, checker.after_visits)
+            except Exception as e:  # pragma: no cover
+                checker._report_unhandled(e)
+
+        dispatcher.record_times()
+        for checker in checkers:
+            checker._checked = True
+
+    def before_visits(self):
+        """Prepare state before any file is visited."""
+
+    def after_visits(self):
+        """Evaluate state after all files have been visited."""
 
     def visit_all_pyfiles(self):
-        pyfiles = self.glob("**/*.py")
-        for path in pyfiles:
-            with self.file_context(path):
-                root = self._get_ast(path)
-                if root:
-                    self.visit(root)
+        AstDispatcher([self]).visit_all_pyfiles()
+
+    def visit(self, node):
+        result = super().visit(node)
+        leave = getattr(self, 'leave_' + node.__class__.__name__, None)
+        if leave is not None:
+            leave(node)
+        return result
+
+    def generic_visit(self, node):
+        if node is self._fused_node:
+            # The dispatcher takes care of visiting the children
+            self._fused_descend = True
+        else:
+            super().generic_visit(node)
 
     def _get_ast(self, path):
+        doc = self.resources.get(path, 'python')
+        if doc.error:
+            with self.context("Line: {}".format(doc.error.lineno)):
+                self.fail("Unable to parse Python file", exception=doc.error)
+            return None
+        return doc.data
+
+    def node_context(self, node):
+        return self.context("Line: {}, Column: {}".format(node.lineno, node.col_offset + 1))
+
+
+class AstDispatcher:
+    """Visit each module tree once and dispatch its nodes to multiple AstCheckers.
+
+    A table of node type to handlers is built from the checkers' visitor methods.
+    Each checker keeps its own descent:
+    once a handler does not continue into a node's children,
+    the checker is left out for that subtree.
+
+    When profiling, the time spent in each checker's handlers is summed up
+    and recorded by `record_times`.
+    """
+
+    def __init__(self, checkers):
+        self.checkers = list(checkers)
+        self.broken = set()
+        self._handlers = {}
+        # checker -> [wall, cpu]
+        self._times = {checker: [0.0, 0.0] for checker in self.checkers} \
+            if profiling.enabled() else None
+
+    def timed(self, checker, func, *args):
+        """Call `func(*args)` and add the time spent to `checker`'s."""
+        if self._times is None:
+            return func(*args)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
         try:
-            return self._ast_cache[path]
+            return func(*args)
+        finally:
+            times = self._times[checker]
+            times[0] += time.perf_counter() - wall_start
+            times[1] += time.thread_time() - cpu_start
+
+    def record_times(self):
+        if self._times is None:
+            return
+        for checker, (wall, cpu) in self._times.items():
+            profiling.add("checker", checker.__class__.__name__, wall, cpu)
+
+    def _handlers_for(self, node_type):
+        try:
+            return self._handlers[node_type]
         except KeyError:
-            self._ast_cache[path] = None
+            pass
+        name = node_type.__name__
+        handlers = {
+            checker: (getattr(checker, 'visit_' + name, None),
+                      getattr(checker, 'leave_' + name, None))
+            for checker in self.checkers
+        }
+        self._handlers[node_type] = handlers
+        return handlers
 
-        with path.open("r") as f:
-            try:
-                the_ast = ast.parse(f.read(), path)
-            except SyntaxError as e:
-                with self.context("Line: {}".format(e.lineno)):
-                    self.fail("Unable to parse Python file", exception=e)
+    def visit_all_pyfiles(self):
+        if not self.checkers:
+            return
+        first = self.checkers[0]
+        for path in first.glob("**/*.py"):
+            with ExitStack() as stack:
+                for checker in self.checkers:
+                    stack.enter_context(checker.file_context(path, profile=False))
+                name = "{}: {}".format(first.rel_path(path), self.__class__.__name__)
+                with profiling.measure("file", name):
+                    self.visit_file(path)
+
+    def visit_file(self, path):
+        # Reports of files with syntax errors are never cached,
+        # so the syntax error is reported even when all other results are cached.
+        walkers = [checker for checker in self.checkers
+                   if checker not in self.broken and not checker.replay_cached(path)]
+        if not walkers:
+            return
+        root = walkers[0]._get_ast(path)
+        if not root:
+            return
+        with ExitStack() as stack:
+            for checker in walkers:
+                stack.enter_context(checker.record_reports(path))
+            self.walk(root, walkers)
+
+    def walk(self, node, checkers=None):
+        if checkers is None:
+            checkers = [checker for checker in self.checkers if checker not in self.broken]
+        handlers = self._handlers_for(type(node))
+
+        descend = []
+        leaving = []
+        for checker in checkers:
+            if checker in self.broken:
+                continue
+            visit, leave = handlers[checker]
+            if visit is None:
+                descend.append(checker)
             else:
-                self._ast_cache[path] = the_ast
-                return the_ast
+                checker._fused_node = node
+                checker._fused_descend = False
+                try:
+                    self.timed(checker, visit, node)
+                except Exception as e:
+                    self._break(checker, e)
+                    continue
+                finally:
+                    checker._fused_node = None
+                if checker._fused_descend:
+                    descend.append(checker)
+            if leave is not None:
+                leaving.append((checker, leave))
 
-    def node_context(self, node):
-        return self.context("Line: {}, Column: {}".format(node.lineno, node.col_offset + 1))
+        if descend:
+            for child in ast.iter_child_nodes(node):
+                self.walk(child, descend)
+
+        for checker, leave in leaving:
+            if checker in self.broken:
+                continue
+            try:
+                self.timed(checker, leave, node)
+            except Exception as e:
+                self._break(checker, e)
+
+    def _break(self, checker, e):
+        l.debug("Removing %s from dispatch", checker.__class__.__name__)
+        self.broken.add(checker)
+        checker._report_unhandled(e)
 
 
-get_checkers = functools.partial(
+find_checkers = functools.partial(
     find_all,
     Path(__file__).parent,
     __package__,
-    base_class=AstChecker
+    base_class=AstChecker,
 )
+get_checkers = functools.partial(load_checkers, __package__, find_checkers)
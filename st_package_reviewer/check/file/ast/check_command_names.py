@@ -27,9 +27,13 @@ def _is_derived_from_command(node):
 class CheckCommandNames(AstChecker):
     """Finds all sublime commands and does various checks on them."""
 
-    def check(self):
+    # Prefixes are collected across all files
+    cacheable = False
+
+    def before_visits(self):
         self.prefixes = set()
-        super().check()
+
+    def after_visits(self):
         if len(self.prefixes) > 1:
             self.warn("Found multiple command prefixes: {}."
                       " Consider using one single prefix"
@@ -31,8 +31,8 @@ class CheckInitializedApiUsage(AstChecker):
     - functions that are called from the module scope
     """
 
-    def __init__(self, base_path):
-        super().__init__(base_path)
+    def __init__(self, base_path, index=None):
+        super().__init__(base_path, index)
 
     def visit_Module(self, node):
         self._module_calls = set()
@@ -40,6 +40,7 @@ class CheckInitializedApiUsage(AstChecker):
 
         self.generic_visit(node)
 
+    def leave_Module(self, node):
         l.debug("module calls: %s", self._module_calls)
         l.debug("module functions: %s", self._module_functions)
         # Visit function bodies that are called from the module scope
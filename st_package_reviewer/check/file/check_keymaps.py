@@ -1,8 +1,11 @@
+import copy
 import json
 import logging
 import re
 from pathlib import Path
+import threading
 
+from ... import cache
 from ...lib import jsonc
 from . import FileChecker
 
@@ -21,49 +24,57 @@ l = logging.getLogger(__name__)
 
 class CheckKeymaps(FileChecker):
 
+    # The platforms to check are determined by the file name
+    cache_by_path = True
+
     def check(self):
         keymap_files = self.glob("**/*.sublime-keymap")
 
         # ignore unused files
-        keymap_files = {path for path in keymap_files
-                        if path.name in VALID_FILENAMES}
+        keymap_files = sorted(path for path in keymap_files
+                              if path.name in VALID_FILENAMES)
 
         if not keymap_files:
             return
 
+        for path in keymap_files:
+            self.check_file(path, self._check_keymap)
+
+    def _check_keymap(self, path):
         # cache default keymap files
         def_maps = KeyMapping.default_maps()
 
         # check for conflicts with default package
-        for path in keymap_files:
-            platforms = PLATFORMS
-            m = re.search(r"\((.*?)\)", path.name)
-            if m:
-                platforms = {m.group(1)}
-
-            k_map = KeyMapping(path)
-
-            with self.file_context(path):
-                self._verify_keymap(k_map)
-
-                conflicts = []
-                for plat in platforms:
-                    local_conflicts = k_map.find_conflicts(def_maps[plat])
-                    l.debug("#conflicts for %s on platform %s: %d",
-                            self.rel_path(k_map.path), plat, len(local_conflicts))
-                    # prevent duplicates while maintaining order
-                    for conflict in local_conflicts:
-                        if conflict not in conflicts:
-                            conflicts.append(conflict)
-
-                    # import pdb; pdb.set_trace()
-                for conflict in conflicts:
-                    if conflict.get('context'):
-                        self.warn("The binding {} is also defined in default bindings "
-                                  "but is masked with a 'context'".format(conflict['keys']))
-                    else:
-                        self.fail("The binding {} unconditionally overrides a default binding"
-                                  .format(conflict['keys']))
+        platforms = PLATFORMS
+        m = re.search(r"\((.*?)\)", path.name)
+        if m:
+            platforms = {m.group(1)}
+
+        doc = self.resources.get(path, 'jsonc')
+        if doc.error:
+            self.fail("Unable to parse key bindings", exception=doc.error)
+            return
+        # The document is shared with other checkers, but verifying modifies it
+        k_map = KeyMapping(path, data=copy.deepcopy(doc.data))
+        self._verify_keymap(k_map)
+
+        conflicts = []
+        for plat in platforms:
+            local_conflicts = k_map.find_conflicts(def_maps[plat])
+            l.debug("#conflicts for %s on platform %s: %d",
+                    self.rel_path(k_map.path), plat, len(local_conflicts))
+            # prevent duplicates while maintaining order
+            for conflict in local_conflicts:
+                if conflict not in conflicts:
+                    conflicts.append(conflict)
+
+        for conflict in conflicts:
+            if conflict.get('context'):
+                self.warn("The binding {} is also defined in default bindings "
+                          "but is masked with a 'context'".format(conflict['keys']))
+            else:
+                self.fail("The binding {} unconditionally overrides a default binding"
+                          .format(conflict['keys']))
 
     def _verify_keymap(self, k_map):
         allowed_keys = {'keys', 'command', 'args', 'context'}
@@ -114,21 +125,29 @@ class KeyMappingError(ValueError):
 class KeyMapping:
 
     _def_maps = None
+    _def_maps_lock = threading.Lock()
 
     @classmethod
     def default_maps(cls):
-        if not cls._def_maps:
-            cls._def_maps = {plat: cls(DATA_PATH / fname)
-                             for plat, fname in zip(PLATFORMS, PLATFORM_FILENAMES)}
-            # Verify and normalize default maps
-            for k_map in cls._def_maps.values():
-                k_map._verify()
+        with cls._def_maps_lock:
+            if not cls._def_maps:
+                def_maps = {plat: cls(DATA_PATH / fname)
+                            for plat, fname in zip(PLATFORMS, PLATFORM_FILENAMES)}
+                # Verify and normalize default maps
+                for k_map in def_maps.values():
+                    k_map._verify()
+                cls._def_maps = def_maps
 
         return cls._def_maps
 
-    def __init__(self, path):
+    def __init__(self, path, text=None, data=None):
         self.path = path
-        self.data = self._load(path)
+        if data is None:
+            if text is None:
+                with path.open(encoding='utf-8') as f:
+                    text = f.read()
+            data = self._load(text)
+        self.data = data
 
     def find_conflicts(self, other):
         # TODO two-part bindings conflict with single bindings and vice versa
@@ -140,9 +159,8 @@ class KeyMapping:
                 if binding['keys'] == chords]
 
     @classmethod
-    def _load(cls, path):
-        with path.open(encoding='utf-8') as f:
-            return jsonc.loads(f.read())
+    def _load(cls, text):
+        return cache.memoize("jsonc", text, jsonc.loads)
 
     def _verify(self):
         for binding in self.data:
@@ -5,9 +5,11 @@ from . import FileChecker
 
 class CheckLicense(FileChecker):
 
+    names_only = True
+
     def check(self):
         has_license = any(
-            True for p in self.base_path.iterdir()
+            True for p in self.iterdir()
             if re.search(r'(?i)^(un)?license', p.name)
         )
 
@@ -1,7 +1,3 @@
-import json
-
-from ...lib.semver import SemVer
-
 from . import FileChecker
 
 
@@ -9,8 +5,8 @@ class CheckMessages(FileChecker):
 
     def check(self):
         msg_path = self.sub_path("messages.json")
-        folder_exists = self.sub_path("messages").is_dir()
-        file_exists = msg_path.is_file()
+        folder_exists = self.is_dir("messages")
+        file_exists = self.is_file(msg_path)
 
         if not (folder_exists or file_exists):
             return
@@ -18,13 +14,14 @@ class CheckMessages(FileChecker):
             self.fail("`messages` folder exists, but `messages.json` does not")
             return
 
+        from ...lib.semver import SemVer
+
         with self.file_context(msg_path):
-            with msg_path.open() as f:
-                try:
-                    data = json.load(f)
-                except ValueError as e:
-                    self.fail("unable to load `messages.json`", exception=e)
-                    return
+            doc = self.resources.get(msg_path, 'json')
+            if doc.error:
+                self.fail("unable to load `messages.json`", exception=doc.error)
+                return
+            data = doc.data
 
             for key, rel_path in data.items():
                 if key == "install":
@@ -35,7 +32,6 @@ class CheckMessages(FileChecker):
                     self.fail("Key {!r} is not 'install' or a valid semantic version"
                               .format(key))
 
-                messsage_path = self.sub_path(rel_path)
-                if not messsage_path.is_file():
+                if not self.is_file(rel_path):
                     self.fail("File '{}', as specified by key {!r}, does not exist"
                               .format(rel_path, key))
@@ -17,8 +17,8 @@ class CheckMousemaps(FileChecker):
         mousemap_files = self.glob("**/*.sublime-mousemap")
 
         # ignore unused files
-        mousemap_files = {path for path in mousemap_files
-                          if path.name in VALID_FILENAMES}
+        mousemap_files = sorted(path for path in mousemap_files
+                                if path.name in VALID_FILENAMES)
 
         if not mousemap_files:
             return
@@ -3,8 +3,10 @@ from . import FileChecker
 
 class CheckNoSublimePackage(FileChecker):
 
+    names_only = True
+
     def check(self):
-        exists = self.sub_path(".no-sublime-package").is_file()
+        exists = self.is_file(".no-sublime-package")
         if not exists:
             return
 
@@ -7,27 +7,33 @@ l = logging.getLogger(__name__)
 
 class CheckPackageMetadata(FileChecker):
 
+    names_only = True
+
     def check(self):
-        if self.sub_path("package-metadata.json").is_file():
+        if self.is_file("package-metadata.json"):
             self.fail("'package-metadata.json' is supposed to be automatically generated "
                       "by Package Control during installation")
 
 
 class CheckPycFiles(FileChecker):
 
+    names_only = True
+
     def check(self):
         pyc_files = self.glob("**/*.pyc")
         if not pyc_files:
             return
 
         for path in pyc_files:
-            if path.with_suffix(".py").is_file():
+            if self.is_file(path.with_suffix(".py")):
                 with self.file_context(path):
                     self.fail("'.pyc' file is redundant because its corresponding .py file exists")
 
 
 class CheckCacheFiles(FileChecker):
 
+    names_only = True
+
     def check(self):
         cache_files = self.glob("**/*.cache")
         if not cache_files:
@@ -40,6 +46,8 @@ class CheckCacheFiles(FileChecker):
 
 class CheckSublimePackageFiles(FileChecker):
 
+    names_only = True
+
     def check(self):
         cache_files = self.glob("**/*.sublime-package")
         if not cache_files:
@@ -52,6 +60,8 @@ class CheckSublimePackageFiles(FileChecker):
 
 class CheckSublimeWorkspaceFiles(FileChecker):
 
+    names_only = True
+
     def check(self):
         cache_files = self.glob("**/*.sublime-workspace")
         if not cache_files:
@@ -1,9 +1,4 @@
-import plistlib
-import xml.etree.ElementTree as ET
-from xml.parsers.expat import ExpatError
-
 from . import FileChecker
-from ...lib import jsonc
 
 
 class CheckJsoncFiles(FileChecker):
@@ -26,12 +21,12 @@ class CheckJsoncFiles(FileChecker):
         }
 
         for file_path in self.globs(*jsonc_file_globs):
-            with self.file_context(file_path):
-                with file_path.open(encoding='utf-8') as f:
-                    try:
-                        jsonc.loads(f.read())
-                    except ValueError as e:
-                        self.fail("Invalid JSON (with comments)", exception=e)
+            self.check_file(file_path, self._check_jsonc)
+
+    def _check_jsonc(self, file_path):
+        doc = self.resources.get(file_path, 'jsonc')
+        if doc.error:
+            self.fail("Invalid JSON (with comments)", exception=doc.error)
 
 
 class CheckPlistFiles(FileChecker):
@@ -46,20 +41,21 @@ class CheckPlistFiles(FileChecker):
         }
 
         for file_path in self.globs(*plist_file_globs):
-            with self.file_context(file_path):
-                with file_path.open('rb') as f:
-                    try:
-                        plistlib.load(f)
-                    except (ValueError, ExpatError) as e:
-                        self.fail("Invalid Plist", exception=e)
+            self.check_file(file_path, self._check_plist)
+
+    def _check_plist(self, file_path):
+        doc = self.resources.get(file_path, 'plist')
+        if doc.error:
+            self.fail("Invalid Plist", exception=doc.error)
 
 
 class CheckXmlFiles(FileChecker):
 
     def check(self):
         for file_path in self.glob("**/*.sublime-snippet"):
-            with self.file_context(file_path):
-                try:
-                    ET.parse(str(file_path))
-                except ET.ParseError as e:
-                    self.fail("Invalid XML", exception=e)
+            self.check_file(file_path, self._check_xml)
+
+    def _check_xml(self, file_path):
+        doc = self.resources.get(file_path, 'xml')
+        if doc.error:
+            self.fail("Invalid XML", exception=doc.error)
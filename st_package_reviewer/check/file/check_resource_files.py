@@ -8,6 +8,8 @@ l = logging.getLogger(__name__)
 
 class CheckPluginsInRoot(FileChecker):
 
+    names_only = True
+
     def check(self):
         if self.glob("*.py"):
             return
@@ -24,6 +26,8 @@ class CheckPluginsInRoot(FileChecker):
 
 class CheckHasResourceFiles(FileChecker):
 
+    names_only = True
+
     def check(self):
         # Files with a hidden extension are excluded,
         # as they serve no purpose without another file using them
@@ -60,13 +64,15 @@ class CheckHasResourceFiles(FileChecker):
 
 class CheckHasSublimeSyntax(FileChecker):
 
+    names_only = True
+
     def check(self):
         syntax_files = self.glob("**/*.sublime-syntax")
 
         for path in syntax_files:
             if (
-                not path.with_suffix(".tmLanguage").is_file()
-                and not path.with_suffix(".hidden-tmLanguage").is_file()
+                not self.is_file(path.with_suffix(".tmLanguage"))
+                and not self.is_file(path.with_suffix(".hidden-tmLanguage"))
             ):
                 with self.file_context(path):
                     self.warn("'.sublime-syntax' support has been added in build 3092 and there "
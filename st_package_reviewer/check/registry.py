@@ -0,0 +1,120 @@
+"""Registry of the bundled checker classes.
+
+`find_all` imports every module of a checker package to discover its checkers.
+Instead, the checkers are listed in the generated `_registry` module, in a fixed order,
+and are returned as `LazyChecker`s,
+which only import a checker's module when the checker is instantiated to run.
+The registry also holds the class attributes that decide whether a checker is scheduled
+(see `SCHEDULING_ATTRIBUTES`).
+
+Regenerate the registry after adding, removing or renaming checkers with:
+
+    python -m st_package_reviewer.check.registry
+"""
+
+import functools
+import importlib
+import logging
+from pathlib import Path
+import sys
+
+__all__ = ('LazyChecker', 'load_checkers', 'render')
+
+l = logging.getLogger(__name__)
+
+REGISTRY_PATH = Path(__file__).parent / "_registry.py"
+
+_HEADER = '''\
+"""Checker classes of the bundled checker packages.
+
+Generated by `python -m st_package_reviewer.check.registry`. Do not edit.
+"""
+
+'''
+
+# Class attributes that are read before checkers run
+SCHEDULING_ATTRIBUTES = ('names_only',)
+
+
+class LazyChecker:
+    """Stands in for a registered checker class until it is needed.
+
+    Calling it instantiates the checker, importing its module first.
+    The name and the `SCHEDULING_ATTRIBUTES` are available without the import;
+    other attributes are looked up on the class.
+    """
+
+    def __init__(self, package, module, name, attributes):
+        self.package = package
+        self.module = module
+        self.__name__ = name
+        vars(self).update(attributes)
+
+    def load(self):
+        """Import and return the checker class."""
+        return getattr(importlib.import_module(self.module, self.package), self.__name__)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __repr__(self):
+        return "<LazyChecker {}{}.{}>".format(self.package, self.module, self.__name__)
+
+
+@functools.lru_cache()
+def load_checkers(package, find):
+    """Return the registered checkers of `package` as `LazyChecker`s in a reproducible order.
+
+    Falls back to discovering the checker classes with `find`
+    if the package is not part of the registry.
+    """
+    from ._registry import CHECKERS
+
+    try:
+        entries = CHECKERS[package]
+    except KeyError:
+        l.debug("%s is not registered; discovering checkers...", package)
+        return tuple(sorted(find(), key=_definition_order))
+
+    return tuple(LazyChecker(package, module, name, attributes)
+                 for module, name, attributes in entries)
+
+
+def _definition_order(cls):
+    module = sys.modules[cls.__module__]
+    return cls.__module__, list(vars(module)).index(cls.__name__)
+
+
+def _sources():
+    from .file import find_checkers as find_file_checkers
+    from .file.ast import find_checkers as find_ast_checkers
+    from .repo import find_checkers as find_repo_checkers
+
+    finders = (find_file_checkers, find_ast_checkers, find_repo_checkers)
+    # The package is the second argument of the `find_all` partials
+    return [(find.args[1], find) for find in finders]
+
+
+def render():
+    """Return the source of the registry module for the currently defined checkers."""
+    lines = [_HEADER, "CHECKERS = {\n"]
+    for package, find in _sources():
+        lines.append("    {!r}: (\n".format(package))
+        for cls in sorted(find(), key=_definition_order):
+            module = cls.__module__[len(package):]
+            attributes = {attr: getattr(cls, attr) for attr in SCHEDULING_ATTRIBUTES
+                          if hasattr(cls, attr)}
+            lines.append("        ({!r}, {!r}, {!r}),\n".format(module, cls.__name__, attributes))
+        lines.append("    ),\n")
+    lines.append("}\n")
+    return "".join(lines)
+
+
+if __name__ == '__main__':
+    REGISTRY_PATH.write_text(render(), encoding='utf-8')
+    print("Wrote", REGISTRY_PATH)
@@ -1,25 +1,53 @@
+import asyncio
 import functools
 import logging
 from pathlib import Path
 
 from .. import Checker, find_all
+from ..registry import load_checkers
 from ... import repo_tools
+from ...snapshots import RepoSnapshot
 
-__all__ = ('RepoChecker', 'get_checkers', )
+__all__ = ('RepoChecker', 'get_checkers', 'find_checkers', )
 
 l = logging.getLogger(__name__)
 
 
 class RepoChecker(Checker):
-    """Groups checks for packages' contents.
+    """Groups checks for packages' repositories.
 
-    Also adds utilities for file systems to the Checker class.
+    `repo` is a github3 repository or a prefetched `RepoSnapshot`,
+    so checks should use the properties and methods of this class
+    instead of accessing the repository directly where possible.
+
+    Checks are performed concurrently on an event loop,
+    so that their requests to GitHub overlap.
+    Checkers can override the `check_async` coroutine;
+    by default it runs the blocking `check` method in a worker thread.
     """
 
     def __init__(self, repo):
         super().__init__()
         self.repo = repo
 
+    async def check_async(self):
+        await asyncio.to_thread(self.check)
+
+    async def perform_check_async(self):
+        try:
+            await self.check_async()
+        except Exception as e:  # pragma: no cover
+            self._report_unhandled(e)
+        self._checked = True
+
+    @classmethod
+    def perform_checks(cls, checkers):
+        asyncio.run(cls.perform_checks_async(checkers))
+
+    @classmethod
+    async def perform_checks_async(cls, checkers):
+        await asyncio.gather(*(checker.perform_check_async() for checker in checkers))
+
     @property
     def tags(self):
         return repo_tools.tags(self.repo)
@@ -28,10 +56,16 @@ class RepoChecker(Checker):
     def semver_tags(self):
         return repo_tools.semver_tags(self.repo)
 
+    def has_readme(self):
+        if isinstance(self.repo, RepoSnapshot):
+            return self.repo.has_readme
+        return bool(self.repo.readme())
+
 
-get_checkers = functools.partial(
+find_checkers = functools.partial(
     find_all,
     Path(__file__).parent,
     __package__,
-    base_class=RepoChecker
+    base_class=RepoChecker,
 )
+get_checkers = functools.partial(load_checkers, __package__, find_checkers)
@@ -4,6 +4,5 @@ from . import RepoChecker
 class CheckReadme(RepoChecker):
 
     def check(self):
-        readme = self.repo.readme()
-        if not readme:
+        if not self.has_readme():
             self.fail("Missing a README file")
@@ -1,21 +1,19 @@
 from collections import namedtuple
 import sys
-import traceback
 
+from ..reporters import MarkdownReporter
 
-class Report(namedtuple("_Report", "message context exception exc_info")):
-    __slots__ = ()
 
-    _indent = " " * 4
+class Report(namedtuple("_Report", "message context exception exc_info checker",
+                        defaults=(None,))):
+    __slots__ = ()
 
-    def report(self, file=None):
+    def report(self, file=None, reporter=None):
         if file is None:
             file = sys.stdout
-        print("- {}".format(self.message), file=file)
-        for elem in self.details:
-            print("{}{}".format(self._indent, elem), file=file)
-        if self.exc_info:
-            traceback.print_exception(*self.exc_info, file=file)
+        if reporter is None:
+            reporter = MarkdownReporter()
+        reporter.report_item(file, self)
 
     @property
     def details(self):
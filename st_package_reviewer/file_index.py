@@ -0,0 +1,237 @@
+"""In-memory index of a package's files.
+
+The index is built with a single walk over the package folder
+and answers glob patterns, existence checks and directory listings
+without touching the file system again.
+It can also be built from a listing of paths,
+such as the tree of a commit,
+for checks that only look at file names.
+Files are read from the index's file system (see `vfs`)
+and parsed resource files are shared through its `resources`.
+"""
+
+import fnmatch
+import hashlib
+import logging
+import os
+from pathlib import Path, PurePosixPath
+import posixpath
+
+from .resources import ResourceStore
+from .vfs import LocalFS
+
+__all__ = ('FileIndex',)
+
+l = logging.getLogger(__name__)
+
+
+class FileIndex:
+    """Index of all files and folders below `base_path`.
+
+    Paths are stored relative to `base_path` with forward slashes.
+    Methods accept absolute paths below `base_path`
+    or paths relative to it.
+    Symbolic links to folders are indexed, but not descended into.
+    """
+
+    def __init__(self, base_path, listing=None, fs=None):
+        """Index the folder `base_path` or, if given, the entries of `listing`.
+
+        `listing` is an iterable of `(rel_path, is_dir)` tuples with forward slashes.
+        An index of a listing has no stat results,
+        and file contents are only available if `fs` is given.
+        """
+        self.base_path = Path(base_path).absolute()
+        self.fs = fs if fs is not None else LocalFS(self.base_path)
+        self._entries = {}  # rel path -> os.DirEntry or _ListedEntry
+        self._children = {'': []}  # rel dir path -> [rel child paths]
+        self._by_ext = {}  # extension -> [rel paths]
+        self._by_name = {}  # name -> [rel paths]
+        self._hashes = {}  # rel path -> content digest
+        self.resources = ResourceStore(self)
+        if listing is None:
+            self._walk()
+        else:
+            self._add_listing(listing)
+
+    def _add(self, rel_dir, entry):
+        rel = posixpath.join(rel_dir, entry.name) if rel_dir else entry.name
+        self._entries[rel] = entry
+        self._children[rel_dir].append(rel)
+        self._by_ext.setdefault(posixpath.splitext(entry.name)[1], []).append(rel)
+        self._by_name.setdefault(entry.name, []).append(rel)
+        if entry.is_dir(follow_symlinks=False):
+            self._children[rel] = []
+        return rel
+
+    def _walk(self):
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            try:
+                with os.scandir(self.base_path / rel_dir) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                l.debug("Unable to list '%s': %s", rel_dir, e)
+                continue
+
+            for entry in entries:
+                rel = self._add(rel_dir, entry)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(rel)
+
+        l.debug("Indexed %d entries in '%s'", len(self._entries), self.base_path)
+
+    def _add_listing(self, listing):
+        for rel, is_dir in sorted(listing):
+            rel_dir, _, name = rel.rpartition('/')
+            if rel in self._entries or not name:
+                continue
+            if rel_dir not in self._children:
+                # Listings usually contain all parent folders, but make sure
+                self._add_listing([(rel_dir, True)])
+            self._add(rel_dir, _ListedEntry(name, is_dir))
+
+        l.debug("Indexed %d listed entries for '%s'", len(self._entries), self.base_path)
+
+    @classmethod
+    def for_fs(cls, fs):
+        """Index the files of a file system from `vfs`."""
+        return cls(fs.base_path, fs.listing(), fs)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _key(self, path):
+        """Convert a path to its relative key or return `None` if it is outside of the index."""
+        path = Path(path)
+        if path.is_absolute():
+            try:
+                path = path.relative_to(self.base_path)
+            except ValueError:
+                return None
+        key = posixpath.normpath(PurePosixPath(path).as_posix())
+        if key == '.':
+            return ''
+        if key.startswith('../'):
+            return None
+        return key
+
+    def _path(self, key):
+        return self.base_path / key
+
+    def exists(self, path):
+        key = self._key(path)
+        if key is None:
+            return self._path(path).exists()
+        return key == '' or key in self._entries
+
+    def is_file(self, path):
+        key = self._key(path)
+        if key is None:
+            return self._path(path).is_file()
+        entry = self._entries.get(key)
+        return entry is not None and entry.is_file()
+
+    def is_dir(self, path):
+        key = self._key(path)
+        if key is None:
+            return self._path(path).is_dir()
+        if key == '':
+            return True
+        entry = self._entries.get(key)
+        return entry is not None and entry.is_dir()
+
+    def stat(self, path):
+        """Return the (cached) stat result of a path."""
+        key = self._key(path)
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._path(path).stat()
+        return entry.stat()
+
+    def content_hash(self, path):
+        """Return the (cached) SHA-256 digest of a file's contents."""
+        key = self._key(path)
+        try:
+            return self._hashes[key]
+        except KeyError:
+            pass
+        with self.open(path, 'rb') as f:
+            digest = hashlib.file_digest(f, 'sha256').digest()
+        if key is not None:
+            self._hashes[key] = digest
+        return digest
+
+    def open(self, path, mode='r', **kwargs):
+        """Open a file like `open` would."""
+        key = self._key(path)
+        if key is None:
+            return self._path(path).open(mode, **kwargs)
+        return self.fs.open(key, mode, **kwargs)
+
+    def iterdir(self, path=''):
+        key = self._key(path)
+        if key not in self._children:
+            return [] if key is not None else list(self._path(path).iterdir())
+        return [self._path(child) for child in self._children[key]]
+
+    def glob(self, pattern):
+        """Resolve a glob pattern like `Path.glob` would.
+
+        Supported are patterns consisting of a file name pattern
+        that is optionally prefixed with `**/` or `*/**/`.
+        Other patterns fall back to `Path.glob`.
+        """
+        *dir_parts, name_pattern = pattern.split("/")
+        if dir_parts == []:
+            min_depth, max_depth = 0, 0
+        elif dir_parts == ['**']:
+            min_depth, max_depth = 0, None
+        elif dir_parts == ['*', '**']:
+            min_depth, max_depth = 1, None
+        else:
+            l.debug("Pattern '%s' is not supported by the index", pattern)
+            return sorted(self.base_path.glob(pattern))
+
+        if not any(c in name_pattern for c in "*?["):
+            candidates = self._by_name.get(name_pattern, ())
+        elif (
+            name_pattern.startswith("*")
+            and not any(c in name_pattern[1:] for c in "*?[")
+            and name_pattern[1:] == posixpath.splitext(name_pattern)[1]
+        ):
+            candidates = self._by_ext.get(name_pattern[1:], ())
+        elif max_depth == 0:
+            candidates = self._children['']
+        else:
+            candidates = self._entries.keys()
+
+        result = []
+        for key in candidates:
+            depth = key.count('/')
+            if depth < min_depth or (max_depth is not None and depth > max_depth):
+                continue
+            if fnmatch.fnmatch(posixpath.basename(key), name_pattern):
+                result.append(self._path(key))
+
+        return sorted(result)
+
+
+class _ListedEntry:
+    """Stands in for an `os.DirEntry` of a path that was only listed."""
+
+    __slots__ = ('name', '_is_dir')
+
+    def __init__(self, name, is_dir):
+        self.name = name
+        self._is_dir = is_dir
+
+    def is_dir(self, follow_symlinks=True):
+        return self._is_dir
+
+    def is_file(self, follow_symlinks=True):
+        return not self._is_dir
+
+    def stat(self, follow_symlinks=True):
+        raise FileNotFoundError("'{}' was only listed".format(self.name))
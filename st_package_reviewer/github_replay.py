@@ -0,0 +1,313 @@
+"""Record interactions with the GitHub API and replay them offline.
+
+In `record` mode, the server forwards requests to GitHub
+and stores the responses as fixtures in a folder.
+In `replay` mode, it answers requests from the fixtures,
+optionally with a latency and a rate limit,
+so that reviews of repositories can be run and benchmarked without network access.
+The reviewer is pointed at the server with `--github-url`:
+
+    python -m st_package_reviewer.github_replay record fixtures/ https://github.com/o/r ...
+    python -m st_package_reviewer.github_replay replay fixtures/ --port 8765 --latency 0.05
+    st_package_reviewer --github-url http://127.0.0.1:8765 --no-cache https://github.com/o/r
+
+Given repository URLs, `record` reviews them through the server and exits;
+otherwise it keeps forwarding requests, for example of `--from-channel` reviews.
+
+Redirects, such as those of archive downloads, are followed while recording.
+URLs of the API in responses are rewritten to point at the replay server.
+Requests without a fixture are answered with `404 Not Found`.
+"""
+
+import argparse
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import math
+from pathlib import Path
+import re
+import subprocess
+import sys
+import threading
+import time
+
+__all__ = ('FixtureStore', 'ReplayServer', 'RecordServer')
+
+l = logging.getLogger(__name__)
+
+UPSTREAM_URL = "https://api.github.com"
+
+# Stands in for the URL of the server in stored responses
+_BASE_URL_MARKER = "http://github-replay.invalid"
+
+# Headers that are set by the server itself or describe the recorded connection
+_SKIPPED_HEADERS = {'connection', 'content-encoding', 'content-length', 'date', 'keep-alive',
+                    'server', 'transfer-encoding', 'x-ratelimit-limit', 'x-ratelimit-remaining',
+                    'x-ratelimit-reset', 'x-ratelimit-resource', 'x-ratelimit-used'}
+_REWRITTEN_HEADERS = ('link', 'location')
+_JSON_HEADERS = [('Content-Type', "application/json; charset=utf-8")]
+
+
+class FixtureStore:
+    """Responses stored in a folder, two files per request.
+
+    `<key>.json` holds the request line, status and headers of the response
+    and `<key>.body` its body.
+    Requests are identified by their method, path, `Accept` header and body.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    @staticmethod
+    def key(method, path, accept="", body=b""):
+        digest = hashlib.sha256()
+        for part in (method.encode(), path.encode(), accept.encode(), body or b""):
+            digest.update(hashlib.sha256(part).digest())
+        return digest.hexdigest()[:32]
+
+    def get(self, key):
+        """Return `(status, headers, body)` or `None`."""
+        try:
+            meta = json.loads((self.path / (key + ".json")).read_text())
+            body = (self.path / (key + ".body")).read_bytes()
+        except FileNotFoundError:
+            return None
+        return meta['status'], meta['headers'], body
+
+    def put(self, key, method, path, status, headers, body):
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / (key + ".body")).write_bytes(body)
+        meta = {'method': method, 'path': path, 'status': status, 'headers': headers}
+        (self.path / (key + ".json")).write_text(json.dumps(meta, indent=2))
+
+    def requests(self):
+        """Yield the `(method, path)` of all stored requests."""
+        for meta_path in sorted(self.path.glob("*.json")):
+            meta = json.loads(meta_path.read_text())
+            yield meta['method'], meta['path']
+
+    def repositories(self):
+        """Return the `owner/name` of all repositories whose metadata was stored."""
+        return sorted({path[len("/repos/"):] for method, path in self.requests()
+                       if method == 'GET' and re.match(r"^/repos/[^/]+/[^/?]+$", path)})
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._handle()
+
+    def do_HEAD(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            status, headers, body = self.server.respond(self.command, self.path, self.headers,
+                                                        body)
+        except Exception as e:
+            l.exception("Unable to respond to %s %s", self.command, self.path)
+            status, headers, body = 502, _JSON_HEADERS, _message(str(e))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        l.debug("%s - %s", self.address_string(), format % args)
+
+
+class _Server(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, store, address=("127.0.0.1", 0)):
+        self.store = store if isinstance(store, FixtureStore) else FixtureStore(store)
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        """Serve requests in a background thread and return the server."""
+        threading.Thread(target=self.serve_forever, name="github-replay", daemon=True).start()
+        return self
+
+    def respond(self, method, path, headers, body):
+        """Return the status, headers and body of the response to a request."""
+        raise NotImplementedError
+
+
+class ReplayServer(_Server):
+    """Answer requests from a `FixtureStore`.
+
+    Every response is delayed by `latency` seconds.
+    With a `rate_limit`, only that many requests are answered per `rate_window` seconds
+    and the others are rejected like by GitHub's primary rate limit.
+    """
+
+    def __init__(self, store, address=("127.0.0.1", 0), latency=0, rate_limit=None,
+                 rate_window=3600):
+        super().__init__(store, address)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.requests = 0
+        self._remaining = rate_limit
+        self._reset = self._next_reset()
+        self._lock = threading.Lock()
+
+    def _next_reset(self):
+        # GitHub sends whole seconds
+        return math.ceil(time.time() + self.rate_window)
+
+    def _rate_limit_headers(self):
+        """Count a request and return whether it is allowed and the rate limit headers."""
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit is None:
+                return True, []
+            now = time.time()
+            if now >= self._reset:
+                self._remaining = self.rate_limit
+                self._reset = self._next_reset()
+            allowed = self._remaining > 0
+            if allowed:
+                self._remaining -= 1
+            return allowed, [('X-RateLimit-Limit', str(self.rate_limit)),
+                             ('X-RateLimit-Remaining', str(self._remaining)),
+                             ('X-RateLimit-Reset', str(self._reset)),
+                             ('X-RateLimit-Resource', 'core')]
+
+    def respond(self, method, path, headers, body):
+        if self.latency:
+            time.sleep(self.latency)
+        allowed, rate_headers = self._rate_limit_headers()
+        if not allowed:
+            return 403, _JSON_HEADERS + rate_headers, _message("API rate limit exceeded")
+
+        key = self.store.key(method, path, headers.get('Accept', ""), body)
+        fixture = self.store.get(key)
+        if fixture is None:
+            l.warning("No fixture for %s %s", method, path)
+            return 404, _JSON_HEADERS + rate_headers, _message("Not Found (not recorded)")
+        status, stored_headers, body = fixture
+        response_headers, body = _rewrite_urls(stored_headers, body, _BASE_URL_MARKER, self.url)
+        return status, response_headers + rate_headers, body
+
+
+class RecordServer(_Server):
+    """Forward requests to `upstream` and store the responses in a `FixtureStore`.
+
+    The `Authorization` header of requests is forwarded but not stored.
+    """
+
+    def __init__(self, store, address=("127.0.0.1", 0), upstream=UPSTREAM_URL):
+        super().__init__(store, address)
+        self.upstream = upstream.rstrip("/")
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def respond(self, method, path, headers, body):
+        forwarded = {name: headers[name] for name in ('Accept', 'Authorization', 'Content-Type')
+                     if name in headers}
+        response = self._get_session().request(method, self.upstream + path, headers=forwarded,
+                                               data=body or None, allow_redirects=True)
+        stored_headers, content = _rewrite_urls(
+            [(name, value) for name, value in response.headers.items()
+             if name.lower() not in _SKIPPED_HEADERS],
+            response.content, self.upstream, _BASE_URL_MARKER,
+        )
+        key = self.store.key(method, path, headers.get('Accept', ""), body)
+        self.store.put(key, method, path, response.status_code, stored_headers, content)
+        l.info("Recorded %s %s (%d)", method, path, response.status_code)
+
+        # Answer like the replay server would
+        return (response.status_code,
+                *_rewrite_urls(stored_headers, content, _BASE_URL_MARKER, self.url))
+
+
+def _message(text):
+    return json.dumps({'message': text}).encode()
+
+
+def _rewrite_urls(headers, body, old, new):
+    """Replace the URL `old` with `new` in the headers with links and in text bodies."""
+    headers = [(name, value.replace(old, new) if name.lower() in _REWRITTEN_HEADERS else value)
+               for name, value in headers]
+    content_type = next((value for name, value in headers if name.lower() == 'content-type'), "")
+    if content_type.startswith(("application/json", "text/")):
+        body = body.replace(old.encode(), new.encode())
+    return headers, body
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m st_package_reviewer.github_replay",
+                                     description="Record or replay GitHub API responses.")
+    parser.add_argument("mode", choices=('record', 'replay'))
+    parser.add_argument("fixtures", type=Path, help="Folder of the recorded responses.")
+    parser.add_argument("repositories", nargs='*', metavar="URL",
+                        help="Repositories to review while recording.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--upstream", default=UPSTREAM_URL,
+                        help="URL of the API to record. (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0, metavar="SECONDS",
+                        help="Delay of each replayed response. (default: 0)")
+    parser.add_argument("--rate-limit", type=int, metavar="N",
+                        help="Answer only N requests per --rate-window when replaying.")
+    parser.add_argument("--rate-window", type=float, default=3600, metavar="SECONDS",
+                        help="(default: %(default)g)")
+    args = parser.parse_intermixed_args(args)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    address = (args.host, args.port)
+    if args.mode == 'record':
+        server = RecordServer(args.fixtures, address, upstream=args.upstream)
+    else:
+        server = ReplayServer(args.fixtures, address, latency=args.latency,
+                              rate_limit=args.rate_limit, rate_window=args.rate_window)
+    l.info("%s GitHub at %s", args.mode.capitalize() + "ing", server.url)
+    if args.mode == 'record' and args.repositories:
+        with server.start():
+            try:
+                return record(server.url, args.repositories)
+            finally:
+                server.shutdown()
+    try:
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def record(url, repositories):
+    """Review `repositories` with the GitHub API at `url` and return the exit code."""
+    proc = subprocess.run([sys.executable, "-m", "st_package_reviewer", "--github-url", url,
+                           "--no-cache", "--format", "jsonl", *repositories],
+                          stdout=subprocess.DEVNULL, check=False)
+    # Failed reviews are part of the recording as well
+    return 0 if proc.returncode >= 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Conditional requests for the GitHub API with responses cached on disk.
+
+GitHub does not count requests that are answered with `304 Not Modified`
+against the rate limit of authenticated clients,
+so re-reviewing unchanged repositories costs almost no API budget.
+"""
+
+import hashlib
+import logging
+import time
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from . import cache
+from .ratelimit import RateLimitedAdapter
+
+__all__ = ('CachingAdapter',)
+
+l = logging.getLogger(__name__)
+
+# Response headers that describe the request instead of the resource
+_VOLATILE_HEADERS = ('Date', 'X-RateLimit-Limit', 'X-RateLimit-Remaining', 'X-RateLimit-Reset',
+                     'X-RateLimit-Used', 'X-RateLimit-Resource', 'X-GitHub-Request-Id')
+
+
+class CachingAdapter(RateLimitedAdapter):
+    """An adapter that revalidates cached responses with ETags or modification dates.
+
+    Only complete responses to `GET` requests that have a validator are cached;
+    streamed responses, such as archive downloads, are passed through.
+    """
+
+    def __init__(self, disk_cache, **kwargs):
+        super().__init__(**kwargs)
+        self.disk_cache = disk_cache
+
+    def _key(self, request):
+        # Responses may differ by the authenticated user and the requested media type
+        authorization = request.headers.get('Authorization', "")
+        return cache.make_key("http", request.method, request.url,
+                              request.headers.get('Accept', ""),
+                              hashlib.sha256(authorization.encode()).digest())
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != 'GET' or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        key = self._key(request)
+        entry = self.disk_cache.get(key)
+        if entry is not None:
+            if entry['etag']:
+                request.headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, stream=stream, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            l.debug("Not modified: %s", request.url)
+            return self._cached_response(request, response, entry)
+
+        validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        if response.status_code == 200 and any(validators):
+            self.disk_cache.put(key, {
+                'etag': validators[0],
+                'last_modified': validators[1],
+                'headers': dict(response.headers),
+                'content': response.content,
+                'encoding': response.encoding,
+                'stored': time.time(),
+            })
+        return response
+
+    def _cached_response(self, request, not_modified, entry):
+        response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        # Keep the current rate limit information
+        for name in _VOLATILE_HEADERS:
+            if name in not_modified.headers:
+                response.headers[name] = not_modified.headers[name]
+        response._content = entry['content']
+        response.encoding = entry['encoding']
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = not_modified.elapsed
+        response.from_cache = True
+        not_modified.close()
+        return response
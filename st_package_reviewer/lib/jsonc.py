@@ -1,56 +1,83 @@
 """Parse JSON with C-style comments (and trailing commas).
 
-Due to (multi-line) comments being stripped,
-reported json.DecodeErrors may report "wrong" line and column numbers.
+Texts that are not plain JSON are scanned once
+and their comments and trailing commas are replaced by whitespace,
+so positions in reported `json.JSONDecodeError`s match the original text.
 """
 
 import json
 import re
 
 
-__all__ = ('loads')
-
-_re_js_comments_str = r"""
-    (                               # Capture code
-        (?:
-            "(?:\\.|[^"\\])*"           # String literal
-            |
-            '(?:\\.|[^'\\])*'           # String literal
-            |
-            (?:[^/\n"']|/[^/*\n"'])+    # Any code besides newlines or string literals
-            |
-            \n                          # Newline
-        )+                          # Repeat
-    )|
-    (/\* (?:[^*]|\*(?!/))* \*/)      # Multi-line comment
-    |
-    (?://(.*)$)                     # Comment
-"""
-_re_js_comments = re.compile(_re_js_comments_str, re.VERBOSE + re.MULTILINE)
-
+__all__ = ('loads',)
 
-def _strip_js_comments(string):
-    """Strip C-style comments from a JSON file.
+_STRING = r'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+_COMMENT = r'//[^\n]*+|/\*[^*]*+(?:\*++[^/*][^*]*+)*+\*++/'
 
-    Considers those encapsulated by strings.
-
-    Original Source:
-    http://stackoverflow.com/questions/2136363/matching-one-line-javascript-comments-with-re
-    """
-    parts = _re_js_comments.findall(string)
-    # Stripping the whitespaces is, of course, optional, but the columns are fucked up anyway
-    # with the comments being removed and it doesn't break things.
-    return ''.join(x[0].strip(' ') for x in parts)
+# Each match skips code that is kept as it is (possessively, so it never backtracks)
+# and ends with the next comment or comma that may be trailing.
+_re_tokens = re.compile(r"""
+    (?:
+        [^"/,]++                                # Code
+        |
+        {string}                                # String literal
+        |
+        ,(?!\s*+(?:[\]}}]|/[/*]))               # Comma that cannot be trailing
+        |
+        /(?![/*])                               # Slash that does not start a comment
+    )*+
+    (?:
+        (?P<comment>{comment})
+        |
+        (?P<comma>,)
+        |
+        (?P<end>["/].*+|\Z)                     # End or an unterminated string or comment
+    )
+""".format(string=_STRING, comment=_COMMENT), re.VERBOSE | re.DOTALL)
+_re_trailing = re.compile(r"(?:\s++|{comment})*+[\]}}]".format(comment=_COMMENT))
+_re_non_newlines = re.compile(r"[^\r\n]")
 
 
-def _strip_trailing_json_commas(string):
-    """Strip trailing commas in arrays and objects."""
-    return re.sub(r",(\s*[\]}])", r"\1", string)
+def _preprocess_json(string):
+    """Replace comments and trailing commas with whitespace.
 
+    All other characters, including line breaks in multi-line comments,
+    keep their position.
+    """
+    parts = []
+    last = 0  # End of the text in `parts`
+    for m in _re_tokens.finditer(string):
+        kind = m.lastgroup
+        if kind == 'end':
+            # Unterminated strings and comments are left for the decoder to report
+            break
+        start, end = m.span(kind)
+        if kind == 'comment':
+            if string.find("\n", start, end) < 0:
+                replacement = " " * (end - start)
+            else:
+                replacement = _re_non_newlines.sub(" ", string[start:end])
+        elif _re_trailing.match(string, end):
+            replacement = " "
+        else:
+            continue
+        parts.append(string[last:start])
+        parts.append(replacement)
+        last = end
 
-def _preprocess_json(string):
-    return _strip_trailing_json_commas(_strip_js_comments(string))
+    if not parts:
+        return string
+    parts.append(string[last:])
+    return "".join(parts)
 
 
 def loads(string, *args, **kwargs):
-    return json.loads(_preprocess_json(string), *args, **kwargs)
+    try:
+        # Most files do not use comments or trailing commas
+        return json.loads(string, *args, **kwargs)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_preprocess_json(string), *args, **kwargs)
+    except json.JSONDecodeError as e:
+        raise json.JSONDecodeError(e.msg, string, e.pos) from None
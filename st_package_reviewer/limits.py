@@ -0,0 +1,98 @@
+"""Limits for the contents of package archives.
+
+Archives are checked against the limits while they are read,
+before their members are extracted,
+so that a hostile or bloated repository cannot fill the disk
+or stall a batch of reviews.
+A package that exceeds a limit is reported as a failure.
+"""
+
+from collections import namedtuple
+
+__all__ = ('ArchiveLimits', 'DEFAULT_LIMITS', 'LimitExceeded', 'Budget', 'check_zipfile',
+           'check_archive_size', 'configure', 'get_limits')
+
+MiB = 1024 ** 2
+
+ArchiveLimits = namedtuple("ArchiveLimits", "max_members max_size max_file_size max_ratio")
+ArchiveLimits.__doc__ = """The maximum number of members of an archive,
+their total and individual uncompressed size in bytes
+and the ratio by which they may be compressed."""
+
+DEFAULT_LIMITS = ArchiveLimits(max_members=20_000, max_size=1024 * MiB, max_file_size=256 * MiB,
+                               max_ratio=200)
+
+# Small files may compress well without doing any harm
+RATIO_MIN_SIZE = MiB
+
+
+class LimitExceeded(Exception):
+    pass
+
+
+class Budget:
+    """Account for the members of an archive.
+
+    `add` raises `LimitExceeded` as soon as a limit is exceeded.
+    """
+
+    def __init__(self, limits=None):
+        self.limits = limits or get_limits()
+        self.members = 0
+        self.size = 0
+
+    def add(self, name, size, compressed_size=None):
+        limits = self.limits
+        self.members += 1
+        self.size += size
+        if self.members > limits.max_members:
+            raise LimitExceeded("The archive contains more than {} files and folders"
+                                .format(limits.max_members))
+        if size > limits.max_file_size:
+            raise LimitExceeded("'{}' is larger than {}".format(name, _mib(limits.max_file_size)))
+        if self.size > limits.max_size:
+            raise LimitExceeded("The contents of the archive are larger than {}"
+                                .format(_mib(limits.max_size)))
+        if compressed_size is not None:
+            self.check_ratio(name, size, compressed_size)
+
+    def check_ratio(self, name, size, compressed_size):
+        """Check the compression ratio of a member or, if `name` is `None`, the archive."""
+        if size >= RATIO_MIN_SIZE and size > compressed_size * self.limits.max_ratio:
+            raise LimitExceeded("{} is compressed by a ratio of more than {}".format(
+                "The archive" if name is None else "'{}'".format(name), self.limits.max_ratio))
+
+
+def check_zipfile(zipf, limits=None):
+    """Check the members of a `ZipFile` before any of them is read.
+
+    The sizes are taken from the central directory;
+    `zipfile` does not decompress more than that for a member.
+    """
+    budget = Budget(limits)
+    for info in zipf.infolist():
+        budget.add(info.filename, info.file_size, info.compress_size)
+
+
+def check_archive_size(size, limits=None):
+    """Check the (compressed) size of an archive that is being read."""
+    limits = limits or get_limits()
+    if size > limits.max_size:
+        raise LimitExceeded("The archive is larger than {}".format(_mib(limits.max_size)))
+
+
+def _mib(size):
+    return "{:g} MiB".format(size / MiB)
+
+
+_limits = DEFAULT_LIMITS
+
+
+def configure(limits=DEFAULT_LIMITS):
+    """Set the limits for the archives of this process."""
+    global _limits
+    _limits = limits
+
+
+def get_limits():
+    return _limits
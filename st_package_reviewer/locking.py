@@ -0,0 +1,53 @@
+"""Helpers for state that is shared between threads."""
+
+from collections import OrderedDict
+import functools
+import threading
+
+__all__ = ('locked_cache',)
+
+
+def locked_cache(maxsize=128):
+    """Cache a function's results like `functools.lru_cache`.
+
+    Unlike `lru_cache`, concurrent calls with the same arguments
+    wait for the first call to finish instead of computing the value again.
+    Keyword arguments are not supported.
+    """
+    def decorator(func):
+        cache = OrderedDict()
+        key_locks = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            with lock:
+                if args in cache:
+                    cache.move_to_end(args)
+                    return cache[args]
+                key_lock = key_locks.setdefault(args, threading.Lock())
+
+            with key_lock:
+                with lock:
+                    if args in cache:
+                        return cache[args]
+
+                try:
+                    value = func(*args)
+                    with lock:
+                        cache[args] = value
+                        if maxsize is not None and len(cache) > maxsize:
+                            cache.popitem(last=False)
+                finally:
+                    with lock:
+                        key_locks.pop(args, None)
+                return value
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
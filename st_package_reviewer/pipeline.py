@@ -0,0 +1,162 @@
+"""Process items in stages that run concurrently, connected by bounded queues.
+
+Each stage has its own number of worker threads,
+so that the stages that wait for the network
+overlap with those that keep the CPU busy.
+Because all queues are bounded,
+a slow stage holds back the stages before it
+instead of letting their results pile up in memory or on disk.
+"""
+
+from collections import namedtuple
+import contextvars
+import logging
+import queue
+import threading
+
+__all__ = ('Stage', 'Pipeline')
+
+l = logging.getLogger(__name__)
+
+Stage = namedtuple("Stage", "name func workers")
+Stage.__doc__ = """A step of a `Pipeline` that calls `func(item)` in `workers` threads."""
+
+# Marks the end of a queue's items; one is sent per worker of the receiving stage
+_DONE = object()
+
+
+class _Failure:
+
+    def __init__(self, exc):
+        self.exc = exc
+
+
+class Pipeline:
+    """Pass items through a sequence of `Stage`s.
+
+    Every stage receives the return value of the previous one.
+    Each stage can hold up to `queue_size` items per worker
+    in addition to the ones being processed.
+    An exception in a stage is raised by `run` at the position of its item,
+    and that item skips the remaining stages.
+    Once `run` is stopped, by an exception or by closing it,
+    the items that are still in the pipeline are passed to `discard`.
+    """
+
+    def __init__(self, stages, queue_size=1, discard=None):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.discard = discard
+
+    def run(self, items):
+        """Yield the results of the last stage in the order of `items`."""
+        stop = threading.Event()
+        queues = [queue.Queue(self.queue_size * stage.workers) for stage in self.stages]
+        out = queue.Queue()
+        # Workers run in the context of the caller, like `asyncio.to_thread`
+        context = contextvars.copy_context()
+        threads = [threading.Thread(target=context.copy().run,
+                                    args=(self._feed, items, queues[0], stop),
+                                    name="pipeline-feed", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            if i + 1 < len(self.stages):
+                next_queue, next_workers = queues[i + 1], self.stages[i + 1].workers
+            else:
+                next_queue, next_workers = out, 1
+            finish = _Countdown(stage.workers, lambda q=next_queue, n=next_workers: _close(q, n))
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=context.copy().run,
+                    args=(self._work, stage, queues[i], next_queue, finish, stop),
+                    name="pipeline-{}-{}".format(stage.name, n), daemon=True,
+                ))
+        for thread in threads:
+            thread.start()
+
+        # Results that arrived before the ones of earlier items
+        pending = {}
+        try:
+            yield from self._collect(out, pending)
+        finally:
+            stop.set()
+            # Let the remaining items flow through the skipped stages
+            remaining = list(pending.values())
+            while (entry := out.get()) is not _DONE:
+                remaining.append(entry[1])
+            for thread in threads:
+                thread.join()
+            if self.discard is not None:
+                for item in remaining:
+                    if not isinstance(item, _Failure):
+                        self.discard(item)
+
+    def _feed(self, items, first_queue, stop):
+        index = 0
+        try:
+            for item in items:
+                if stop.is_set():
+                    if self.discard is not None:
+                        self.discard(item)
+                    break
+                first_queue.put((index, item))
+                index += 1
+        except Exception as e:
+            # Raised by `run` after the results of all previous items
+            first_queue.put((index, _Failure(e)))
+        finally:
+            _close(first_queue, self.stages[0].workers)
+
+    @staticmethod
+    def _work(stage, in_queue, next_queue, finish, stop):
+        while True:
+            entry = in_queue.get()
+            if entry is _DONE:
+                break
+            index, item = entry
+            if not isinstance(item, _Failure) and not stop.is_set():
+                try:
+                    item = stage.func(item)
+                except Exception as e:
+                    l.debug("Stage %r failed", stage.name, exc_info=True)
+                    item = _Failure(e)
+            next_queue.put((index, item))
+        finish()
+
+    @staticmethod
+    def _collect(out, pending):
+        next_index = 0
+        while True:
+            entry = out.get()
+            if entry is _DONE:
+                break
+            index, item = entry
+            pending[index] = item
+            while next_index in pending:
+                item = pending.pop(next_index)
+                next_index += 1
+                if isinstance(item, _Failure):
+                    raise item.exc
+                yield item
+        # Put the end marker back for the cleanup in `run`
+        out.put(_DONE)
+
+
+class _Countdown:
+    """Call `func` when `count` calls were made."""
+
+    def __init__(self, count, func):
+        self._count = count
+        self._func = func
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self._count -= 1
+            last = self._count == 0
+        if last:
+            self._func()
+
+
+def _close(queue_, workers):
+    for _ in range(workers):
+        queue_.put(_DONE)
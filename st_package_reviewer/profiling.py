@@ -0,0 +1,116 @@
+"""Wall and CPU time measurements for checkers, files and pipeline stages.
+
+Profiling is disabled by default,
+in which case `measure` has almost no overhead.
+
+Records are collected per `scope`,
+so that the records of packages that are reviewed concurrently can be told apart.
+Threads that work for a scope must run in a copy of its context
+(see `contextvars.copy_context`).
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+import contextvars
+import json
+import threading
+import time
+
+__all__ = ('Record', 'enable', 'enabled', 'measure', 'add', 'scope', 'take_records',
+           'print_table', 'dump_json')
+
+Record = namedtuple("Record", "category name wall cpu")
+
+_enabled = False
+_records = {}
+_lock = threading.Lock()
+_scope = contextvars.ContextVar("profiling_scope", default=None)
+
+
+def enable(value=True):
+    global _enabled
+    _enabled = value
+
+
+def enabled():
+    return _enabled
+
+
+def measure(category, name):
+    """Return a context manager that records the time spent in its body."""
+    if not _enabled:
+        return nullcontext()
+    return _measure(category, name)
+
+
+@contextmanager
+def _measure(category, name):
+    wall_start = time.perf_counter()
+    # Use the thread's CPU time, as checkers may run concurrently
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        add(category, name, time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+
+
+def add(category, name, wall, cpu):
+    """Record times that were measured elsewhere, such as the sum of many short calls."""
+    if not _enabled:
+        return
+    with _lock:
+        _records.setdefault(_scope.get(), []).append(Record(category, name, wall, cpu))
+
+
+@contextmanager
+def scope(key):
+    """Collect the records of the body under `key` (any hashable object)."""
+    token = _scope.set(key)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def take_records(key=None):
+    """Return and forget all records collected so far in the scope `key`."""
+    with _lock:
+        return _records.pop(key, [])
+
+
+def _aggregate(records):
+    totals = {}
+    for record in records:
+        key = (record.category, record.name)
+        wall, cpu, count = totals.get(key, (0, 0, 0))
+        totals[key] = (wall + record.wall, cpu + record.cpu, count + 1)
+    return sorted(((key, *values) for key, values in totals.items()),
+                  key=lambda item: item[1], reverse=True)
+
+
+def print_table(records, file=None, limit=None):
+    """Print the total times per category and name, sorted by wall time."""
+    rows = _aggregate(records)
+    if limit is not None:
+        rows = rows[:limit]
+
+    print("Profile (sorted by wall time):", file=file)
+    print(file=file)
+    print("{:>10} {:>10} {:>6}  {:<8}  {}".format("wall [s]", "cpu [s]", "count",
+                                                  "category", "name"),
+          file=file)
+    for (category, name), wall, cpu, count in rows:
+        print("{:10.4f} {:10.4f} {:6d}  {:<8}  {}".format(wall, cpu, count, category, name),
+              file=file)
+    print(file=file)
+
+
+def dump_json(records, path):
+    """Write records to a JSON file.
+
+    `records` is an iterable of `(package, record)` tuples.
+    """
+    data = [dict(package=package, **record._asdict())
+            for package, record in records]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'records': data}, f, indent=2)
@@ -0,0 +1,202 @@
+"""Schedule requests to the GitHub API according to its rate limits.
+
+All sessions that access GitHub mount a `RateLimitedAdapter`,
+so every request of a process goes through the same `RateLimiter`.
+The limiter keeps a token bucket per rate limit resource
+that is filled from the `X-RateLimit-*` headers of the responses,
+waits for the reset instead of sending requests that would be rejected
+and backs off when a secondary rate limit is hit.
+Archive downloads are prioritized over metadata requests,
+because a review cannot finish without them.
+
+When packages are reviewed in multiple worker processes,
+each process uses its `share` of the remaining budget.
+"""
+
+import logging
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+__all__ = ('RateLimiter', 'RateLimitedAdapter', 'RateLimitExceeded', 'configure', 'get_limiter',
+           'LOW', 'HIGH')
+
+l = logging.getLogger(__name__)
+
+LOW = 0
+HIGH = 1
+
+# Requests with a low priority leave this fraction of the limit to others
+LOW_PRIORITY_RESERVE = 0.1
+# Longer waits for a primary rate limit reset are not worth it
+MAX_WAIT = 15 * 60
+MAX_RETRIES = 3
+SECONDARY_BACKOFF = 60
+
+
+def _priority(request):
+    parsed = urlparse(request.url)
+    if parsed.netloc.startswith("codeload.") or re.search(r"/(zip|tar)ball/", parsed.path):
+        return HIGH
+    return LOW
+
+
+def _resource(request):
+    return 'graphql' if urlparse(request.url).path.endswith("/graphql") else 'core'
+
+
+class _Bucket:
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+
+
+class RateLimiter:
+
+    def __init__(self, share=1.0, clock=time.time):
+        self.share = share
+        self.clock = clock
+        self.backoff_until = 0
+        self._buckets = {}
+        self._cond = threading.Condition()
+
+    def _bucket(self, resource):
+        return self._buckets.setdefault(resource, _Bucket())
+
+    def _available(self, bucket, priority):
+        """Return the number of requests that may be sent now or `None` if unknown."""
+        if bucket.remaining is None or bucket.reset <= self.clock():
+            return None
+        available = bucket.remaining * self.share
+        if priority == LOW:
+            # Keep a reserve for archive downloads
+            available -= (bucket.limit or 0) * LOW_PRIORITY_RESERVE * self.share
+        return available
+
+    def acquire(self, resource='core', priority=LOW):
+        """Wait until a request may be sent.
+
+        Returns `False` if the wait would take longer than `MAX_WAIT`.
+        """
+        with self._cond:
+            while True:
+                now = self.clock()
+                bucket = self._bucket(resource)
+                if now < self.backoff_until:
+                    wait = self.backoff_until - now
+                else:
+                    available = self._available(bucket, priority)
+                    if available is None or available >= 1:
+                        if bucket.remaining is not None:
+                            bucket.remaining -= 1
+                        return True
+                    wait = bucket.reset - now
+                if wait > MAX_WAIT:
+                    l.warning("GitHub rate limit exhausted until %s",
+                              time.strftime("%X", time.localtime(now + wait)))
+                    return False
+                l.info("Waiting %.0f s for the GitHub rate limit", wait)
+                self._cond.wait(wait)
+
+    def update(self, headers, resource='core'):
+        """Update the bucket from the rate limit headers of a response."""
+        try:
+            remaining = int(headers['X-RateLimit-Remaining'])
+            reset = float(headers['X-RateLimit-Reset'])
+            limit = int(headers.get('X-RateLimit-Limit', 0)) or None
+        except (KeyError, ValueError):
+            return
+        resource = headers.get('X-RateLimit-Resource', resource)
+        with self._cond:
+            bucket = self._bucket(resource)
+            if bucket.reset is not None and reset < bucket.reset:
+                # Outdated response
+                return
+            bucket.limit, bucket.remaining, bucket.reset = limit, remaining, reset
+            self._cond.notify_all()
+
+    def back_off(self, seconds):
+        with self._cond:
+            self.backoff_until = max(self.backoff_until, self.clock() + seconds)
+            self._cond.notify_all()
+
+
+def _secondary_wait(response, attempt):
+    """Return the seconds to wait if `response` is a rejection by a secondary rate limit."""
+    if response.status_code not in (403, 429):
+        return None
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    if response.headers.get('X-RateLimit-Remaining') == "0":
+        return None
+    if response.status_code == 429 or "secondary rate limit" in response.text.lower():
+        return SECONDARY_BACKOFF * 2 ** attempt
+    return None
+
+
+class RateLimitExceeded(RequestException):
+    """The rate limit does not allow a request within `MAX_WAIT`."""
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """An `HTTPAdapter` that sends requests when the rate limit allows them.
+
+    Raises `RateLimitExceeded` instead of waiting longer than `MAX_WAIT`.
+    """
+
+    def __init__(self, limiter=None, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def send(self, request, **kwargs):
+        limiter = self.limiter or get_limiter()
+        resource = _resource(request)
+        priority = _priority(request)
+
+        for attempt in range(MAX_RETRIES + 1):
+            if not limiter.acquire(resource, priority):
+                raise RateLimitExceeded("GitHub rate limit exhausted; not sending {} {}"
+                                        .format(request.method, request.url), request=request)
+            response = super().send(request, **kwargs)
+            limiter.update(response.headers, resource)
+
+            secondary_wait = _secondary_wait(response, attempt)
+            if secondary_wait is not None:
+                wait = secondary_wait
+            elif response.status_code in (403, 429) \
+                    and response.headers.get('X-RateLimit-Remaining') == "0":
+                # The primary limit was exhausted by other clients;
+                # the next `acquire` waits for the reset.
+                wait = float(response.headers.get('X-RateLimit-Reset', 0)) - limiter.clock()
+            else:
+                return response
+            if wait > MAX_WAIT or attempt == MAX_RETRIES:
+                return response
+
+            l.info("Rate limited by GitHub; retrying %s in %.0f s", request.url, wait)
+            if secondary_wait is not None:
+                limiter.back_off(secondary_wait)
+            response.close()
+        return response
+
+
+_limiter = RateLimiter()
+
+
+def configure(share=1.0):
+    """Set the share of the rate limit budget for this process."""
+    _limiter.share = share
+
+
+def get_limiter():
+    return _limiter
@@ -1,21 +1,28 @@
 from collections import namedtuple
-import functools
+import io
 import logging
+import os
 import re
-import tempfile
-import zipfile
+import threading
 
-from .lib import semver
+from . import profiling
+from .limits import Budget, LimitExceeded, check_archive_size, check_zipfile, get_limits
+from .snapshots import RepoSnapshot
+from .locking import locked_cache
 
 
-__all__ = ('tags', 'SemVerTag', 'semver_tags', 'latest_ref', 'download')
+__all__ = ('tags', 'SemVerTag', 'semver_tags', 'latest_ref', 'release_ref', 'resolve_sha',
+           'list_tree', 'download', 'Fetched', 'fetch', 'extract', 'fetch_to_memory',
+           'package_path', 'extract_stream')
 
 l = logging.getLogger(__name__)
 
 
 # Cache a repos' tags
-@functools.lru_cache()
+@locked_cache()
 def tags(repo):
+    if isinstance(repo, RepoSnapshot):
+        return repo.tags
     tags = tuple(repo.tags())
     l.debug("tags: %s", tags)
     return tags
@@ -25,12 +32,24 @@ SemVerTag = namedtuple("SemVerTag", "version tag")
 
 
 # More caching
-@functools.lru_cache()
-def semver_tags(repo):
+@locked_cache()
+def semver_tags(repo, prefix=None):
+    """Return the tags that are semantic versions.
+
+    If `prefix` is specified, only tags with that prefix are considered
+    (like Package Control does for releases with a `tags` prefix).
+    """
+    from .lib import semver
+
     semver_tags = []
     for tag in tags(repo):
-        # do some smart-ass stripping here
-        stripped_name = re.sub(r"^(v|st[23]?-v?)", '', tag.name)
+        if prefix is not None:
+            if not tag.name.startswith(prefix):
+                continue
+            stripped_name = tag.name[len(prefix):]
+        else:
+            # do some smart-ass stripping here
+            stripped_name = re.sub(r"^(v|st[23]?-v?)", '', tag.name)
         try:
             ver = semver.SemVer(stripped_name)
         except ValueError:
@@ -42,9 +61,17 @@ def semver_tags(repo):
     return tuple(semver_tags)
 
 
-def latest_ref(repo):
-    latest_version = max(semver_tags(repo), key=lambda x: x.version, default=None)
+def latest_ref(repo, prefix=None):
+    """Return the ref of the latest semantic version tag.
+
+    If there is none, return the master branch
+    or, if `prefix` is given, `None`,
+    as Package Control has no release to install then.
+    """
+    latest_version = max(semver_tags(repo, prefix), key=lambda x: x.version, default=None)
     if latest_version is None:
+        if prefix is not None:
+            return None
         # TODO determine a repo's default branch?
         # Alternatively, have this specified by CLI.
         # By default, PC downloads master branch anyway.
@@ -53,34 +80,319 @@ def latest_ref(repo):
         return "tags/{}".format(latest_version.tag.name)
 
 
-# TODO tarfile does not work for some reason
-def download(repo, ref, dirpath):
-    # if dirpath is None:
-    #     dirpath = Path(tempfile.mkdtemp(suffix="_" + repo.name))
+def release_ref(repo, release):
+    """Resolve the ref that Package Control would install for a release definition.
 
-    with tempfile.TemporaryFile() as f:
-        l.info("Downloading package...")
-        repo.archive('zipball', path=f, ref=ref)  # 'tarball'
-        res = f.seek(0)
-        assert res == 0
+    Returns `None` if no tag matches the release's tag prefix.
+    """
+    if release.get('branch'):
+        return "heads/{}".format(release['branch'])
 
-        l.debug("Extracting to '%s'...", dirpath)
-        zipf = zipfile.ZipFile(f)  # tarf = tarfile.TarFile(fileobj=f)
-        try:
-            zipf.extractall(path=str(dirpath))
-        except Exception:
-            l.exception("Couldn't extract zipfile contents")
+    tags = release.get('tags')
+    if tags:
+        return latest_ref(repo, prefix=tags if isinstance(tags, str) else None)
+
+    # Entries of a channel's packages_cache contain resolved download URLs
+    m = re.match(r"https://codeload\.github\.com/[^/]+/[^/]+/zip/(.+)$", release.get('url', ''))
+    if m:
+        return m.group(1)
+
+    return "heads/{}".format(repo.default_branch)
+
+
+def resolve_sha(repo, ref):
+    """Return the SHA of the commit that `ref` points to or `None` if it cannot be resolved."""
+    try:
+        with profiling.measure("stage", "resolve sha"):
+            commit = repo.commit(ref)
+    except Exception as e:
+        l.debug("Unable to resolve %s: %s", ref, e)
+        return None
+    return commit.sha if commit else None
+
+
+def list_tree(repo, sha):
+    """Return `(path, is_dir)` tuples for the files and folders of commit `sha`.
+
+    Submodules are listed as (empty) folders, like they appear in archives.
+    Returns `None` if the complete listing is not available.
+    """
+    try:
+        with profiling.measure("stage", "list tree"):
+            if isinstance(repo, RepoSnapshot):
+                return repo.list_tree(sha)
+            tree = repo.tree(sha, recursive=True)
+    except Exception as e:
+        l.debug("Unable to list the tree of %s: %s", sha, e)
+        return None
+    if tree is None or tree.as_dict().get('truncated'):
+        return None
+    return [(entry.path, entry.type != 'blob') for entry in tree.tree or ()]
+
+
+def _owner_and_name(repo):
+    owner = repo.owner
+    # github3 repositories have an owner object, snapshots the login
+    return getattr(owner, 'login', owner), repo.name
+
+
+def download(repo, ref, dirpath, archive_cache=None):
+    """Download and extract the archive of `repo` at `ref`.
+
+    If an `ArchiveCache` is given, the ref is resolved to a commit SHA
+    and the extracted tree is stored in the cache
+    (and `dirpath` is not used);
+    it is held until the returned path is released.
+    Returns the path of the package or `None`.
+    Raises `LimitExceeded` if the archive exceeds the configured limits.
+    """
+    fetched = fetch(repo, ref, dirpath, archive_cache)
+    if fetched is None:
+        return None
+    return extract(repo, fetched, dirpath, archive_cache)
+
+
+Fetched = namedtuple("Fetched", "sha path")
+
+
+def fetch(repo, ref, dirpath, archive_cache=None, sha=None):
+    """Download the archive of `repo` at `ref` unless it is cached.
+
+    The archive is extracted while it is downloaded.
+    `sha` is the commit SHA of `ref` if it was already resolved.
+    Returns a `Fetched` tuple with the resolved commit SHA
+    (`None` if the archive is not cached)
+    and the path of the extracted tree or of a cached zip archive,
+    or `None` if the download failed.
+    Cached paths are held in the `ArchiveCache` until they are released.
+    Raises `LimitExceeded` if the archive exceeds the configured limits.
+    """
+    if archive_cache is None:
+        sha = None
+    elif sha is None:
+        sha = resolve_sha(repo, ref)
+    if sha is None:
+        tree_path = dirpath / "tree"
+        if not _stream_archive(repo, ref, tree_path):
             return None
+        return Fetched(None, tree_path)
 
-        # Because all archives from github are nested another level,
-        # we need to find out what the name of that folder is.
-        namelist = zipf.namelist()
-        if not namelist:
-            l.error("zip file is empty")
+    owner, name = _owner_and_name(repo)
+    tree_path = archive_cache.get_tree(owner, name, sha)
+    if tree_path is not None:
+        l.info("Using cached package for %s (%s)", ref, sha)
+        return Fetched(sha, tree_path)
+
+    # Zip archives that were cached by earlier versions
+    archive_path = archive_cache.get_archive(owner, name, sha)
+    if archive_path is not None:
+        l.info("Using cached archive for %s (%s)", ref, sha)
+        return Fetched(sha, archive_path)
+
+    tree_path = archive_cache.put_tree(owner, name, sha,
+                                       lambda folder: _stream_archive(repo, sha, folder))
+    if tree_path is None:
+        return None
+    return Fetched(sha, tree_path)
+
+
+def extract(repo, fetched, dirpath, archive_cache=None):
+    """Return the path of the package for a result of `fetch` or `None`.
+
+    Only cached zip archives still need to be extracted.
+    The hold of a cached archive is replaced by a hold of its extracted tree.
+    """
+    tree_path = fetched.path
+    if not tree_path.is_dir():
+        def extract_to(folder):
+            with fetched.path.open('rb') as f:
+                return _extract(f, folder) is not None
+
+        owner, name = _owner_and_name(repo)
+        try:
+            tree_path = archive_cache.put_tree(owner, name, fetched.sha, extract_to)
+        finally:
+            archive_cache.release(fetched.path)
+        if tree_path is None:
             return None
-        subfolder_name, slash, _ = namelist[0].partition('/')
-        assert slash
 
-    target_path = dirpath / subfolder_name
-    l.info("Downloaded package to '%s'", target_path)
+    target_path = package_path(tree_path)
+    l.info("Package is at '%s'", target_path)
     return target_path
+
+
+def fetch_to_memory(repo, ref, base_path):
+    """Download the zip archive of `repo` at `ref` into memory.
+
+    Returns a `ZipFS` of the archive, whose files appear below `base_path`,
+    or `None` if the download failed.
+    Raises `LimitExceeded` if the archive exceeds the configured limits.
+    """
+    import zipfile
+    from .vfs import ZipFS
+
+    l.info("Downloading package...")
+    buf = _LimitedBuffer(get_limits())
+    try:
+        with profiling.measure("stage", "download"):
+            ok = repo.archive('zipball', path=buf, ref=ref)
+    except LimitExceeded:
+        raise
+    except Exception as e:
+        l.error("Unable to download archive for %s: %s", ref, e)
+        return None
+    if not ok:
+        l.error("Unable to download archive for %s", ref)
+        return None
+    try:
+        return ZipFS(buf, base_path, strip_root=True)
+    except zipfile.BadZipFile as e:
+        l.error("Couldn't read archive: %s", e)
+        return None
+
+
+def package_path(tree_path):
+    """Return the folder of the package in an extracted archive.
+
+    Archives from GitHub contain a single top-level folder,
+    while those of `git archive` usually do not.
+    """
+    entries = list(tree_path.iterdir())
+    if len(entries) == 1 and entries[0].is_dir():
+        return entries[0]
+    return tree_path
+
+
+def _stream_archive(repo, ref, dirpath):
+    """Download the tarball of `repo` at `ref` into `dirpath`, extracting it on the fly.
+
+    Returns whether the archive was downloaded and extracted completely.
+    Raises `LimitExceeded` if the archive exceeds the configured limits.
+    """
+    l.info("Downloading package...")
+    read_fd, write_fd = os.pipe()
+    result = {}
+
+    def download():
+        # Closing the pipe ends the stream, even on errors
+        with open(write_fd, 'wb') as f:
+            try:
+                result['ok'] = repo.archive('tarball', path=f, ref=ref)
+            except Exception as e:
+                result['error'] = e
+
+    thread = threading.Thread(target=download, name="download", daemon=True)
+    with profiling.measure("stage", "download"):
+        thread.start()
+        try:
+            # Closing the pipe early makes the download fail with a `BrokenPipeError`
+            with open(read_fd, 'rb') as f:
+                f = _CountingReader(f, get_limits())
+                extracted = extract_stream(f, dirpath)
+                if extracted:
+                    # Let the download finish with the padding after the last member
+                    while f.read(64 * 1024):
+                        pass
+        finally:
+            thread.join()
+
+    if result.get('error') is not None and not isinstance(result['error'], BrokenPipeError):
+        l.error("Unable to download archive for %s: %s", ref, result['error'])
+        return False
+    if not result.get('ok'):
+        l.error("Unable to download archive for %s", ref)
+        return False
+    return extracted
+
+
+def extract_stream(f, dirpath):
+    """Extract a (compressed) tar stream from the file object `f` member by member.
+
+    Members that would be extracted outside of `dirpath`
+    or that are not regular files, folders or links are skipped.
+    The sizes of the members are checked before they are extracted
+    and the compression ratio of the stream after each member.
+    Returns whether the stream could be read completely.
+    Raises `LimitExceeded` if the archive exceeds the configured limits.
+    """
+    import tarfile
+
+    budget = Budget()
+    if not isinstance(f, _CountingReader):
+        f = _CountingReader(f, budget.limits)
+    dirpath.mkdir(parents=True, exist_ok=True)
+    l.debug("Extracting to '%s'...", dirpath)
+    try:
+        with tarfile.open(fileobj=f, mode='r|*') as tarf:
+            for member in tarf:
+                budget.add(member.name, member.size)
+                try:
+                    tarf.extract(member, dirpath, filter='data')
+                except tarfile.FilterError as e:
+                    l.warning("Skipping archive member: %s", e)
+                budget.check_ratio(None, budget.size, f.count)
+    except (tarfile.TarError, EOFError, OSError) as e:
+        l.error("Couldn't extract archive: %s", e)
+        return False
+    return True
+
+
+def _extract(f, dirpath):
+    """Extract a zip archive and return the name of its top-level folder or `None`."""
+    import zipfile
+
+    res = f.seek(0)
+    assert res == 0
+
+    l.debug("Extracting to '%s'...", dirpath)
+    try:
+        zipf = zipfile.ZipFile(f)
+        check_zipfile(zipf)
+        with profiling.measure("stage", "extract"):
+            zipf.extractall(path=str(dirpath))
+    except LimitExceeded:
+        raise
+    except Exception:
+        l.exception("Couldn't extract zipfile contents")
+        return None
+
+    # Because all archives from github are nested another level,
+    # we need to find out what the name of that folder is.
+    namelist = zipf.namelist()
+    if not namelist:
+        l.error("zip file is empty")
+        return None
+    subfolder_name, slash, _ = namelist[0].partition('/')
+    assert slash
+    return subfolder_name
+
+
+class _CountingReader(io.RawIOBase):
+    """Count the bytes read from a binary file object and check them against `limits`."""
+
+    def __init__(self, f, limits):
+        self._f = f
+        self._limits = limits
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._f.read(len(buffer))
+        buffer[:len(data)] = data
+        self.count += len(data)
+        check_archive_size(self.count, self._limits)
+        return len(data)
+
+
+class _LimitedBuffer(io.BytesIO):
+    """A `BytesIO` whose size is checked against `limits`."""
+
+    def __init__(self, limits):
+        super().__init__()
+        self._limits = limits
+
+    def write(self, data):
+        check_archive_size(self.tell() + len(data), self._limits)
+        return super().write(data)
@@ -0,0 +1,272 @@
+"""Output formats for review results.
+
+A reporter is used in two places:
+Reviews render each package into a chunk of text with the `begin_package`,
+`heading`, `report_runner`, `error` and `end_package` methods,
+possibly in a worker process.
+The chunks are then written to the output stream with `start`, `write` and `finish`
+as soon as each package is done,
+so nothing but the current package's results is kept in memory.
+"""
+
+import json
+import re
+import traceback
+
+from . import __version__
+
+__all__ = ('Reporter', 'MarkdownReporter', 'JsonLinesReporter', 'SarifReporter',
+           'FORMATS', 'get_reporter')
+
+
+class Reporter:
+
+    # Package level ###########################################################
+
+    def begin_package(self, file, name, location=None):
+        pass
+
+    def heading(self, file, text):
+        pass
+
+    def report_runner(self, file, runner, title=None):
+        raise NotImplementedError
+
+    def report_item(self, file, report):
+        raise NotImplementedError
+
+    def error(self, file, message):
+        pass
+
+    def end_package(self, file, exit_code=0, ref=None):
+        pass
+
+    def skipped(self, file, name, location, reason):
+        pass
+
+    # Stream level ############################################################
+
+    def start(self, file):
+        pass
+
+    def write(self, file, chunk):
+        file.write(chunk)
+        file.flush()
+
+    def finish(self, file):
+        pass
+
+
+class MarkdownReporter(Reporter):
+
+    _indent = " " * 4
+
+    def begin_package(self, file, name, location=None):
+        print(file=file)
+        print("##", "Report for", name, "#" * (40 - len(name)), file=file)
+        print(file=file)
+
+    def heading(self, file, text):
+        print("### {} ###".format(text), file=file)
+        print(file=file)
+
+    def report_runner(self, file, runner, title=None):
+        if runner.failures:
+            print("Reporting {} failures:".format(len(runner.failures)), file=file)
+        else:
+            print("No failures", file=file)
+        for failure in runner.failures:
+            failure.report(file=file, reporter=self)
+
+        print(file=file)  # new line
+
+        if runner.warnings:
+            print("Reporting {} warnings:".format(len(runner.warnings)), file=file)
+        else:
+            print("No warnings", file=file)
+
+        for warning in runner.warnings:
+            warning.report(file=file, reporter=self)
+
+        print(file=file)  # new line
+
+        if title == 'repository':
+            # separate from package checks
+            print(file=file)
+
+    def report_item(self, file, report):
+        print("- {}".format(report.message), file=file)
+        for elem in report.details:
+            print("{}{}".format(self._indent, elem), file=file)
+        if report.exc_info:
+            traceback.print_exception(*report.exc_info, file=file)
+
+    def error(self, file, message):
+        print(message, file=file)
+
+    def skipped(self, file, name, location, reason):
+        self.begin_package(file, name, location)
+        print("Skipped: {}".format(reason), file=file)
+
+    def finish(self, file):
+        print(file=file)
+        print("For more details on the report messages (for example how to resolve them), go to:"
+              "\nhttps://github.com/packagecontrol/st_package_reviewer/wiki", file=file)
+        print(file=file)
+        file.flush()
+
+
+class _StructuredReporter(Reporter):
+    """Collects a package's results and writes them in `end_package`."""
+
+    def __init__(self):
+        self._package = None
+
+    def begin_package(self, file, name, location=None):
+        self._package = {'name': name, 'location': location, 'sections': [], 'errors': []}
+
+    def _report_to_dict(self, report):
+        data = {'message': report.message, 'details': list(report.details)}
+        if report.checker:
+            data['checker'] = report.checker
+        return data
+
+    def _runner_to_dict(self, runner, title):
+        return {
+            'title': title,
+            'failures': [self._report_to_dict(report) for report in runner.failures],
+            'warnings': [self._report_to_dict(report) for report in runner.warnings],
+        }
+
+    def report_runner(self, file, runner, title=None):
+        section = self._runner_to_dict(runner, title)
+        if self._package is None:
+            self._write_package(file, {'sections': [section]})
+        else:
+            self._package['sections'].append(section)
+
+    def report_item(self, file, report):
+        self._write_package(file, {'reports': [self._report_to_dict(report)]})
+
+    def error(self, file, message):
+        self._package['errors'].append(message)
+
+    def end_package(self, file, exit_code=0, ref=None):
+        package, self._package = self._package, None
+        package.update(exit_code=exit_code, ref=ref)
+        self._write_package(file, package)
+
+    def skipped(self, file, name, location, reason):
+        self._write_package(file, {'name': name, 'location': location, 'skipped': reason})
+
+    def _write_package(self, file, package):
+        raise NotImplementedError
+
+
+class JsonLinesReporter(_StructuredReporter):
+    """Writes one JSON object per package and line."""
+
+    def _write_package(self, file, package):
+        print(json.dumps(package), file=file)
+
+
+class SarifReporter(_StructuredReporter):
+    """Writes a SARIF 2.1.0 log with a single run for all packages.
+
+    Each package's results are written as soon as the package is done.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._written = False
+
+    def start(self, file):
+        header = {
+            'version': "2.1.0",
+            '$schema': "https://json.schemastore.org/sarif-2.1.0.json",
+            'runs': [{
+                'tool': {'driver': {
+                    'name': "st_package_reviewer",
+                    'version': __version__,
+                    'informationUri': "https://github.com/packagecontrol/st_package_reviewer",
+                }},
+                'results': [],
+            }],
+        }
+        text = json.dumps(header, indent=2)
+        # Leave the results array open
+        file.write(text[:text.rindex("[]")] + "[")
+        self._written = False
+
+    def write(self, file, chunk):
+        if not chunk:
+            return
+        if self._written:
+            file.write(",")
+        file.write(chunk)
+        file.flush()
+        self._written = True
+
+    def finish(self, file):
+        file.write("\n      ]\n    }\n  ]\n}\n")
+        file.flush()
+
+    def _result(self, package, section, report, level):
+        result = {
+            'ruleId': report.get('checker', "unknown"),
+            'level': level,
+            'message': {'text': report['message']},
+            'properties': {'package': package.get('name'), 'details': report['details']},
+        }
+        if section:
+            result['properties']['section'] = section
+        location = _location_from_details(report['details'])
+        if location:
+            result['locations'] = [location]
+        return result
+
+    def _write_package(self, file, package):
+        results = []
+        for section in package.get('sections', ()):
+            for report in section['failures']:
+                results.append(self._result(package, section['title'], report, 'error'))
+            for report in section['warnings']:
+                results.append(self._result(package, section['title'], report, 'warning'))
+        for report in package.get('reports', ()):
+            results.append(self._result(package, None, report, 'note'))
+        for message in package.get('errors', ()):
+            results.append(self._result(package, None,
+                                        {'message': message, 'details': []}, 'error'))
+        if package.get('skipped'):
+            results.append(self._result(package, None,
+                                        {'message': "Skipped: " + package['skipped'],
+                                         'details': []}, 'note'))
+        file.write(",".join("\n        " + json.dumps(result) for result in results))
+
+
+def _location_from_details(details):
+    physical = {}
+    for detail in details:
+        if detail.startswith("File: "):
+            physical['artifactLocation'] = {'uri': detail[len("File: "):].replace("\\", "/")}
+            continue
+        m = re.match(r"Line: (\d+)(?:, Column: (\d+))?$", detail)
+        if m:
+            region = {'startLine': int(m.group(1))}
+            if m.group(2):
+                region['startColumn'] = int(m.group(2))
+            physical['region'] = region
+    if 'artifactLocation' not in physical:
+        return None
+    return {'physicalLocation': physical}
+
+
+FORMATS = {
+    'markdown': MarkdownReporter,
+    'jsonl': JsonLinesReporter,
+    'sarif': SarifReporter,
+}
+
+
+def get_reporter(name='markdown'):
+    return FORMATS[name]()
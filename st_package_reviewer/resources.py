@@ -0,0 +1,110 @@
+"""Parsed resource files that are shared by the checkers of a review.
+
+Several checkers look at the same files,
+such as key bindings that are both validated as JSON
+and checked for conflicts with the default bindings,
+or Python files that all AST checkers visit.
+A `ResourceStore` parses each file at most once per review
+and hands the same document to every checker that asks for it.
+"""
+
+from collections import namedtuple
+from pathlib import Path
+
+from . import cache
+from .locking import locked_cache
+
+__all__ = ('Document', 'ResourceStore')
+
+# `data` is the parsed document or `None` if parsing failed with `error`
+Document = namedtuple("Document", "data error")
+
+
+def _parse_jsonc(f, path):
+    from .lib import jsonc
+    return cache.memoize("jsonc", f.read(), jsonc.loads)
+
+
+def _parse_json(f, path):
+    import json
+    return json.loads(f.read())
+
+
+def _parse_plist(f, path):
+    import plistlib
+    return plistlib.load(f)
+
+
+def _parse_xml(f, path):
+    import xml.etree.ElementTree as ET
+    return ET.parse(f)
+
+
+def _parse_python(f, path):
+    import ast
+
+    def parse(source):
+        try:
+            return ast.parse(source, path)
+        except SyntaxError as e:
+            return e
+
+    # The file name is part of the key because it is included in syntax errors,
+    # which are cached like trees
+    result = cache.memoize("ast\0" + path.name, f.read(), parse)
+    if isinstance(result, SyntaxError):
+        raise result
+    return result
+
+
+def _plist_errors():
+    from xml.parsers.expat import ExpatError
+    return (ValueError, ExpatError)
+
+
+def _xml_errors():
+    import xml.etree.ElementTree as ET
+    return (ET.ParseError,)
+
+
+# kind -> (open mode, parse function, function returning the exceptions of invalid files)
+_KINDS = {
+    'jsonc': ('r', _parse_jsonc, lambda: (ValueError,)),
+    'json': ('r', _parse_json, lambda: (ValueError,)),
+    'plist': ('rb', _parse_plist, _plist_errors),
+    'xml': ('rb', _parse_xml, _xml_errors),
+    'python': ('r', _parse_python, lambda: (SyntaxError,)),
+}
+
+
+class ResourceStore:
+    """Parse the resource files of a `FileIndex` on demand.
+
+    Documents are cached by path and kind for the lifetime of the index,
+    which, like the index itself, assumes that the files do not change.
+    Errors of invalid files are recorded in the document
+    for each checker to report.
+    Documents are shared and must not be modified.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._parse = locked_cache(maxsize=None)(self._parse_document)
+
+    def get(self, path, kind):
+        """Return the `Document` of the file at `path` parsed as `kind`.
+
+        `kind` is one of 'jsonc', 'json', 'plist', 'xml' and 'python'.
+        """
+        if kind not in _KINDS:
+            raise ValueError("Unknown resource kind {!r}".format(kind))
+        return self._parse(Path(self.index.base_path, path), kind)
+
+    def _parse_document(self, path, kind):
+        mode, parse, errors = _KINDS[kind]
+        kwargs = {'encoding': 'utf-8'} if mode == 'r' else {}
+        try:
+            with self.index.open(path, mode, **kwargs) as f:
+                return Document(parse(f, path), None)
+        except errors() as e:
+            return Document(None, e)
@@ -1,26 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import logging
 import sys
 
+from . import profiling
+from .check import Checker
+from .reporters import MarkdownReporter
+
 l = logging.getLogger(__name__)
 
 
 class CheckRunner:
 
-    def __init__(self, checkers, fail_on_warnings=False):
+    def __init__(self, checkers, fail_on_warnings=False, threads=1):
         self.checkers = checkers
         self.fail_on_warnings = fail_on_warnings
+        self.threads = threads
         self.failures = []
         self.warnings = []
         self._checked = False
 
     def run(self, *args, **kwargs):
         l.debug("\nRunning checkers...")
-        objs = []
-        for checker in self.checkers:
-            checker_obj = checker(*args, **kwargs)
-            objs.append(checker_obj)
+        objs = [checker(*args, **kwargs) for checker in self.checkers]
+
+        # Let checker classes that know how to share work between instances
+        # perform their checks together.
+        batches = {}
+        for checker_obj in objs:
+            batches.setdefault(_batch_owner(type(checker_obj)), []).append(checker_obj)
+        units = []
+        for owner, batch in batches.items():
+            if owner is Checker:
+                units.extend((owner, [checker_obj]) for checker_obj in batch)
+            else:
+                units.append((owner, batch))
+
+        if self.threads > 1 and len(units) > 1:
+            # Results are collected from `objs` below,
+            # so the order of the report does not depend on scheduling.
+            with ThreadPoolExecutor(max_workers=self.threads,
+                                    thread_name_prefix="checker") as executor:
+                # Keep the profiling scope of the calling thread
+                futures = [executor.submit(contextvars.copy_context().run,
+                                           _perform_checks, owner, batch)
+                           for owner, batch in units]
+                for future in futures:
+                    future.result()
+        else:
+            for owner, batch in units:
+                _perform_checks(owner, batch)
 
-            checker_obj.perform_check()
+        for checker_obj in objs:
             self.failures.extend(checker_obj.failures)
             self.warnings.extend(checker_obj.warnings)
             l.debug("Checker '%s' result: %s",
@@ -38,27 +69,27 @@ class CheckRunner:
             success &= not bool(self.warnings)
         return success
 
-    def report(self, file=None):
+    def report(self, file=None, reporter=None, title=None):
         if not self._checked:
             raise RuntimeError("Check has not been performed yet")
         if file is None:
             file = sys.stdout
+        if reporter is None:
+            reporter = MarkdownReporter()
 
-        if self.failures:
-            print("Reporting {} failures:".format(len(self.failures)), file=file)
-        else:
-            print("No failures", file=file)
-        for failure in self.failures:
-            failure.report(file=file)
+        reporter.report_runner(file, self, title)
 
-        print(file=file)  # new line
 
-        if self.warnings:
-            print("Reporting {} warnings:".format(len(self.warnings)), file=file)
-        else:
-            print("No warnings", file=file)
+def _perform_checks(owner, batch):
+    if owner is Checker:
+        with profiling.measure("checker", batch[0].__class__.__name__):
+            owner.perform_checks(batch)
+    else:
+        # The time of each checker is recorded by `perform_checks`
+        with profiling.measure("batch", owner.__name__):
+            owner.perform_checks(batch)
 
-        for warning in self.warnings:
-            warning.report(file=file)
 
-        print(file=file)  # new line
+def _batch_owner(cls):
+    """Return the class that defines the `perform_checks` method used by `cls`."""
+    return next(base for base in cls.__mro__ if 'perform_checks' in vars(base))
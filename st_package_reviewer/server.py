@@ -0,0 +1,141 @@
+"""Serve review requests over a local Unix socket.
+
+A client sends one JSON object per line and receives one JSON object per line in return.
+Requests have the following keys:
+
+- `target`: Path to a package or URL to a repository (required)
+- `repo_only`, `fail_on_warnings`: Like the command line options
+- `format`: Format of the returned report (default: `jsonl`)
+- `command`: `review` (default), `ping` or `shutdown`
+
+Responses contain the `exit_code` and the `report`,
+which is a JSON object for the `jsonl` format and a string otherwise,
+or an `error` message.
+
+Requests are handled one at a time,
+so the results of a review never depend on a concurrent one.
+Data that does not depend on the reviewed package
+(the checker classes, the default key bindings and the GitHub session)
+is kept between requests, while per-package caches are cleared after each.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+import socketserver
+import stat
+
+from . import repo_tools, reporters
+from .check.file import FileChecker
+
+__all__ = ('ReviewServer', 'clear_caches')
+
+l = logging.getLogger(__name__)
+
+_OPTIONS = ('repo_only', 'fail_on_warnings')
+
+
+def clear_caches():
+    """Forget cached data about reviewed packages and repositories."""
+    FileChecker._get_index.cache_clear()
+    repo_tools.tags.cache_clear()
+    repo_tools.semver_tags.cache_clear()
+
+
+class _RequestError(Exception):
+    pass
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise _RequestError("Request must be a JSON object")
+                response = self.server.handle_request_data(request)
+            except (ValueError, _RequestError) as e:
+                response = {'error': str(e)}
+            except Exception as e:
+                l.exception("Unable to handle request")
+                response = {'error': "Internal error: {}".format(e)}
+
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+            if self.server.stopping:
+                return
+
+
+class ReviewServer(socketserver.UnixStreamServer):
+    """Review packages for clients that connect to a Unix socket.
+
+    `review` is called with the `target` of a request and a dict of options
+    and must return the exit code and the rendered report.
+    It raises `ValueError` for invalid targets.
+    """
+
+    def __init__(self, socket_path, review):
+        self.socket_path = Path(socket_path)
+        self.review = review
+        self.stopping = False
+        self._remove_stale_socket()
+        # Clients may review any path that is readable for this process,
+        # so the socket is created accessible for the owner only
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(str(self.socket_path), _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def _remove_stale_socket(self):
+        try:
+            mode = self.socket_path.stat().st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError("'{}' exists and is not a socket".format(self.socket_path))
+        self.socket_path.unlink()
+
+    def serve(self):
+        """Handle requests until a client sends the `shutdown` command."""
+        l.info("Listening on '%s'", self.socket_path)
+        with self:
+            while not self.stopping:
+                self.handle_request()
+
+    def handle_request_data(self, request):
+        command = request.get('command', 'review')
+        if command == 'ping':
+            return {'ok': True}
+        elif command == 'shutdown':
+            self.stopping = True
+            return {'ok': True}
+        elif command != 'review':
+            raise _RequestError("Unknown command {!r}".format(command))
+
+        target = request.get('target')
+        if not isinstance(target, str) or not target:
+            raise _RequestError("Missing 'target'")
+        options = {key: bool(request.get(key, False)) for key in _OPTIONS}
+        format_ = request.get('format', 'jsonl')
+        if format_ not in reporters.FORMATS:
+            raise _RequestError("Unknown format {!r}".format(format_))
+        options['format'] = format_
+
+        l.info("Reviewing %s", target)
+        try:
+            exit_code, report = self.review(target, options)
+        finally:
+            clear_caches()
+
+        if format_ == 'jsonl':
+            report = json.loads(report)
+        return {'exit_code': exit_code, 'report': report}
+
+    def server_close(self):
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
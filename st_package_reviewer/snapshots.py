@@ -0,0 +1,247 @@
+"""Fetch repository metadata for many GitHub repositories at once.
+
+A single GraphQL query returns the data needed by the repository checks
+for up to 100 repositories,
+instead of several REST requests per repository.
+The GraphQL API requires authentication,
+so snapshots are only available if a token is set in `GITHUB_TOKEN`.
+
+The API endpoints can be changed with the `GITHUB_API_URL` and `GITHUB_GRAPHQL_URL`
+environment variables (as set on GitHub Actions)
+or with `configure`.
+"""
+
+from collections import namedtuple
+import logging
+import os
+import re
+
+from . import cache, profiling
+
+__all__ = ('RepoSnapshot', 'Tag', 'SnapshotError', 'token', 'fetch_snapshots')
+
+l = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+TAGS_PER_PAGE = 100
+
+# Like the REST API, READMEs are also found in `.github` and `docs`
+_README_RE = re.compile(r"readme(\.[\w-]+)*$", re.IGNORECASE)
+_README_FOLDERS = ('object', 'githubFolder', 'docsFolder')
+
+_REPOSITORY_FIELDS = """
+    nameWithOwner
+    pushedAt
+    defaultBranchRef { name }
+    object(expression: "HEAD:") { ... on Tree { entries { name } } }
+    githubFolder: object(expression: "HEAD:.github") { ... on Tree { entries { name } } }
+    docsFolder: object(expression: "HEAD:docs") { ... on Tree { entries { name } } }
+"""
+_TAGS_FIELDS = """
+    refs(refPrefix: "refs/tags/", first: %d, after: $c{i},
+         orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name }
+    }
+""" % TAGS_PER_PAGE
+
+
+Tag = namedtuple("Tag", "name")
+Commit = namedtuple("Commit", "sha")
+
+
+_RepoSnapshot = namedtuple("_RepoSnapshot", "owner name default_branch tags has_readme pushed_at")
+
+
+class RepoSnapshot(_RepoSnapshot):
+    """Metadata of a repository at the time it was fetched.
+
+    Can be used instead of a github3 repository for repository checks and downloads.
+    `tags` is a tuple of `Tag`s.
+    """
+
+    __slots__ = ()
+
+    def commit(self, ref):
+        """Return the `Commit` that `ref` points to or `None` if it does not exist."""
+        url = "{}/repos/{}/{}/commits/{}".format(api_url(), self.owner, self.name, ref)
+        response = _session().get(url, headers={'Accept': "application/vnd.github.sha"})
+        if response.status_code in (404, 422):
+            return None
+        response.raise_for_status()
+        return Commit(response.text.strip())
+
+    def list_tree(self, sha):
+        """Return `(path, is_dir)` tuples for all entries of the tree of commit `sha`.
+
+        Returns `None` if the listing was truncated by GitHub.
+        """
+        url = "{}/repos/{}/{}/git/trees/{}".format(api_url(), self.owner, self.name, sha)
+        response = _session().get(url, params={'recursive': "1"})
+        response.raise_for_status()
+        data = response.json()
+        if data.get('truncated'):
+            return None
+        return [(entry['path'], entry['type'] != 'blob') for entry in data['tree']]
+
+    def archive(self, format, path, ref=None):
+        """Download an archive of the repository to the file object `path`."""
+        url = "{}/repos/{}/{}/{}/{}".format(api_url(), self.owner, self.name, format, ref or "")
+        with _session().get(url, stream=True) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                path.write(chunk)
+        return True
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def token():
+    return os.environ.get('GITHUB_TOKEN') or None
+
+
+_api_url = None
+
+
+def configure(api_url=None):
+    """Use the GitHub API at `api_url` instead of the one from the environment."""
+    global _api_url
+    _api_url = api_url
+
+
+def api_url():
+    if _api_url:
+        return _api_url.rstrip("/")
+    return os.environ.get('GITHUB_API_URL', "https://api.github.com").rstrip("/")
+
+
+def graphql_url():
+    return os.environ.get('GITHUB_GRAPHQL_URL', api_url() + "/graphql")
+
+
+_requests_session = None
+
+
+def _session():
+    """Return the HTTP session of the current process."""
+    global _requests_session
+    if _requests_session is None:
+        import requests
+
+        _requests_session = requests.Session()
+        _requests_session.headers['Accept'] = "application/vnd.github+json"
+        if token():
+            _requests_session.headers['Authorization'] = "bearer " + token()
+        http_cache = cache.get_http_cache()
+        if http_cache is not None:
+            from .http_cache import CachingAdapter
+            adapter = CachingAdapter(http_cache)
+        else:
+            from .ratelimit import RateLimitedAdapter
+            adapter = RateLimitedAdapter()
+        _requests_session.mount("https://", adapter)
+        # Local stand-ins for the API
+        _requests_session.mount("http://", adapter)
+    return _requests_session
+
+
+def _query(locations, cursors=None):
+    """Build a query for `locations` and the variables for it.
+
+    If `cursors` is given, only the tags after the cursors are queried.
+    """
+    params = []
+    fields = []
+    variables = {}
+    for i, (owner, name) in enumerate(locations):
+        params.append("$o{0}: String!, $n{0}: String!, $c{0}: String".format(i))
+        variables.update({'o%d' % i: owner, 'n%d' % i: name,
+                          'c%d' % i: cursors[i] if cursors else None})
+        selection = _TAGS_FIELDS.replace("{i}", str(i))
+        if not cursors:
+            selection = _REPOSITORY_FIELDS + selection
+        fields.append("r{0}: repository(owner: $o{0}, name: $n{0}) {{{1}}}"
+                      .format(i, selection))
+    query = "query({}) {{\n{}\n}}".format(", ".join(params), "\n".join(fields))
+    return query, variables
+
+
+def _post(query, variables):
+    with profiling.measure("stage", "graphql"):
+        response = _session().post(graphql_url(), json={'query': query, 'variables': variables})
+    if response.status_code != 200:
+        raise SnapshotError("GraphQL request failed with status {}: {}"
+                            .format(response.status_code, response.text[:200]))
+    result = response.json()
+    data = result.get('data')
+    for error in result.get('errors', ()):
+        # Missing repositories are reported as errors with `null` data
+        if error.get('type') != 'NOT_FOUND':
+            l.debug("GraphQL error: %s", error.get('message'))
+            if data is None:
+                raise SnapshotError(error.get('message'))
+    if data is None:
+        raise SnapshotError("GraphQL response has no data")
+    return data
+
+
+def _fetch_batch(locations):
+    data = _post(*_query(locations))
+    repos = [data.get('r%d' % i) for i in range(len(locations))]
+    tags = [[node['name'] for node in repo['refs']['nodes']] if repo else None
+            for repo in repos]
+
+    # Follow the tag pages of repositories with many tags
+    page_infos = {i: repo['refs']['pageInfo'] for i, repo in enumerate(repos) if repo}
+    while True:
+        pending = [i for i, info in page_infos.items() if info['hasNextPage']]
+        if not pending:
+            break
+        l.debug("Fetching more tags for %d repositories", len(pending))
+        page = _post(*_query([locations[i] for i in pending],
+                             [page_infos[i]['endCursor'] for i in pending]))
+        for j, i in enumerate(pending):
+            repo = page.get('r%d' % j)
+            if not repo:
+                # The repository was deleted or made private in the meantime
+                repos[i] = None
+                del page_infos[i]
+                continue
+            refs = repo['refs']
+            tags[i].extend(node['name'] for node in refs['nodes'])
+            page_infos[i] = refs['pageInfo']
+
+    snapshots = {}
+    for location, repo, repo_tags in zip(locations, repos, tags):
+        if not repo:
+            snapshots[location] = None
+            continue
+        owner, name = repo['nameWithOwner'].split("/", 1)
+        entries = [entry for folder in _README_FOLDERS
+                   for entry in (repo.get(folder) or {}).get('entries') or ()]
+        snapshots[location] = RepoSnapshot(
+            owner=owner,
+            name=name,
+            default_branch=(repo.get('defaultBranchRef') or {}).get('name'),
+            tags=tuple(Tag(tag) for tag in repo_tags),
+            has_readme=any(_README_RE.match(entry['name']) for entry in entries),
+            pushed_at=repo.get('pushedAt'),
+        )
+    return snapshots
+
+
+def fetch_snapshots(locations):
+    """Return a dict of `(owner, name)` to `RepoSnapshot` for each location.
+
+    Repositories that do not exist or are not accessible map to `None`.
+    Raises `SnapshotError` if the API cannot be queried.
+    """
+    locations = list(dict.fromkeys(locations))
+    snapshots = {}
+    for start in range(0, len(locations), BATCH_SIZE):
+        batch = locations[start:start + BATCH_SIZE]
+        l.debug("Fetching snapshots of %d repositories", len(batch))
+        snapshots.update(_fetch_batch(batch))
+    return snapshots
@@ -0,0 +1,151 @@
+"""File systems that packages are reviewed from.
+
+Checkers read the files of a package through its `FileIndex`,
+which opens them with one of these file systems:
+`LocalFS` for folders on disk
+and `ZipFS` for zip archives,
+whose members are read straight from the archive without extracting it.
+"""
+
+import errno
+import io
+import mmap
+import os
+from pathlib import Path, PurePosixPath
+
+from .limits import check_zipfile
+
+__all__ = ('LocalFS', 'ZipFS')
+
+
+class LocalFS:
+    """The files of a folder on disk."""
+
+    def __init__(self, base_path):
+        self.base_path = Path(base_path).absolute()
+
+    def listing(self):
+        """Return `None`, as the folder is walked by the `FileIndex`."""
+        return None
+
+    def open(self, rel_path, mode='r', **kwargs):
+        return open(self.base_path / rel_path, mode, **kwargs)
+
+    def close(self):
+        pass
+
+
+class ZipFS:
+    """The files of a zip archive.
+
+    `file` is the path or a seekable binary file object of the archive.
+    Archives on disk are memory-mapped,
+    so only the members that are opened are read.
+    With `strip_root`, for archives from GitHub,
+    whose members are in a single top-level folder,
+    that folder is the root of the file system.
+    Files are presented below `base_path`, which does not exist on disk
+    (by default the path of the archive, followed by the stripped folder).
+    Raises `LimitExceeded` if the archive exceeds `limits`
+    (by default the configured ones).
+    """
+
+    def __init__(self, file, base_path=None, limits=None, strip_root=False):
+        # Local packages are reviewed without loading zipfile
+        import zipfile
+
+        if base_path is None:
+            base_path = file
+        self._mapped = None
+        if isinstance(file, (str, os.PathLike)):
+            self._mapped = file = _MappedFile(file)
+        try:
+            self._zipf = zipfile.ZipFile(file)
+            check_zipfile(self._zipf, limits)
+        except Exception:
+            self.close()
+            raise
+        self._names = {}  # rel path -> member name
+        self._dirs = set()
+        prefix = self._root_prefix() if strip_root else ""
+        for info in self._zipf.infolist():
+            parts = PurePosixPath(info.filename[len(prefix):]).parts
+            if not parts or parts[0] == '/' or '..' in parts:
+                continue
+            rel = "/".join(parts)
+            if info.is_dir():
+                self._dirs.add(rel)
+            else:
+                self._names[rel] = info.filename
+        self.base_path = Path(base_path, prefix).absolute()
+
+    def _root_prefix(self):
+        tops = {name.partition('/')[0] for name in self._zipf.namelist()}
+        if len(tops) == 1:
+            top = tops.pop()
+            if all(name.startswith(top + "/") for name in self._zipf.namelist()):
+                return top + "/"
+        return ""
+
+    def listing(self):
+        """Return `(rel_path, is_dir)` tuples for all members."""
+        return ([(rel, False) for rel in self._names]
+                + [(rel, True) for rel in self._dirs])
+
+    def open(self, rel_path, mode='r', encoding=None, errors=None, newline=None):
+        rel_path = PurePosixPath(rel_path).as_posix()
+        try:
+            name = self._names[rel_path]
+        except KeyError:
+            raise FileNotFoundError("No member '{}' in archive".format(rel_path)) from None
+        f = self._zipf.open(name)
+        if 'b' in mode:
+            return f
+        return io.TextIOWrapper(f, encoding=encoding, errors=errors, newline=newline)
+
+    def close(self):
+        if getattr(self, '_zipf', None) is not None:
+            self._zipf.close()
+        if self._mapped is not None:
+            self._mapped.close()
+
+
+class _MappedFile(io.RawIOBase):
+    """A read-only file object for a memory-mapped file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            # Empty files cannot be mapped
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._map[self._pos:self._pos + len(buffer)]
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._map)
+        if offset < 0:
+            raise OSError(errno.EINVAL, "Negative seek position {}".format(offset))
+        self._pos = offset
+        return offset
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        super().close()
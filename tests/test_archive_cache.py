@@ -0,0 +1,135 @@
+from collections import namedtuple
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+from st_package_reviewer import repo_tools
+from st_package_reviewer.archive_cache import ArchiveCache
+
+Commit = namedtuple("Commit", "sha")
+
+
+class FakeRepo:
+
+    def __init__(self, name, refs):
+        self.owner = "Owner"
+        self.name = name
+        self.refs = refs
+        self.downloads = []
+
+    def commit(self, ref):
+        sha = self.refs.get(ref)
+        return Commit(sha) if sha else None
+
+    def archive(self, format, path, ref):
+        self.downloads.append(ref)
+        folder = "owner-{}-{}".format(self.name, ref.replace("/", "-")[:7])
+        content = b"x = 1\n" * 1000
+        buf = io.BytesIO()
+        if format == 'zipball':
+            with zipfile.ZipFile(buf, 'w') as zipf:
+                zipf.writestr(folder + "/plugin.py", content)
+        else:
+            with tarfile.open(fileobj=buf, mode='w:gz') as tarf:
+                info = tarfile.TarInfo(folder + "/plugin.py")
+                info.size = len(content)
+                tarf.addfile(info, io.BytesIO(content))
+        path.write(buf.getvalue())
+        return True
+
+
+def test_download_is_cached_by_sha(tmp_path):
+    archive_cache = ArchiveCache(tmp_path / "cache")
+    repo = FakeRepo("pkg", {"tags/v1.0.0": "a" * 40, "heads/main": "a" * 40})
+
+    first = repo_tools.download(repo, "tags/v1.0.0", tmp_path, archive_cache)
+    assert (first / "plugin.py").is_file()
+    assert repo.downloads == ["a" * 40]
+
+    # Another ref pointing to the same commit reuses the tree
+    second = repo_tools.download(repo, "heads/main", tmp_path, archive_cache)
+    assert second == first
+    assert len(repo.downloads) == 1
+
+    # No archive is stored next to the extracted tree
+    assert archive_cache.get_archive("owner", "pkg", "a" * 40) is None
+
+
+def test_cached_zip_archive_is_extracted(tmp_path):
+    archive_cache = ArchiveCache(tmp_path / "cache")
+    repo = FakeRepo("pkg", {"heads/main": "a" * 40})
+    archive_cache.put_archive("owner", "pkg", "a" * 40,
+                              lambda f: repo.archive('zipball', f, "a" * 40))
+    path = repo_tools.download(repo, "heads/main", tmp_path, archive_cache)
+    assert (path / "plugin.py").is_file()
+    assert len(repo.downloads) == 1
+
+
+def test_unresolved_refs_are_not_cached(tmp_path):
+    archive_cache = ArchiveCache(tmp_path / "cache")
+    repo = FakeRepo("pkg", {})
+    path = repo_tools.download(repo, "heads/main", tmp_path / "tmp", archive_cache)
+    assert (path / "plugin.py").is_file()
+    assert tmp_path / "tmp" in path.parents
+    assert archive_cache.size() == 0
+
+
+def test_stream_without_top_level_folder(tmp_path):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w') as tarf:
+        for name in ("plugin.py", "sub/../../outside.py"):
+            info = tarfile.TarInfo(name)
+            tarf.addfile(info, io.BytesIO())
+    buf.seek(0)
+    assert repo_tools.extract_stream(buf, tmp_path / "tree")
+    assert repo_tools.package_path(tmp_path / "tree") == tmp_path / "tree"
+    assert (tmp_path / "tree" / "plugin.py").is_file()
+    assert not (tmp_path / "outside.py").exists()
+
+
+def test_eviction(tmp_path):
+    archive_cache = ArchiveCache(tmp_path / "cache")
+    repos = [FakeRepo("pkg{}".format(i), {"heads/main": str(i) * 40}) for i in range(3)]
+    for repo in repos:
+        archive_cache.release(repo_tools.download(repo, "heads/main", tmp_path, archive_cache))
+    entry_size = archive_cache.size() // 3
+
+    # Use pkg1 least recently and pkg0 most recently
+    now = time.time()
+    for i, age in enumerate((1000, 3000, 2000)):
+        path = archive_cache.tree_path("owner", "pkg%d" % i, str(i) * 40)
+        os.utime(path, (now - age, now - age))
+
+    archive_cache.evict(int(entry_size * 2.2))
+    assert not archive_cache.get_tree("owner", "pkg1", "1" * 40)
+    assert archive_cache.get_tree("owner", "pkg0", "0" * 40)
+    assert archive_cache.get_tree("owner", "pkg2", "2" * 40)
+
+
+def test_held_trees_are_not_evicted(tmp_path):
+    archive_cache = ArchiveCache(tmp_path / "cache", max_size=1, min_age=0)
+    repos = [FakeRepo("pkg{}".format(i), {"heads/main": str(i) * 40}) for i in range(2)]
+    first = repo_tools.download(repos[0], "heads/main", tmp_path, archive_cache)
+    # A tree larger than the cache is kept while it is held
+    assert (first / "plugin.py").is_file()
+    second = repo_tools.download(repos[1], "heads/main", tmp_path, archive_cache)
+    assert (first / "plugin.py").is_file()
+    assert (second / "plugin.py").is_file()
+
+    archive_cache.release(first)
+    archive_cache.evict()
+    assert not first.exists()
+    assert (second / "plugin.py").is_file()
+
+    archive_cache.release(second)
+    assert archive_cache.evict() == 0
+
+
+def test_recently_used_trees_are_not_evicted(tmp_path):
+    archive_cache = ArchiveCache(tmp_path / "cache", max_size=1)
+    repo = FakeRepo("pkg", {"heads/main": "a" * 40})
+    # Possibly still used by another process
+    archive_cache.release(repo_tools.download(repo, "heads/main", tmp_path, archive_cache))
+    assert archive_cache.evict() > 0
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from st_package_reviewer import cache
+from st_package_reviewer.check import file as file_c
+from st_package_reviewer.check.file.check_keymaps import CheckKeymaps
+from st_package_reviewer.file_index import FileIndex
+from st_package_reviewer.lib import jsonc
+from st_package_reviewer.runner import CheckRunner
+
+from .test_file_checkers import test_packages
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    cache.configure(tmp_path)
+    yield cache.get_cache()
+    cache.configure(None)
+
+
+def _run(package_path):
+    runner = CheckRunner(sorted(file_c.get_checkers(), key=lambda c: c.__name__))
+    runner.run(package_path)
+    return ({(r.message, r.details) for r in runner.failures},
+            {(r.message, r.details) for r in runner.warnings})
+
+
+def test_cached_results_are_replayed(result_cache, monkeypatch):
+    uncached = [_run(package_path) for package_path in test_packages]
+    assert result_cache.size() > 0
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file should not be parsed again")
+
+    # Cached results must not depend on in-memory caches
+    file_c.FileChecker._get_index.cache_clear()
+    monkeypatch.setattr(jsonc, 'loads', fail)
+    cached = [_run(package_path) for package_path in test_packages]
+    assert cached == uncached
+
+
+def test_cached_results_depend_on_file_name(result_cache, tmp_path):
+    package_path = tmp_path / "Package"
+    package_path.mkdir()
+    keymap = '[{"keys": ["ctrl+shift+n"], "command": "foo"}]'
+    for platform in ("OSX", "Windows"):
+        (package_path / "Default ({}).sublime-keymap".format(platform)).write_text(keymap)
+
+    checker = CheckKeymaps(package_path)
+    checker.check()
+    # Only the Windows keymap conflicts with the default bindings
+    assert [report.details for report in checker.failures] == [
+        ("File: Default (Windows).sublime-keymap",)]
+
+
+def test_disk_cache_eviction(tmp_path):
+    disk_cache = cache.DiskCache(tmp_path, max_size=10_000)
+    for i in range(20):
+        assert disk_cache.put(cache.make_key(str(i)), b"x" * 1000)
+    assert disk_cache.size() <= 10_000
+    hits = [disk_cache.get(cache.make_key(str(i))) for i in range(20)]
+    assert 0 < sum(hit is not None for hit in hits) < 20
+
+
+def test_python_files_are_parsed_concurrently(tmp_path, monkeypatch):
+    for name in ("a.py", "b.py"):
+        (tmp_path / name).write_text("x = 1\n")
+    index = FileIndex(tmp_path)
+    barrier = threading.Barrier(2, timeout=5)
+    open_ = index.open
+
+    def wait_and_open(path, *args, **kwargs):
+        # Both files are parsed at the same time, or this times out
+        barrier.wait()
+        return open_(path, *args, **kwargs)
+
+    monkeypatch.setattr(index, 'open', wait_and_open)
+    threads = [threading.Thread(target=index.resources.get, args=(name, 'python'))
+               for name in ("a.py", "b.py")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not barrier.broken
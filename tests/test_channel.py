@@ -0,0 +1,84 @@
+import io
+import json
+
+from st_package_reviewer import channel
+
+
+def test_json_stream_small_chunks():
+    data = {'a': [1, 22222, {'x': "y\\\"z"}, [], True], 'b': 3.5, 'c': {}}
+    stream = channel._JsonStream(io.StringIO(json.dumps(data)), chunk_size=3)
+    result = {}
+    for key in stream.iter_object():
+        if key == 'a':
+            result[key] = []
+            for _ in stream.iter_array():
+                result[key].append(stream.value())
+        else:
+            result[key] = stream.value()
+    assert result == data
+
+
+def test_json_stream_split_characters():
+    data = ["Pakét", "日本語", "\U0001F600"]
+    for chunk_size in range(1, 5):
+        stream = channel._JsonStream(io.BytesIO(json.dumps(data, ensure_ascii=False).encode()),
+                                     chunk_size=chunk_size)
+        assert [stream.value() for _ in stream.iter_array()] == data
+
+
+def test_select_release():
+    releases = [
+        {'sublime_text': "<3000", 'branch': "st2"},
+        {'sublime_text': "3000 - 3999", 'tags': True},
+        {'sublime_text': ">=4000", 'tags': "st4-"},
+    ]
+    assert channel.select_release(releases, 2221) is releases[0]
+    assert channel.select_release(releases, 3211) is releases[1]
+    assert channel.select_release(releases, 4199) is releases[2]
+    assert channel.select_release(releases[:2], 4199) is None
+    assert channel.select_release([{'tags': True}], 4199) == {'tags': True}
+
+
+def test_select_release_platforms():
+    releases = [
+        {'platforms': ["windows-x64", "linux"], 'tags': "a-"},
+        {'platforms': "osx", 'tags': "b-"},
+        {'tags': True},
+    ]
+    assert channel.select_release(releases, 4199, "windows-x64") is releases[0]
+    assert channel.select_release(releases, 4199, "windows-x32") is releases[2]
+    assert channel.select_release(releases, 4199, "linux-arm64") is releases[0]
+    assert channel.select_release(releases, 4199, "osx-arm64") is releases[1]
+    assert channel.select_release(releases[:2], 4199, "windows-arm64") is None
+
+
+def test_iter_packages(tmp_path):
+    repository = {
+        'schema_version': "3.0.0",
+        'packages': [
+            {'name': "A", 'details': "https://github.com/owner/a",
+             'releases': [{'sublime_text': "*", 'tags': True}]},
+            {'details': "https://gitlab.com/owner/b",
+             'releases': [{'sublime_text': "*", 'tags': True}]},
+        ],
+    }
+    channel_data = {
+        'schema_version': "3.0.0",
+        'repositories': ["repository.json", "https://example.com/cached.json"],
+        'packages_cache': {
+            "https://example.com/cached.json": [
+                {'name': "C", 'details': "https://github.com/owner/c",
+                 'releases': [{'sublime_text': "*", 'version': "1.0.0",
+                               'url': "https://codeload.github.com/owner/c/zip/v1.0.0"}]},
+            ],
+        },
+    }
+    (tmp_path / "repository.json").write_text(json.dumps(repository))
+    (tmp_path / "channel.json").write_text(json.dumps(channel_data))
+
+    entries = list(channel.iter_packages(tmp_path / "channel.json", build=4199))
+    assert [(e.name, e.owner, e.repo) for e in entries] == [
+        ("C", "owner", "c"),
+        ("A", "owner", "a"),
+        ("https://gitlab.com/owner/b", None, None),
+    ]
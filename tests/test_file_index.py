@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+
+from st_package_reviewer.file_index import FileIndex
+
+
+packages_path = Path(__file__).with_name("packages")
+
+patterns = [
+    "*.py",
+    "**/*.py",
+    "*/**/*.py",
+    "**/*.sublime-keymap",
+    "**/*.tmLanguage",
+    "**/*.hidden-tmLanguage",
+    "**/Default*.sublime-*",
+    "LICENSE",
+]
+
+
+@pytest.mark.parametrize('pattern', patterns)
+def test_glob_matches_pathlib(pattern):
+    index = FileIndex(packages_path)
+    assert index.glob(pattern) == sorted(packages_path.glob(pattern))
+
+
+def test_file_queries():
+    index = FileIndex(packages_path)
+    base = packages_path.absolute()
+
+    assert index.is_file("ValidMessagesJSON/messages.json")
+    assert index.is_file(base / "ValidMessagesJSON" / "messages.json")
+    assert not index.is_file("ValidMessagesJSON/messages")
+    assert index.is_dir("ValidMessagesJSON/messages")
+    assert index.is_dir("")
+    assert not index.exists("ValidMessagesJSON/does-not-exist")
+    assert index.is_file("ValidMessagesJSON/../License/plugin.py")
+
+    assert (index.iterdir("ValidMessagesJSON")
+            == sorted((base / "ValidMessagesJSON").iterdir()))
+    assert (index.stat("License/plugin.py").st_size
+            == (base / "License" / "plugin.py").stat().st_size)
+
+
+def _listing(path):
+    return [(p.relative_to(path).as_posix(), p.is_dir()) for p in path.rglob("*")]
+
+
+@pytest.mark.parametrize('pattern', patterns)
+def test_listing_matches_walk(pattern):
+    walked = FileIndex(packages_path)
+    listed = FileIndex(packages_path, _listing(packages_path))
+    assert listed.glob(pattern) == walked.glob(pattern)
+    assert listed.iterdir("ValidMessagesJSON") == walked.iterdir("ValidMessagesJSON")
+
+
+def test_names_only_checkers_on_listing(tmp_path):
+    from st_package_reviewer.check.file import get_names_only_checkers
+    from st_package_reviewer.runner import CheckRunner
+
+    package_path = packages_path / "NoResourceFiles"
+    reports = []
+    for base_path, index in ((package_path, None),
+                             (tmp_path / "tree", FileIndex(tmp_path / "tree",
+                                                           _listing(package_path)))):
+        runner = CheckRunner(get_names_only_checkers())
+        runner.run(base_path, index=index)
+        reports.append([(r.message, r.context) for r in runner.failures + runner.warnings])
+    assert reports[0] == reports[1]
+    assert reports[0]
@@ -0,0 +1,83 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+import pytest
+import requests
+
+from st_package_reviewer.github_replay import FixtureStore, RecordServer, ReplayServer
+
+ARCHIVE = bytes(range(256)) * 16
+
+
+class _UpstreamHandler(BaseHTTPRequestHandler):
+    """Answers like the GitHub API for a single repository."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        base = "http://{}:{}".format(*self.server.server_address)
+        if self.path == "/repos/o/r":
+            self._send(200, json.dumps({'url': base + "/repos/o/r"}).encode(), "application/json")
+        elif self.path == "/repos/o/r/tarball/main":
+            self.send_response(302)
+            self.send_header('Location', base + "/codeload/o/r")
+            self.send_header('Content-Length', "0")
+            self.end_headers()
+        elif self.path == "/codeload/o/r":
+            self._send(200, ARCHIVE, "application/x-gzip")
+        else:
+            self._send(404, b'{"message": "Not Found"}', "application/json")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _UpstreamHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield "http://{}:{}".format(*server.server_address)
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def recorded(upstream, tmp_path):
+    with RecordServer(tmp_path, upstream=upstream).start() as server:
+        assert requests.get(server.url + "/repos/o/r").json() == {'url': server.url + "/repos/o/r"}
+        assert requests.get(server.url + "/repos/o/r/tarball/main").content == ARCHIVE
+        assert requests.get(server.url + "/repos/o/missing").status_code == 404
+        server.shutdown()
+    return FixtureStore(tmp_path)
+
+
+def test_replay(recorded):
+    assert recorded.repositories() == ["o/missing", "o/r"]
+    with ReplayServer(recorded).start() as server:
+        assert requests.get(server.url + "/repos/o/r").json() == {'url': server.url + "/repos/o/r"}
+        response = requests.get(server.url + "/repos/o/r/tarball/main")
+        assert response.status_code == 200
+        assert response.content == ARCHIVE
+        assert requests.get(server.url + "/repos/o/missing").status_code == 404
+        assert requests.get(server.url + "/repos/o/unrecorded").status_code == 404
+        assert server.requests == 4
+        server.shutdown()
+
+
+def test_replay_rate_limit(recorded):
+    with ReplayServer(recorded, rate_limit=2).start() as server:
+        remaining = [requests.get(server.url + "/repos/o/r").headers['X-RateLimit-Remaining']
+                     for _ in range(2)]
+        assert remaining == ["1", "0"]
+        response = requests.get(server.url + "/repos/o/r")
+        assert response.status_code == 403
+        assert response.json()['message'] == "API rate limit exceeded"
+        server.shutdown()
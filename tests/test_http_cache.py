@@ -0,0 +1,90 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+
+import pytest
+import requests
+
+from st_package_reviewer.cache import DiskCache
+from st_package_reviewer.http_cache import CachingAdapter
+
+
+class ETagServer(BaseHTTPRequestHandler):
+
+    requests = []
+    body = b'[{"name": "v1.0.0"}]'
+    etag = '"abc"'
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        remaining = str(100 - len(self.requests))
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('X-RateLimit-Remaining', remaining)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', "application/json")
+        self.send_header('Content-Length', str(len(self.body)))
+        self.send_header('ETag', self.etag)
+        self.send_header('X-RateLimit-Remaining', remaining)
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ETagServer)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    ETagServer.requests = []
+    yield "http://127.0.0.1:{}/repos/owner/repo/tags".format(server.server_port)
+    server.shutdown()
+    server.server_close()
+
+
+def _session(disk_cache):
+    session = requests.Session()
+    session.mount("http://", CachingAdapter(disk_cache))
+    return session
+
+
+def test_not_modified_is_served_from_disk(server, tmp_path):
+    disk_cache = DiskCache(tmp_path)
+    first = _session(disk_cache).get(server)
+    assert first.json() == [{'name': "v1.0.0"}]
+    assert not getattr(first, 'from_cache', False)
+
+    # A new session, as in a later run
+    second = _session(disk_cache).get(server)
+    assert second.status_code == 200
+    assert second.from_cache
+    assert second.json() == json.loads(ETagServer.body)
+    assert second.headers['X-RateLimit-Remaining'] == "98"
+    assert ETagServer.requests[1]['If-None-Match'] == ETagServer.etag
+
+    # Streamed responses bypass the cache
+    with _session(disk_cache).get(server, stream=True) as streamed:
+        assert 'If-None-Match' not in ETagServer.requests[2]
+        assert streamed.content == ETagServer.body
+
+
+def test_expired_entries(tmp_path):
+    disk_cache = DiskCache(tmp_path, max_age=60)
+    disk_cache.put("a" * 64, 1)
+    disk_cache.put("b" * 64, 2)
+    assert disk_cache.get("a" * 64) == 1
+
+    entry_path = disk_cache._entry_path("b" * 64)
+    old = time.time() - 120
+    os.utime(entry_path, (old, old))
+    assert disk_cache.get("b" * 64) is None
+
+    disk_cache.evict()
+    assert not entry_path.exists()
+    assert disk_cache.get("a" * 64) == 1
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from st_package_reviewer.lib import jsonc
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"a": 1, // comment\n}', {'a': 1}),
+    ('[1, 2, /* comment */ ]', [1, 2]),
+    ('[1,\n  // a\n  /* b\n  */\n]', [1]),
+    ('{"a": [1,],}', {'a': [1]}),
+    ('[1 /* , */ ]', [1]),
+    ('{"url": "http://example.com//path/*", }', {'url': "http://example.com//path/*"}),
+    ('["\\"//", "a,]"]', ['"//', "a,]"]),
+])
+def test_loads(text, expected):
+    assert jsonc.loads(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    '[1, 2 /* unterminated',
+    '["unterminated, // ]',
+    '[1, /**/, ]',
+    '[1 / 2]',
+])
+def test_invalid(text):
+    with pytest.raises(json.JSONDecodeError):
+        jsonc.loads(text)
+
+
+def test_error_position():
+    text = ('{\n'
+            '    /* A comment\n'
+            '       over lines */ "a": 1, // and another one\n'
+            '    "b": [1, 2,],\n'
+            '    "c": tru,\n'
+            '}\n')
+    with pytest.raises(json.JSONDecodeError) as exc_info:
+        jsonc.loads(text)
+    e = exc_info.value
+    assert (e.lineno, e.colno) == (5, 10)
+    assert e.doc == text
@@ -0,0 +1,75 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from st_package_reviewer import limits, repo_tools
+from st_package_reviewer.archive_cache import ArchiveCache
+from st_package_reviewer.limits import ArchiveLimits, LimitExceeded, MiB
+from st_package_reviewer.vfs import ZipFS
+
+from .test_archive_cache import FakeRepo
+
+
+@pytest.fixture
+def small_limits(monkeypatch):
+    monkeypatch.setattr(limits, '_limits', ArchiveLimits(max_members=10, max_size=4 * MiB,
+                                                         max_file_size=2 * MiB, max_ratio=100))
+
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for name, data in members:
+            zipf.writestr(name, data)
+    return buf
+
+
+def _tar(members):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w:gz') as tarf:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tarf.addfile(info, io.BytesIO(data))
+    buf.seek(0)
+    return buf
+
+
+@pytest.mark.parametrize('members, message', [
+    ([("f{}.py".format(i), b"") for i in range(11)], "more than 10 files"),
+    ([("big.bin", b"\0" * (3 * MiB))], "'big.bin' is larger than 2 MiB"),
+    ([(name, os.urandom(MiB)) for name in "abcde"], "contents of the archive are larger"),
+    ([("bomb.bin", b"\0" * (2 * MiB))], "'bomb.bin' is compressed by a ratio"),
+], ids=["members", "file size", "total size", "ratio"])
+def test_zip_limits(small_limits, members, message):
+    with pytest.raises(LimitExceeded, match=message):
+        ZipFS(_zip(members))
+
+
+def test_small_files_may_compress_well(small_limits):
+    fs = ZipFS(_zip([("empty.json", b" " * (MiB - 1))]), "package.zip")
+    assert fs.listing() == [("empty.json", False)]
+    fs.close()
+
+
+@pytest.mark.parametrize('members, message', [
+    ([("big.bin", b"\0" * (3 * MiB))], "'big.bin' is larger than 2 MiB"),
+    ([("a.bin", b"\0" * (2 * MiB)), ("b.bin", b"")], "The archive is compressed by a ratio"),
+], ids=["file size", "ratio"])
+def test_tar_stream_limits(small_limits, tmp_path, members, message):
+    with pytest.raises(LimitExceeded, match=message):
+        repo_tools.extract_stream(_tar(members), tmp_path / "tree")
+    # Members are checked before they are extracted
+    assert not (tmp_path / "tree" / "big.bin").exists()
+
+
+def test_exceeding_download_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(limits, '_limits', limits.DEFAULT_LIMITS._replace(max_file_size=1000))
+    repo = FakeRepo("repo", {"heads/master": "1" * 40})
+    archive_cache = ArchiveCache(tmp_path / "cache")
+    with pytest.raises(LimitExceeded):
+        repo_tools.download(repo, "heads/master", tmp_path / "work", archive_cache)
+    assert archive_cache.get_tree("Owner", "repo", "1" * 40) is None
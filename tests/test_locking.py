@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from st_package_reviewer.locking import locked_cache
+
+
+def test_concurrent_calls_compute_once():
+    calls = []
+    barrier = threading.Barrier(4)
+
+    @locked_cache()
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    def worker():
+        barrier.wait()
+        assert square(3) == 9
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [3]
+
+
+def test_exceptions_are_not_cached():
+    calls = []
+
+    @locked_cache()
+    def fail(x):
+        calls.append(x)
+        raise ValueError(x)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            fail(1)
+    assert calls == [1, 1]
+    # The lock of the failed key is dropped
+    closure = dict(zip(fail.__code__.co_freevars, fail.__closure__))
+    assert closure['key_locks'].cell_contents == {}
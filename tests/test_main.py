@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+import zipfile
+
+from st_package_reviewer.__main__ import main
+from st_package_reviewer.check.file import FileChecker
+
+PACKAGES = Path(__file__).parent / "packages"
+
+
+def _review(capsys, *args):
+    exit_code = main(["--format", "jsonl", *args])
+    return exit_code, capsys.readouterr().out
+
+
+def test_jobs_match_sequential(tmp_path, capsys):
+    packages = [str(PACKAGES / name)
+                for name in ("InvalidJSONCFile", "CommandCasing", "Keymaps", "InvalidPlistFile")]
+    expected = _review(capsys, "--no-cache", "--jobs", "1", *packages)
+    assert [json.loads(line)['name'] for line in expected[1].splitlines()] == [
+        "InvalidJSONCFile", "CommandCasing", "Keymaps", "InvalidPlistFile"]
+
+    cache_dir = tmp_path / "cache"
+    assert _review(capsys, "--cache-dir", str(cache_dir), "--jobs", "2", *packages) == expected
+    # The workers were configured with the cache folder of the main process
+    assert any(path.is_file() for path in cache_dir.rglob("*"))
+
+
+def test_jobs_pass_results_through(tmp_path, capsys):
+    # Packages that are not hosted on GitHub are skipped without a review
+    repository = {
+        'schema_version': "3.0.0",
+        'packages': [
+            {'name': name, 'details': "https://gitlab.com/owner/" + name,
+             'releases': [{'sublime_text': "*", 'tags': True}]}
+            for name in "ABCDE"
+        ],
+    }
+    (tmp_path / "repository.json").write_text(json.dumps(repository))
+
+    args = ["--no-cache", "--from-channel", str(tmp_path / "repository.json")]
+    expected = _review(capsys, *args, "--jobs", "1")
+    assert [json.loads(line)['name'] for line in expected[1].splitlines()] == list("ABCDE")
+    assert _review(capsys, *args, "--jobs", "2") == expected
+
+
+def test_archive_limit_is_reported(tmp_path, capsys):
+    archive = tmp_path / "Bomb.sublime-package"
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr("a.txt", b"\0" * (2 * 1024 ** 2))
+    exit_code, out = _review(capsys, "--no-cache", "--max-file-size", "1", str(archive))
+    assert exit_code == 1
+    report = json.loads(out)
+    assert report['sections'] == []
+    assert [error.split(":")[0] for error in report['errors']] == [
+        "Package archive exceeds a limit"]
+
+
+def test_index_is_not_kept(capsys, monkeypatch):
+    def fail(base_path):
+        raise AssertionError("the index of a review must not outlive it")
+
+    # Indexes in this cache, and their parsed documents, stay in memory after a review
+    monkeypatch.setattr(FileChecker, '_get_index', staticmethod(fail))
+    exit_code, out = _review(capsys, "--no-cache", str(PACKAGES / "Keymaps"))
+    assert "Unhandled exception" not in out
+    assert json.loads(out)['name'] == "Keymaps"
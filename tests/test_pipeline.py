@@ -0,0 +1,90 @@
+import random
+import threading
+import time
+
+import pytest
+
+from st_package_reviewer.pipeline import Pipeline, Stage
+
+
+def _sleep_randomly(item):
+    time.sleep(random.random() / 100)
+    return item
+
+
+def test_results_keep_input_order():
+    pipeline = Pipeline([
+        Stage("slow", _sleep_randomly, 4),
+        Stage("double", lambda item: item * 2, 1),
+    ])
+    assert list(pipeline.run(range(50))) == [i * 2 for i in range(50)]
+
+
+def test_queues_are_bounded():
+    started = []
+    release = threading.Event()
+
+    def block(item):
+        started.append(item)
+        release.wait()
+        return item
+
+    consumed = []
+
+    def items():
+        for i in range(20):
+            consumed.append(i)
+            yield i
+
+    results = Pipeline([Stage("pass", lambda item: item, 1), Stage("block", block, 1)]).run(items())
+    thread = threading.Thread(target=lambda: list(results))
+    thread.start()
+    time.sleep(0.1)
+    # One item per worker and per queue slot of each stage
+    assert len(consumed) <= 5
+    release.set()
+    thread.join()
+
+
+def test_exceptions_are_raised_in_order():
+    def fail(item):
+        if item == 3:
+            raise ValueError(item)
+        return item
+
+    results = Pipeline([Stage("fail", fail, 2)]).run(range(10))
+    assert [next(results) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(ValueError):
+        next(results)
+
+
+def test_remaining_items_are_discarded():
+    def fail(item):
+        if item == 3:
+            raise ValueError(item)
+        return item
+
+    consumed = []
+
+    def items():
+        for i in range(20):
+            consumed.append(i)
+            yield i
+
+    discarded = []
+    pipeline = Pipeline([Stage("fail", fail, 2), Stage("pass", _sleep_randomly, 1)],
+                        discard=discarded.append)
+    results = pipeline.run(items())
+    assert [next(results) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(ValueError):
+        next(results)
+    # Every item that entered the pipeline was yielded, failed or discarded
+    assert sorted(discarded) == consumed[4:]
+
+    consumed.clear()
+    discarded.clear()
+    pipeline = Pipeline([Stage("pass", _sleep_randomly, 2)], discard=discarded.append)
+    results = pipeline.run(items())
+    assert next(results) == 0
+    results.close()
+    assert sorted(discarded) == consumed[1:]
@@ -0,0 +1,104 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+import pytest
+import requests
+
+from st_package_reviewer.ratelimit import (HIGH, LOW, RateLimitedAdapter, RateLimiter,
+                                           RateLimitExceeded)
+
+
+def _headers(remaining, reset, limit=100):
+    return {'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset': str(reset)}
+
+
+def test_unknown_limit_does_not_block():
+    limiter = RateLimiter()
+    assert limiter.acquire()
+
+
+def test_exhausted_limit_waits_for_reset():
+    limiter = RateLimiter()
+    reset = time.time() + 0.2
+    limiter.update(_headers(0, reset))
+    assert limiter.acquire(priority=HIGH)
+    assert time.time() >= reset
+
+
+def test_low_priority_leaves_reserve():
+    limiter = RateLimiter()
+    limiter.update(_headers(5, time.time() + 600))
+    assert limiter.acquire(priority=HIGH)
+
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: limiter.acquire(priority=LOW) and acquired.set(),
+                              daemon=True)
+    thread.start()
+    assert not acquired.wait(0.1)
+    limiter.update(_headers(50, time.time() + 600))
+    assert acquired.wait(1)
+
+
+def test_share_splits_budget():
+    limiter = RateLimiter(share=0.25)
+    limiter.update(_headers(2, time.time() + 600, limit=0))
+    # 2 * 0.25 < 1
+    thread = threading.Thread(target=limiter.acquire, daemon=True)
+    thread.start()
+    thread.join(0.1)
+    assert thread.is_alive()
+    limiter.update(_headers(8, time.time() + 600, limit=0))
+    thread.join(1)
+    assert not thread.is_alive()
+
+
+class SecondaryLimitServer(BaseHTTPRequestHandler):
+
+    count = 0
+
+    def do_GET(self):
+        type(self).count += 1
+        if self.count == 1:
+            self.send_response(429)
+            self.send_header('Retry-After', "0.1")
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SecondaryLimitServer)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    SecondaryLimitServer.count = 0
+    yield "http://127.0.0.1:{}/repos/owner/repo".format(server.server_port)
+    server.shutdown()
+    server.server_close()
+
+
+def test_secondary_limit_is_retried(server):
+    session = requests.Session()
+    session.mount("http://", RateLimitedAdapter(RateLimiter()))
+    start = time.time()
+    response = session.get(server)
+    assert response.status_code == 200
+    assert SecondaryLimitServer.count == 2
+    assert time.time() - start >= 0.1
+
+
+def test_long_wait_is_not_sent(server):
+    limiter = RateLimiter()
+    limiter.update(_headers(0, time.time() + 3600))
+    session = requests.Session()
+    session.mount("http://", RateLimitedAdapter(limiter))
+    with pytest.raises(RateLimitExceeded):
+        session.get(server)
+    assert SecondaryLimitServer.count == 0
@@ -0,0 +1,39 @@
+from pathlib import Path
+import subprocess
+import sys
+
+from st_package_reviewer.check import registry
+from st_package_reviewer.check import file as file_c, repo as repo_c
+from st_package_reviewer.check.file import ast as ast_c
+
+
+def test_registry_up_to_date():
+    # Run `python -m st_package_reviewer.check.registry` if this fails
+    assert registry.REGISTRY_PATH.read_text(encoding='utf-8') == registry.render()
+
+
+def test_get_checkers_matches_discovery():
+    for package in (file_c, ast_c, repo_c):
+        checkers = [checker.load() for checker in package.get_checkers()]
+        assert len(checkers) == len(set(checkers))
+        assert set(checkers) == package.find_checkers()
+        for checker, lazy in zip(checkers, package.get_checkers()):
+            assert lazy.__name__ == checker.__name__
+            if hasattr(checker, 'names_only'):
+                assert lazy.names_only == checker.names_only
+
+
+def test_modules_are_imported_when_checkers_run():
+    script = (
+        "import sys\n"
+        "from st_package_reviewer.check import file as file_c\n"
+        "from st_package_reviewer.runner import CheckRunner\n"
+        "checkers = file_c.get_checkers()\n"
+        "assert 'st_package_reviewer.check.file.check_keymaps' not in sys.modules\n"
+        "CheckRunner(file_c.get_names_only_checkers()).run(sys.argv[1])\n"
+        "assert 'st_package_reviewer.check.file.check_keymaps' not in sys.modules\n"
+        "CheckRunner(checkers).run(sys.argv[1])\n"
+        "assert 'st_package_reviewer.check.file.check_keymaps' in sys.modules\n"
+    )
+    package_path = Path(__file__).parent / "packages" / "Keymaps"
+    subprocess.run([sys.executable, "-c", script, str(package_path)], check=True)
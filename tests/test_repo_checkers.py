@@ -0,0 +1,53 @@
+from collections import namedtuple
+import threading
+import time
+
+from st_package_reviewer.check import repo as repo_c
+from st_package_reviewer.runner import CheckRunner
+
+Tag = namedtuple("Tag", "name")
+
+DELAY = 0.2
+
+
+class FakeRepo:
+    """Answers like a github3 repository after a network delay."""
+
+    def __init__(self, tags, readme=True):
+        self._tags = [Tag(name) for name in tags]
+        self._readme = readme
+        self.threads = set()
+
+    def _request(self):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(DELAY)
+
+    def readme(self):
+        self._request()
+        return "README" if self._readme else None
+
+    def tags(self):
+        self._request()
+        return iter(self._tags)
+
+
+def test_checks_run_concurrently():
+    repo = FakeRepo(["v1.0.0", "2.0.0-beta"], readme=False)
+    runner = CheckRunner(repo_c.get_checkers())
+
+    start = time.perf_counter()
+    runner.run(repo)
+    elapsed = time.perf_counter() - start
+
+    # The readme and tags requests overlap
+    assert elapsed < 2 * DELAY
+    assert len(repo.threads) == 2
+    assert [report.message for report in runner.failures] == ["Missing a README file"]
+    assert not runner.warnings
+
+
+def test_prerelease_tags():
+    runner = CheckRunner(repo_c.get_checkers())
+    runner.run(FakeRepo(["1.0.0-beta", "v2.0"]))
+    assert [report.checker for report in runner.warnings] == ["CheckOnlyPrereleaseTags"]
+    assert not runner.failures
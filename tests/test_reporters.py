@@ -0,0 +1,56 @@
+import io
+import json
+from pathlib import Path
+
+from st_package_reviewer import reporters
+from st_package_reviewer.check import file as file_c
+from st_package_reviewer.runner import CheckRunner
+
+PACKAGES = Path(__file__).parent / "packages"
+
+
+def _review(reporter, name):
+    out = io.StringIO()
+    runner = CheckRunner(file_c.get_checkers())
+    runner.run(PACKAGES / name)
+    reporter.begin_package(out, name, str(PACKAGES / name))
+    reporter.heading(out, "Package checks")
+    runner.report(file=out, reporter=reporter, title="package")
+    reporter.end_package(out, 0 if runner.result() else 1)
+    return out.getvalue()
+
+
+def _render(format_, names):
+    out = io.StringIO()
+    reporter = reporters.get_reporter(format_)
+    reporter.start(out)
+    for name in names:
+        reporter.write(out, _review(reporters.get_reporter(format_), name))
+    reporter.finish(out)
+    return out.getvalue()
+
+
+def test_jsonl():
+    lines = _render('jsonl', ["InvalidJSONCFile", "CommandCasing"]).splitlines()
+    packages = [json.loads(line) for line in lines]
+    assert [package['name'] for package in packages] == ["InvalidJSONCFile", "CommandCasing"]
+    assert packages[0]['exit_code'] == 1
+    failures = packages[0]['sections'][0]['failures']
+    assert {failure['checker'] for failure in failures} == {"CheckJsoncFiles"}
+
+
+def test_sarif():
+    log = json.loads(_render('sarif', ["InvalidJSONCFile", "CommandCasing", "InvalidPlistFile"]))
+    results = log['runs'][0]['results']
+    assert log['version'] == "2.1.0"
+    assert {result['properties']['package'] for result in results} >= {"InvalidJSONCFile",
+                                                                       "InvalidPlistFile"}
+    jsonc = [result for result in results if result['ruleId'] == "CheckJsoncFiles"]
+    assert jsonc and jsonc[0]['level'] == 'error'
+    location = jsonc[0]['locations'][0]['physicalLocation']
+    assert location['artifactLocation']['uri'].endswith(".sublime-settings")
+
+
+def test_sarif_empty():
+    log = json.loads(_render('sarif', []))
+    assert log['runs'][0]['results'] == []
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from st_package_reviewer import resources
+from st_package_reviewer.check.file.check_keymaps import CheckKeymaps
+from st_package_reviewer.check.file.check_resource_file_validity import CheckJsoncFiles
+from st_package_reviewer.file_index import FileIndex
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Count the files parsed as 'jsonc'."""
+    paths = []
+    mode, parse, errors = resources._KINDS['jsonc']
+
+    def counting_parse(f, path):
+        paths.append(path)
+        return parse(f, path)
+
+    monkeypatch.setitem(resources._KINDS, 'jsonc', (mode, counting_parse, errors))
+    return paths
+
+
+def test_parsed_once_per_index(tmp_path, parses):
+    (tmp_path / "Default.sublime-keymap").write_text(
+        '[{"keys": ["shift+ctrl+f13"], "command": "cmd"},] // comment')
+    index = FileIndex(tmp_path)
+    for checker_class in (CheckJsoncFiles, CheckKeymaps, CheckJsoncFiles):
+        checker = checker_class(tmp_path, index)
+        checker.check()
+        assert not checker.failures
+    assert len(parses) == 1
+
+    # Normalizing the keys does not modify the shared document
+    doc = index.resources.get("Default.sublime-keymap", 'jsonc')
+    assert doc == resources.Document([{"keys": ["shift+ctrl+f13"], "command": "cmd"}], None)
+
+
+def test_error_reported_by_each_checker(tmp_path, parses):
+    (tmp_path / "Default.sublime-keymap").write_text('[{"keys": }]')
+    index = FileIndex(tmp_path)
+    reports = []
+    for checker_class in (CheckJsoncFiles, CheckKeymaps):
+        checker = checker_class(tmp_path, index)
+        checker.check()
+        [report] = checker.failures
+        assert isinstance(report.exception, json.JSONDecodeError)
+        assert report.exc_info is None
+        reports.append(report.message)
+    assert reports == ["Invalid JSON (with comments)", "Unable to parse key bindings"]
+    assert len(parses) == 1
+
+
+@pytest.mark.parametrize('kind, content', [
+    ('plist', b'<plist><dict><key>a</key></plist>'),
+    ('xml', b'<snippet>'),
+    ('json', b'{"a": 1,}'),
+])
+def test_invalid(tmp_path, kind, content):
+    (tmp_path / "file").write_bytes(content)
+    doc = resources.ResourceStore(FileIndex(tmp_path)).get("file", kind)
+    assert doc.data is None
+    assert doc.error is not None
@@ -0,0 +1,34 @@
+from st_package_reviewer import profiling
+from st_package_reviewer.runner import CheckRunner
+from st_package_reviewer.check import file as file_c
+from st_package_reviewer.check.file import ast as ast_c
+
+from .test_file_checkers import test_packages
+
+
+def _run(package_path, threads):
+    runner = CheckRunner(sorted(file_c.get_checkers(), key=lambda c: c.__name__),
+                         threads=threads)
+    runner.run(package_path)
+    return ([(r.message, r.details) for r in runner.failures],
+            [(r.message, r.details) for r in runner.warnings])
+
+
+def test_concurrent_run_is_deterministic():
+    for package_path in test_packages:
+        assert _run(package_path, threads=8) == _run(package_path, threads=1), package_path.name
+
+
+def test_profile_records_each_checker(monkeypatch):
+    package_path = next(path for path in test_packages if path.name == "PlatformDependentCode")
+    checkers = sorted(file_c.get_checkers(), key=lambda c: c.__name__)
+    monkeypatch.setattr(profiling, '_enabled', True)
+    with profiling.scope("test"):
+        CheckRunner(checkers).run(package_path)
+    records = profiling.take_records("test")
+
+    names = [record.name for record in records if record.category == "checker"]
+    assert sorted(names) == [checker.__name__ for checker in checkers]
+    assert [record.name for record in records if record.category == "batch"] == ["AstChecker"]
+    ast_names = {checker.__name__ for checker in ast_c.get_checkers()}
+    assert ast_names <= set(names)
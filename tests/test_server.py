@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+import socket
+import stat
+import sys
+import threading
+import time
+
+import pytest
+
+from st_package_reviewer.__main__ import main
+
+PACKAGES = Path(__file__).parent / "packages"
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="requires Unix sockets")
+
+
+def _connect(path, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        sock = socket.socket(socket.AF_UNIX)
+        try:
+            sock.connect(str(path))
+            return sock
+        except OSError:
+            sock.close()
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def test_serve(tmp_path):
+    socket_path = tmp_path / "review.sock"
+    thread = threading.Thread(target=main, args=(["--serve", str(socket_path), "--no-cache"],),
+                              daemon=True)
+    thread.start()
+
+    with _connect(socket_path) as sock, sock.makefile('rwb') as f:
+        assert stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+
+        def request(**data):
+            f.write(json.dumps(data).encode() + b"\n")
+            f.flush()
+            return json.loads(f.readline())
+
+        response = request(target=str(PACKAGES / "InvalidJSONCFile"))
+        assert response['exit_code'] == 1
+        assert response['report']['name'] == "InvalidJSONCFile"
+        failures = response['report']['sections'][0]['failures']
+        assert [failure['checker'] for failure in failures] == ["CheckJsoncFiles"]
+
+        response = request(target=str(PACKAGES / "CommandCasing"), format="markdown")
+        assert response['exit_code'] == 0
+        assert "## Report for CommandCasing" in response['report']
+
+        for _ in range(2):
+            response = request(target=str(PACKAGES / "InvalidJSONCFile"), format="sarif")
+            sarif = json.loads(response['report'])
+            assert '$schema' in sarif
+            assert len(sarif['runs']) == 1
+
+        assert 'error' in request(target=str(tmp_path / "missing"))
+        assert 'error' in request(command="unknown")
+        assert request(command="shutdown") == {'ok': True}
+
+    thread.join(10)
+    assert not thread.is_alive()
+    assert not socket_path.exists()
@@ -0,0 +1,163 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import re
+import threading
+
+import pytest
+
+from st_package_reviewer import repo_tools, snapshots
+from st_package_reviewer.__main__ import main
+from st_package_reviewer.check import repo as repo_c
+from st_package_reviewer.runner import CheckRunner
+
+# Recorded repository data, served in pages of two tags
+REPOSITORIES = {
+    ("owner", "many-tags"): {
+        'nameWithOwner': "owner/many-tags",
+        'pushedAt': "2024-05-01T12:00:00Z",
+        'defaultBranchRef': {'name': "main"},
+        'object': {'entries': [{'name': "README.md"}, {'name': "plugin.py"}]},
+        'tags': ["v1.2.0", "v1.1.0", "v1.0.0", "v0.9.0-beta", "st3-v0.1.0"],
+    },
+    ("owner", "no-readme"): {
+        'nameWithOwner': "owner/no-readme",
+        'pushedAt': "2023-01-01T00:00:00Z",
+        'defaultBranchRef': {'name': "master"},
+        'object': {'entries': [{'name': "docs"}]},
+        'tags': [],
+    },
+    ("owner", "readme-in-docs"): {
+        'nameWithOwner': "owner/readme-in-docs",
+        'pushedAt': "2023-01-01T00:00:00Z",
+        'defaultBranchRef': {'name': "main"},
+        'object': {'entries': [{'name': "docs"}]},
+        'docsFolder': {'entries': [{'name': "README.en.md"}]},
+        'tags': [],
+    },
+    ("owner", "vanishing"): {
+        'nameWithOwner': "owner/vanishing",
+        'pushedAt': "2023-01-01T00:00:00Z",
+        'defaultBranchRef': {'name': "main"},
+        'object': {'entries': [{'name': "README"}]},
+        'tags': ["v1.2.0", "v1.1.0", "v1.0.0"],
+        'vanishes': True,
+    },
+}
+PAGE_SIZE = 2
+
+
+class GraphQLStandIn(BaseHTTPRequestHandler):
+
+    queries = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.queries.append(body)
+        query, variables = body['query'], body['variables']
+        first_page = "nameWithOwner" in query
+
+        data, errors = {}, []
+        for i in map(int, re.findall(r"\br(\d+): repository\(", query)):
+            recorded = REPOSITORIES.get((variables['o%d' % i], variables['n%d' % i]))
+            if recorded is None or (recorded.get('vanishes') and not first_page):
+                data['r%d' % i] = None
+                errors.append({'type': "NOT_FOUND", 'message': "Could not resolve"})
+                continue
+            start = int(variables['c%d' % i] or 0)
+            tags = recorded['tags'][start:start + PAGE_SIZE]
+            end = start + len(tags)
+            repo = {'refs': {
+                'pageInfo': {'hasNextPage': end < len(recorded['tags']),
+                             'endCursor': str(end)},
+                'nodes': [{'name': tag} for tag in tags],
+            }}
+            if first_page:
+                repo.update({key: value for key, value in recorded.items()
+                             if key not in ('tags', 'vanishes')})
+            data['r%d' % i] = repo
+
+        response = json.dumps({'data': data, 'errors': errors}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', "application/json")
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def graphql_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GraphQLStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv('GITHUB_GRAPHQL_URL', "http://127.0.0.1:{}/".format(server.server_port))
+    monkeypatch.setenv('GITHUB_TOKEN', "token")
+    monkeypatch.setattr(snapshots, '_requests_session', None)
+    GraphQLStandIn.queries = []
+    yield GraphQLStandIn.queries
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_snapshots(graphql_server):
+    result = snapshots.fetch_snapshots([("owner", "many-tags"), ("owner", "no-readme"),
+                                        ("owner", "missing")])
+
+    many = result[("owner", "many-tags")]
+    assert [tag.name for tag in many.tags] == REPOSITORIES[("owner", "many-tags")]['tags']
+    assert many.has_readme
+    assert many.default_branch == "main"
+    assert not result[("owner", "no-readme")].has_readme
+    assert result[("owner", "missing")] is None
+    # One query for all repositories and two more for the remaining tag pages
+    assert len(graphql_server) == 3
+
+
+def test_readme_in_folder(graphql_server):
+    result = snapshots.fetch_snapshots([("owner", "readme-in-docs")])
+    assert result[("owner", "readme-in-docs")].has_readme
+
+
+def test_repository_vanishes_between_pages(graphql_server):
+    result = snapshots.fetch_snapshots([("owner", "vanishing"), ("owner", "many-tags")])
+    assert result[("owner", "vanishing")] is None
+    assert len(result[("owner", "many-tags")].tags) == 5
+
+
+def test_batches(graphql_server, monkeypatch):
+    monkeypatch.setattr(snapshots, 'BATCH_SIZE', 1)
+    result = snapshots.fetch_snapshots([("owner", "no-readme"), ("owner", "missing")])
+    assert len(result) == 2
+    assert len(graphql_server) == 2
+
+
+def test_checks_use_snapshot(graphql_server):
+    snapshot = snapshots.fetch_snapshots([("owner", "no-readme")])[("owner", "no-readme")]
+    runner = CheckRunner(repo_c.get_checkers())
+    runner.run(snapshot)
+    assert [report.message for report in runner.failures] == [
+        "Missing a README file",
+        "No semantic version tags found (no tags found at all)",
+    ]
+
+    snapshot = snapshots.fetch_snapshots([("owner", "many-tags")])[("owner", "many-tags")]
+    assert repo_tools.latest_ref(snapshot) == "tags/v1.2.0"
+    assert repo_tools.release_ref(snapshot, {'branch': "main"}) == "heads/main"
+    assert repo_tools.release_ref(snapshot, {'tags': "st3-v"}) == "tags/st3-v0.1.0"
+    assert repo_tools.release_ref(snapshot, {'tags': "st4-"}) is None
+
+
+def test_release_without_matching_tag(graphql_server, tmp_path, capsys):
+    repository = {
+        'schema_version': "3.0.0",
+        'packages': [{'name': "Many", 'details': "https://github.com/owner/many-tags",
+                      'releases': [{'sublime_text': "*", 'tags': "st4-"}]}],
+    }
+    (tmp_path / "repository.json").write_text(json.dumps(repository))
+    exit_code = main(["--no-cache", "--from-channel", str(tmp_path / "repository.json")])
+    report = json.loads(capsys.readouterr().out)
+    assert exit_code & 1
+    assert report['errors'] == ["No tag matches the release's prefix 'st4-'"]
+    assert report['ref'] is None
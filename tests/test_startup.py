@@ -0,0 +1,51 @@
+"""Guard the startup time of reviews of local packages.
+
+Pre-commit hooks run the reviewer on every commit,
+so modules that are only needed for repositories or the clipboard must be imported lazily.
+"""
+
+import os
+from pathlib import Path
+import re
+import subprocess
+import sys
+
+PACKAGE_PATH = Path(__file__).parent / "packages" / "CommandCasing"
+
+# Total import time in milliseconds, excluding the interpreter's own startup.
+# Generous to accommodate slow CI machines; override with the environment variable.
+IMPORT_BUDGET_MS = float(os.environ.get('ST_PACKAGE_REVIEWER_IMPORT_BUDGET_MS', 120))
+
+DEFERRED_MODULES = ('github3', 'requests', 'urllib3', 'pyperclip', 'asyncio',
+                    'st_package_reviewer.lib.semver', 'concurrent.futures.process')
+
+_INTERPRETER_MODULES = ('site', 'encodings')
+
+
+def _import_times():
+    """Return the top-level imports of a local review with their cumulative times in µs."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "st_package_reviewer", "--no-cache",
+         str(PACKAGE_PATH)],
+        capture_output=True, text=True, check=False,
+    )
+    assert proc.returncode == 0, proc.stderr
+    imports = {}
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)$", line)
+        if m:
+            imports[m.group(3)] = (len(m.group(2)), int(m.group(1)))
+    return imports
+
+
+def test_deferred_imports():
+    imports = _import_times()
+    assert imports, "no import times reported"
+    assert not [name for name in DEFERRED_MODULES if name in imports]
+
+
+def test_import_budget():
+    imports = _import_times()
+    total = sum(cumulative for name, (depth, cumulative) in imports.items()
+                if depth == 1 and name.split(".")[0] not in _INTERPRETER_MODULES)
+    assert total / 1000 < IMPORT_BUDGET_MS
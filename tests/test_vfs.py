@@ -0,0 +1,69 @@
+from pathlib import Path
+import zipfile
+
+import pytest
+
+from st_package_reviewer.check import file as file_c
+from st_package_reviewer.file_index import FileIndex
+from st_package_reviewer.runner import CheckRunner
+from st_package_reviewer.vfs import ZipFS
+
+packages_path = Path(__file__).with_name("packages")
+test_packages = sorted(path for path in packages_path.iterdir() if path.is_dir())
+
+
+def _zip(package_path, zip_path, prefix="owner-repo-abc1234/"):
+    with zipfile.ZipFile(zip_path, 'w') as zipf:
+        for path in sorted(package_path.rglob("*")):
+            zipf.write(path, prefix + path.relative_to(package_path).as_posix())
+    return zip_path
+
+
+def _reports(runner):
+    # Exceptions differ by identity, so only compare their messages
+    return [(report.message, report.details, str(report.exception))
+            for report in runner.failures + runner.warnings]
+
+
+@pytest.mark.parametrize('package_path', test_packages, ids=[p.name for p in test_packages])
+def test_zip_matches_folder(package_path, tmp_path):
+    folder_runner = CheckRunner(file_c.get_checkers())
+    folder_runner.run(package_path)
+
+    fs = ZipFS(_zip(package_path, tmp_path / "package.zip"), strip_root=True)
+    assert fs.base_path == tmp_path / "package.zip" / "owner-repo-abc1234"
+    zip_runner = CheckRunner(file_c.get_checkers())
+    zip_runner.run(fs.base_path, index=FileIndex.for_fs(fs))
+    fs.close()
+
+    assert _reports(zip_runner) == _reports(folder_runner)
+
+
+def test_zip_without_top_level_folder(tmp_path):
+    fs = ZipFS(_zip(packages_path / "ValidMessagesJSON", tmp_path / "package.zip", prefix=""))
+    index = FileIndex.for_fs(fs)
+    assert index.is_file("messages.json")
+    assert index.is_dir("messages")
+    with index.open("messages.json") as f:
+        assert f.read().startswith("{")
+    with pytest.raises(FileNotFoundError):
+        index.open("does-not-exist.json")
+    fs.close()
+
+
+def test_top_level_folder_is_kept(tmp_path):
+    # Unlike archives from GitHub, packages may consist of a single folder
+    fs = ZipFS(_zip(packages_path / "ValidMessagesJSON", tmp_path / "package.zip",
+                    prefix="messages/"))
+    assert fs.base_path == tmp_path / "package.zip"
+    index = FileIndex.for_fs(fs)
+    assert index.is_file("messages/messages.json")
+    assert not index.is_file("messages.json")
+    fs.close()
+
+
+def test_invalid_archive(tmp_path):
+    path = tmp_path / "empty.sublime-package"
+    path.touch()
+    with pytest.raises(zipfile.BadZipFile):
+        ZipFS(path)